@@ -1,5 +1,25 @@
-from Crb_currency_api.crb_currency_api import (
-    CrbRequestCurrencyApi,
-)  #  импорт из Crb_currency_api
+from typing import TYPE_CHECKING
 
-__all__ = ["CrbRequestCurrencyApi"]
+if TYPE_CHECKING:
+    from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+    from Crb_currency_api.sync_api import SyncCrbCurrencyApi
+
+__all__ = ["CrbRequestCurrencyApi", "SyncCrbCurrencyApi"]
+
+#  Модули клиентов импортируются при первом обращении к имени (PEP 562),
+#  чтобы `import Crb_currency_api` не тянул asyncio и зависимости клиентов
+_LAZY = {
+    "CrbRequestCurrencyApi": "Crb_currency_api.crb_currency_api",
+    "SyncCrbCurrencyApi": "Crb_currency_api.sync_api",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
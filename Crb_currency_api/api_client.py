@@ -1,66 +1,273 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
 import httpx
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception
+from cachetools import LRUCache
+from tenacity import (
+    RetryCallState,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_after_delay,
+)
+
+from Crb_currency_api.metrics import Observer, get_observer
+from Crb_currency_api.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+T = TypeVar("T")
 
 
 class ApiClient:
     """Асинхронный HTTP-клиент для выполнения запросов к API с повторными попытками.
 
-    Обрабатывает GET-запросы с настраиваемыми повторными попытками для определённых
-    кодов состояния (например, ограничение скорости или ошибки сервера).
+    Обрабатывает GET-запросы с повторными попытками по политике RetryPolicy:
+    экспоненциальная задержка с джиттером, повторы при ограничении скорости,
+    ошибках сервера и транспорта, общий срок вызова и, по желанию, дублирование
+    медленных запросов. Предохранитель CircuitBreaker прекращает обращения к
+    источнику, пока тот недоступен.
+    Запрашивает сжатые ответы (gzip/deflate) и поддерживает условные запросы:
+    при ответе 304 Not Modified переиспользуется ранее распарсенный результат.
 
     Атрибуты:
-        RETRIES (int): Количество попыток повтора (по умолчанию: 3).
-        RETRY_STATUS_CODES (list): Коды состояния HTTP, при которых выполняются повторы (например, 429, 500).
+        ACCEPT_ENCODING (str): Поддерживаемые способы сжатия ответа.
         client (httpx.AsyncClient): Внутренний HTTP-клиент.
+        timeout (float): Таймаут одной попытки запроса в секундах.
+        policy (RetryPolicy): Политика повторов.
+        breaker (CircuitBreaker): Предохранитель запросов к источнику.
+        not_modified (int): Количество ответов 304, обслуженных без парсинга.
+        observer (Observer): Получатель событий запросов и повторов.
     """
 
-    RETRIES = 3
-    RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+    ACCEPT_ENCODING = "gzip, deflate"
 
-    def __init__(self, timeout: float = 10.0):
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        conditional_cache_size: int = 64,
+        observer: Optional[Observer] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
         """Инициализировать клиент API с заданным таймаутом.
 
         Аргументы:
             timeout (float): Таймаут запроса в секундах (по умолчанию: 10.0).
+            transport (Optional[httpx.AsyncBaseTransport]): Транспорт httpx,
+                например для подмены сервера в тестах (по умолчанию: сеть).
+            conditional_cache_size (int): Сколько URL хранить для условных
+                запросов (по умолчанию: 64).
+            observer (Optional[Observer]): Получатель событий запросов и повторов
+                (по умолчанию: get_observer()).
+            retry_policy (Optional[RetryPolicy]): Политика повторов
+                (по умолчанию: RetryPolicy()).
+            circuit_breaker (Optional[CircuitBreaker]): Предохранитель
+                (по умолчанию: свой CircuitBreaker() у каждого клиента).
         """
 
-        self.client = httpx.AsyncClient(timeout=timeout)
-        self.get = retry(
-            stop=stop_after_attempt(self.RETRIES),
-            wait=wait_fixed(2),
-            retry=retry_if_exception(self._should_retry),
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            transport=transport,
+            headers={"Accept-Encoding": self.ACCEPT_ENCODING},
+        )
+        self._conditional: LRUCache[str, Tuple[Optional[str], Optional[str], Any]] = (
+            LRUCache(maxsize=conditional_cache_size)
+        )
+        self.not_modified = 0
+        self.observer = observer or get_observer()
+        self.timeout = timeout
+        self.policy = retry_policy or RetryPolicy()
+        self.breaker = circuit_breaker or CircuitBreaker()
+        stop = stop_after_attempt(self.policy.attempts)
+        if self.policy.deadline is not None:
+            stop = stop | stop_after_delay(self.policy.deadline)
+        self._get_with_retries = retry(
+            stop=stop,
+            wait=self.policy.wait,
+            retry=retry_if_exception(self.policy.is_transient),
+            before_sleep=self._before_retry,
+            reraise=True,
         )(self._get)
 
-    def _should_retry(self, exc: BaseException) -> bool:
-        """Определить, нужно ли повторить запрос на основе возникшего исключения.
+    def _before_retry(self, state: RetryCallState) -> None:
+        """Сообщить наблюдателю о предстоящем повторе запроса.
 
         Аргументы:
-            exc (BaseException): Исключение, возникшее во время запроса.
+            state (RetryCallState): Состояние повторов tenacity.
+        """
+        url = state.args[0] if state.args else state.kwargs.get("url", "")
+        error = state.outcome.exception() if state.outcome else None
+        self.observer.retry(url, state.attempt_number, error)
 
-        Возвращает:
-            bool: True, если запрос нужно повторить, иначе False.
+    def _breaker_changed(self, state: Optional[str]) -> None:
+        """Сообщить наблюдателю о смене состояния предохранителя.
+
+        Аргументы:
+            state (Optional[str]): Новое состояние или None, если не изменилось.
         """
-        return (
-            isinstance(exc, httpx.HTTPStatusError)
-            and exc.response.status_code in self.RETRY_STATUS_CODES
-        )
+        if state is not None:
+            self.observer.circuit_state(state)
 
-    async def _get(self, url: str) -> httpx.Response:
+    async def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
         """Выполнить асинхронный GET-запрос с повторными попытками.
 
         Аргументы:
             url (str): URL для запроса.
+            headers (Optional[Dict[str, str]]): Дополнительные заголовки запроса.
+
+        Возвращает:
+            httpx.Response: Ответ от сервера (304 — только для условного запроса).
+
+        Исключения:
+            CircuitOpenError: Если предохранитель разомкнут.
+            httpx.HTTPError: Если запрос завершился ошибкой после всех попыток
+                или не уложился в общий срок.
+        """
+        if not self.breaker.allow():
+            self.observer.circuit_rejected(url)
+            raise CircuitOpenError(
+                f"Источник недоступен, запросы приостановлены: {url}"
+            )
+        deadline = self.policy.deadline
+        deadline_at = None if deadline is None else time.monotonic() + deadline
+        try:
+            response = await self._get_with_retries(url, headers, deadline_at)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as exc:
+            if self.policy.is_transient(exc):
+                self._breaker_changed(self.breaker.record_failure())
+            else:  # Источник ответил, ошибка в самом запросе
+                self._breaker_changed(self.breaker.record_success())
+            raise
+        self._breaker_changed(self.breaker.record_success())
+        return response
+
+    async def _get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        deadline_at: Optional[float] = None,
+    ) -> httpx.Response:
+        """Выполнить одну попытку запроса, дублируя её, если ответ задерживается.
+
+        Аргументы:
+            url (str): URL для запроса.
+            headers (Optional[Dict[str, str]]): Дополнительные заголовки запроса.
+            deadline_at (Optional[float]): Момент time.monotonic(), к которому
+                вызов должен завершиться.
 
         Возвращает:
             httpx.Response: Ответ от сервера.
 
         Исключения:
-            httpx.HTTPStatusError: Если запрос завершился ошибкой после всех попыток.
+            httpx.HTTPError: Если попытка завершилась ошибкой.
         """
-        response = await self.client.get(url)
+        hedge_after = self.policy.hedge_after
+        if hedge_after is None:
+            return await self._send(url, headers, deadline_at)
+        pending = {asyncio.ensure_future(self._send(url, headers, deadline_at))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if not done:
+                self.observer.hedge(url)
+                pending.add(
+                    asyncio.ensure_future(self._send(url, headers, deadline_at))
+                )
+            error: Optional[BaseException] = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = error or task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        deadline_at: Optional[float],
+    ) -> httpx.Response:
+        """Отправить GET-запрос с таймаутом, не выходящим за общий срок.
+
+        Аргументы:
+            url (str): URL для запроса.
+            headers (Optional[Dict[str, str]]): Дополнительные заголовки запроса.
+            deadline_at (Optional[float]): Момент завершения общего срока.
+
+        Возвращает:
+            httpx.Response: Ответ от сервера (304 — только для условного запроса).
+
+        Исключения:
+            httpx.HTTPStatusError: Если сервер ответил ошибкой.
+            httpx.TransportError: Если запрос не выполнен или истёк срок.
+        """
+        kwargs: Dict[str, Any] = {}
+        if deadline_at is not None:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise httpx.TimeoutException(f"Истёк общий срок запроса: {url}")
+            if remaining < self.timeout:
+                kwargs["timeout"] = remaining
+        start = time.perf_counter()
+        try:
+            response = await self.client.get(url, headers=headers, **kwargs)
+        except httpx.TransportError:
+            self.observer.request(url, None, time.perf_counter() - start)
+            raise
+        self.observer.request(url, response.status_code, time.perf_counter() - start)
+        if response.status_code == httpx.codes.NOT_MODIFIED and headers:
+            return response
         response.raise_for_status()
         return response
 
+    async def get_parsed(self, url: str, parse: Callable[[httpx.Response], T]) -> T:
+        """Выполнить условный GET-запрос и распарсить ответ.
+
+        Если для URL известны ETag или Last-Modified, они передаются в
+        If-None-Match/If-Modified-Since. При ответе 304 возвращается результат
+        предыдущего парсинга без повторной загрузки и разбора тела.
+
+        Аргументы:
+            url (str): URL для запроса.
+            parse (Callable[[httpx.Response], T]): Функция разбора ответа.
+
+        Возвращает:
+            T: Результат разбора ответа.
+
+        Исключения:
+            httpx.HTTPStatusError: Если запрос завершился ошибкой после всех попыток.
+        """
+        cached = self._conditional.get(url)
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        response = await self.get(url, headers=headers)
+        if response.status_code == httpx.codes.NOT_MODIFIED and cached is not None:
+            self.not_modified += 1
+            return cached[2]
+        parsed = parse(response)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._conditional[url] = (etag, last_modified, parsed)
+        return parsed
+
     async def __aenter__(self):
         """Вход в асинхронный контекстный менеджер.
 
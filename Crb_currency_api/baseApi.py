@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
+from datetime import date
 from decimal import Decimal
+from typing import Optional
 
 
 class BaseApi(ABC):
@@ -13,11 +15,14 @@ class BaseApi(ABC):
     """
 
     @abstractmethod
-    async def get_currency_rate(self, currency_code: str) -> Decimal:
+    async def get_currency_rate(
+        self, currency_code: str, on: Optional[date] = None
+    ) -> Decimal:
         """Получить курс валюты относительно базовой валюты.
 
         Аргументы:
             currency_code (str): Код валюты (например, 'USD', 'EUR').
+            on (Optional[date]): Дата, на которую нужен курс (по умолчанию: актуальный).
 
         Возвращает:
             Decimal: Курс указанной валюты относительно базовой валюты.
@@ -29,7 +34,11 @@ class BaseApi(ABC):
 
     @abstractmethod
     async def exchange(
-        self, from_currency: str, to_currency: str, amount: Decimal
+        self,
+        from_currency: str,
+        to_currency: str,
+        amount: Decimal,
+        on: Optional[date] = None,
     ) -> Decimal:
         """Конвертировать сумму из одной валюты в другую относительно базовой валюты.
 
@@ -37,6 +46,7 @@ class BaseApi(ABC):
             from_currency (str): Код валюты, из которой конвертируем (например, 'USD').
             to_currency (str): Код валюты, в которую конвертируем (например, 'EUR').
             amount (Decimal): Сумма для конвертации.
+            on (Optional[date]): Дата, на которую нужен курс (по умолчанию: актуальный).
 
         Возвращает:
             Decimal: Сконвертированная сумма в целевой валюте.
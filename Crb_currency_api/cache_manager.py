@@ -1,39 +1,95 @@
-from cachetools import TTLCache
-from datetime import datetime, timedelta
-from typing import Any
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+from Crb_currency_api.metrics import Observer, get_observer
+
+# Московское время (UTC+3, без перехода на летнее время), по нему публикует ЦБ
+MOSCOW_TZ = timezone(timedelta(hours=3), "MSK")
+
+
+class _Entry:
+    """Запись кэша: значение, момент истечения (time.monotonic) и размер."""
+
+    __slots__ = ("value", "expires", "size")
+
+    def __init__(self, value: Any, expires: float, size: int):
+        self.value = value
+        self.expires = expires
+        self.size = size
 
 
 class CacheManager:
-    """Менеджер кэша с динамическим TTL, учитывающим выходные дни.
+    """Кэш с собственным сроком жизни у каждой записи и вытеснением LRU.
+
+    Срок жизни задаётся при записи: по умолчанию — до публикации следующих
+    курсов (до полуночи следующего рабочего дня по московскому времени,
+    понедельник для выходных, независимо от часового пояса сервера), PERMANENT —
+    бессрочно (например, для курсов на прошедшие даты) или число секунд.
+    Запись нового ключа не затрагивает остальные.
 
-    Управляет кэшем, устанавливая время жизни данных до полуночи следующего рабочего
-    дня (понедельник для выходных, следующий день для будней).
+    Объём кэша ограничен maxsize: числом записей или, если задан getsizeof,
+    суммарным размером значений. При переполнении вытесняются давно не
+    использованные записи; истёкшие записи удаляются при обращении к ним или
+    при вытеснении.
+
+    Ключи разных подсистем разделяются пространствами имён (namespace());
+    пространство может получать уведомления об удалении своих записей, чтобы
+    освобождать связанные с ними структуры.
 
     Атрибуты:
-        cache (TTLCache): Внутренний объект кэша.
+        PERMANENT (float): Срок жизни бессрочной записи.
+        maxsize (int): Максимальный объём кэша.
+        getsizeof (Optional[Callable[[Any], int]]): Функция размера значения.
+        currsize (int): Текущий объём кэша.
+        hits (int): Количество попаданий.
+        misses (int): Количество промахов.
+        evictions (Dict[str, int]): Количество удалённых записей по причинам:
+            'expired', 'size', 'invalidated'.
+        observer (Observer): Получатель событий попаданий, промахов и удалений.
     """
 
-    def __init__(self, maxsize: int = 100):
-        """Инициализировать менеджер кэша с максимальным размером.
+    PERMANENT = math.inf
+
+    def __init__(
+        self,
+        maxsize: int = 100,
+        observer: Optional[Observer] = None,
+        getsizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        """Инициализировать пустой кэш.
 
         Аргументы:
-            maxsize (int): Максимальное количество элементов в кэше (по умолчанию: 100).
+            maxsize (int): Максимальное количество записей или, если задан
+                getsizeof, их суммарный размер (по умолчанию: 100).
+            observer (Optional[Observer]): Получатель событий кэша
+                (по умолчанию: get_observer()).
+            getsizeof (Optional[Callable[[Any], int]]): Функция размера значения,
+                например в байтах (по умолчанию: каждая запись имеет размер 1).
         """
-        self.cache: TTLCache[str, Any] = TTLCache(
-            maxsize=maxsize, ttl=self._calculate_ttl()
-        )
+        self.maxsize = maxsize
+        self.getsizeof = getsizeof
+        self.observer = observer or get_observer()
+        self.currsize = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions: Dict[str, int] = {"expired": 0, "size": 0, "invalidated": 0}
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._removal_listeners: Dict[str, Callable[[str, Any], None]] = {}
 
-    def _calculate_ttl(self) -> int:
+    def calculate_ttl(self) -> int:
         """Рассчитать TTL в секундах до следующего рабочего дня.
 
-        TTL устанавливается:
+        TTL устанавливается по московскому времени:
         - До полуночи следующего дня для понедельника-четверга.
         - До полуночи понедельника для пятницы-воскресенья.
 
         Возвращает:
             int: TTL в секундах.
         """
-        now = datetime.now()
+        now = datetime.now(MOSCOW_TZ)
         weekday = now.weekday()  # 0 = понедельник, 6 = воскресенье
 
         if weekday < 4:  # Понедельник-четверг
@@ -54,25 +110,158 @@ class CacheManager:
         return max(ttl, 1)  # Минимальный TTL — 1 секунда
 
     def get(self, key: str):
-        """Получить значение из кэша.
+        """Получить значение из кэша и отметить запись как использованную.
+
+        Аргументы:
+            key (str): Ключ для поиска.
+
+        Возвращает:
+            Значение из кэша или None, если ключ не найден или запись истекла.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires <= time.monotonic():
+            self._remove(key, "expired")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            self.observer.cache_miss(key)
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.observer.cache_hit(key)
+        return entry.value
+
+    def peek(self, key: str):
+        """Получить значение, не изменяя кэш и не учитывая обращение.
+
+        Безопасно вызывать из других потоков: метод только читает запись.
 
         Аргументы:
             key (str): Ключ для поиска.
 
         Возвращает:
-            Значение из кэша или None, если ключ не найден.
+            Значение из кэша или None, если ключ не найден или запись истекла.
         """
-        return self.cache.get(key)
+        entry = self._entries.get(key)
+        if entry is None or entry.expires <= time.monotonic():
+            return None
+        return entry.value
 
-    def set(self, key: str, value):
-        """Сохранить значение в кэше с обновлённым TTL.
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        """Сохранить значение в кэше, не затрагивая другие ключи.
 
         Аргументы:
             key (str): Ключ для сохранения значения.
             value: Значение для кэширования.
+            ttl (Optional[float]): Срок жизни записи в секундах или PERMANENT
+                (по умолчанию: до публикации следующих курсов).
+
+        Исключения:
+            ValueError: Если значение больше всего кэша.
+        """
+        size = self.getsizeof(value) if self.getsizeof is not None else 1
+        if size > self.maxsize:
+            raise ValueError(f"Значение размером {size} больше кэша ({self.maxsize})")
+        if ttl is None:
+            ttl = self.calculate_ttl()
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.currsize -= old.size
+        while self._entries and self.currsize + size > self.maxsize:
+            oldest = next(iter(self._entries))
+            expired = self._entries[oldest].expires <= time.monotonic()
+            self._remove(oldest, "expired" if expired else "size")
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, size)
+        self.currsize += size
+
+    def delete(self, key: str) -> bool:
+        """Удалить запись.
+
+        Аргументы:
+            key (str): Ключ записи.
+
+        Возвращает:
+            bool: True, если запись была в кэше.
+        """
+        if key not in self._entries:
+            return False
+        self._remove(key, "invalidated")
+        return True
+
+    def clear(self, prefix: str = "") -> None:
+        """Удалить все записи или записи с ключами, начинающимися с prefix.
+
+        Аргументы:
+            prefix (str): Начало ключей удаляемых записей (по умолчанию: все).
+        """
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self._remove(key, "invalidated")
+
+    def expire(self) -> int:
+        """Удалить все истёкшие записи.
+
+        Возвращает:
+            int: Количество удалённых записей.
+        """
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires <= now]
+        for key in expired:
+            self._remove(key, "expired")
+        return len(expired)
+
+    def _remove(self, key: str, reason: str) -> None:
+        """Удалить запись и учесть причину удаления.
+
+        Аргументы:
+            key (str): Ключ записи.
+            reason (str): Причина: 'expired', 'size' или 'invalidated'.
         """
-        self.cache = TTLCache(maxsize=self.cache.maxsize, ttl=self._calculate_ttl())
-        self.cache[key] = value
+        entry = self._entries.pop(key)
+        self.currsize -= entry.size
+        self.evictions[reason] += 1
+        self.observer.cache_eviction(key, reason)
+        prefix = key[: key.find(":") + 1]
+        listener = self._removal_listeners.get(prefix) if prefix else None
+        if listener is not None:
+            listener(key[len(prefix) :], entry.value)
+
+    def namespace(
+        self,
+        name: str,
+        ttl: Optional[float] = None,
+        on_remove: Optional[Callable[[str, Any], None]] = None,
+    ) -> "CacheNamespace":
+        """Получить представление кэша с ключами в пространстве имён name.
+
+        Аргументы:
+            name (str): Имя пространства (например, 'history' или 'pairs').
+            ttl (Optional[float]): Срок жизни записей пространства в секундах
+                или PERMANENT (по умолчанию: до публикации следующих курсов).
+            on_remove (Optional[Callable[[str, Any], None]]): Вызывается с
+                ключом (без приставки) и значением каждой удалённой записи
+                пространства — вытесненной, истёкшей или удалённой явно
+                (по умолчанию: не вызывается).
+
+        Возвращает:
+            CacheNamespace: Представление, добавляющее 'name:' к ключам.
+        """
+        if on_remove is not None:
+            self._removal_listeners[f"{name}:"] = on_remove
+        return CacheNamespace(self, name, ttl)
+
+    def stats(self) -> Dict[str, int]:
+        """Получить статистику кэша.
+
+        Возвращает:
+            Dict[str, int]: Попадания, промахи, удаления по причинам, число
+                записей и текущий объём.
+        """
+        values = {"hits": self.hits, "misses": self.misses}
+        for reason, count in self.evictions.items():
+            values[f"evictions_{reason}"] = count
+        values["entries"] = len(self._entries)
+        values["size"] = self.currsize
+        return values
 
     def __contains__(self, key: str) -> bool:
         """Проверить, существует ли ключ в кэше.
@@ -81,6 +270,77 @@ class CacheManager:
             key (str): Ключ для проверки.
 
         Возвращает:
-            bool: True, если ключ существует, иначе False.
+            bool: True, если ключ существует и запись не истекла, иначе False.
+        """
+        return self.peek(key) is not None
+
+    def __len__(self) -> int:
+        """Количество записей, включая ещё не удалённые истёкшие."""
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        """Перебрать ключи от давно не использованных к недавним."""
+        return iter(list(self._entries))
+
+
+class CacheNamespace:
+    """Пространство имён в CacheManager: те же записи, лимиты и статистика.
+
+    Ключами могут быть любые значения (например, даты): в общем кэше запись
+    хранится под ключом 'имя:str(ключ)'. Пространство поддерживает доступ как к
+    словарю: [], [] = и in.
+
+    Атрибуты:
+        cache (CacheManager): Общий кэш.
+        prefix (str): Приставка ключей пространства ('имя:').
+        ttl (Optional[float]): Срок жизни записей по умолчанию.
+    """
+
+    def __init__(self, cache: CacheManager, name: str, ttl: Optional[float] = None):
+        """Инициализировать пространство имён.
+
+        Аргументы:
+            cache (CacheManager): Общий кэш.
+            name (str): Имя пространства.
+            ttl (Optional[float]): Срок жизни записей в секундах или PERMANENT
+                (по умолчанию: до публикации следующих курсов).
         """
-        return key in self.cache
+        self.cache = cache
+        self.prefix = f"{name}:"
+        self.ttl = ttl
+
+    def get(self, key: Hashable):
+        """Получить значение по ключу пространства (см. CacheManager.get)."""
+        return self.cache.get(f"{self.prefix}{key}")
+
+    def peek(self, key: Hashable):
+        """Получить значение, не изменяя кэш (см. CacheManager.peek)."""
+        return self.cache.peek(f"{self.prefix}{key}")
+
+    def set(self, key: Hashable, value, ttl: Optional[float] = None):
+        """Сохранить значение по ключу пространства (см. CacheManager.set).
+
+        Без ttl используется срок жизни пространства.
+        """
+        self.cache.set(f"{self.prefix}{key}", value, self.ttl if ttl is None else ttl)
+
+    def delete(self, key: Hashable) -> bool:
+        """Удалить запись по ключу пространства (см. CacheManager.delete)."""
+        return self.cache.delete(f"{self.prefix}{key}")
+
+    def clear(self) -> None:
+        """Удалить все записи пространства."""
+        self.cache.clear(self.prefix)
+
+    def __getitem__(self, key: Hashable):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value) -> None:
+        self.set(key, value)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Проверить, существует ли ключ в пространстве."""
+        return f"{self.prefix}{key}" in self.cache
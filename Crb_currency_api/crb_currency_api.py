@@ -1,96 +1,617 @@
-from decimal import Decimal, getcontext
-from typing import Dict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+)
+
 from Crb_currency_api.baseApi import BaseApi
-from Crb_currency_api.api_client import ApiClient
-from Crb_currency_api.cache_manager import CacheManager
-from Crb_currency_api.parsers import XmlParser
+from Crb_currency_api.cross_rates import CrossRateMatrix
+from Crb_currency_api.history_index import Moment
+from Crb_currency_api.metrics import Observer
+from Crb_currency_api.rate_store import RateStore, shared_client, shared_store
+from Crb_currency_api.refresher import RateRefresher
+from Crb_currency_api.snapshot import RATE_QUANTUM, RateSnapshot
+from Crb_currency_api.watch import RateUpdate
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from Crb_currency_api.api_client import ApiClient
+    from Crb_currency_api.parsers import JsonParser, XmlDynamicParser, XmlParser
+    from Crb_currency_api.providers import CompositeSource
 
 
 class CrbRequestCurrencyApi(BaseApi):
     """Клиент API для получения курсов валют от Центрального банка России.
 
     Поддерживает произвольные базовые валюты и кэширование с учётом выходных.
+    По умолчанию все экземпляры используют общие для процесса хранилище курсов
+    и HTTP-клиент, поэтому курсы ЦБ загружаются один раз на все базовые валюты.
+    С daemon_url курсы запрашиваются не у ЦБ, а у локального сервиса курсов
+    (Crb_currency_api.daemon), общего для нескольких процессов.
+
+    HTTP-клиент и парсеры создаются при первом обращении, а httpx, tenacity и
+    ElementTree импортируются только тогда: экземпляр, обслуженный из общего
+    или постоянного кэша, не платит за них при холодном старте.
 
     Атрибуты:
         url (str): URL конечной точки API ЦБ.
+        dynamic_url (str): URL динамики курса валюты за диапазон дат.
         DEFAULT_BASE_CURRENCY (str): Базовая валюта по умолчанию (RUB).
+        RANGE_CONCURRENCY (int): Число одновременных запросов в load_range.
+        MAX_STALENESS (float): Допустимый возраст снимка при фоновом обновлении, с.
         base_currency (str): Настроенная базовая валюта.
-        client (ApiClient): HTTP-клиент для запросов.
+        client (ApiClient): HTTP-клиент для запросов (создаётся при первом обращении).
+        store (RateStore): Хранилище курсов относительно RUB.
         cache (CacheManager): Кэш для хранения курсов.
         parser (CbrXmlParser): Парсер для XML-ответов ЦБ.
+        dynamic_parser (XmlDynamicParser): Парсер динамики курса валюты.
+        json_parser (JsonParser): Парсер ответов локального сервиса курсов.
+        daemon_url (Optional[str]): Адрес локального сервиса курсов.
+        inflight (SingleFlight): Реестр выполняющихся загрузок курсов.
     """
 
     url = "http://www.cbr.ru/scripts/XML_daily.asp"
+    dynamic_url = "http://www.cbr.ru/scripts/XML_dynamic.asp"
     DEFAULT_BASE_CURRENCY = "RUB"
+    RANGE_CONCURRENCY = 8
+    MAX_STALENESS = 36 * 3600
 
-    def __init__(self, base_currency: str = DEFAULT_BASE_CURRENCY):
+    def __init__(
+        self,
+        base_currency: str = DEFAULT_BASE_CURRENCY,
+        shared: bool = True,
+        store: Optional[RateStore] = None,
+        client: Optional["ApiClient"] = None,
+        observer: Optional[Observer] = None,
+        daemon_url: Optional[str] = None,
+        source: Optional["CompositeSource"] = None,
+    ):
         """Инициализировать клиент API ЦБ РФ.
 
         Аргументы:
             base_currency (str): Код базовой валюты (например, 'USD', 'EUR'). По умолчанию 'RUB'.
+            shared (bool): Использовать общие для процесса хранилище курсов и
+                HTTP-клиент. False создаёт изолированные (например, для тестов).
+            store (Optional[RateStore]): Явно заданное хранилище курсов, например
+                с постоянным кэшем на диске (по умолчанию: определяется shared).
+            client (Optional[ApiClient]): Явно заданный HTTP-клиент; закрывается
+                вместе с экземпляром (по умолчанию: определяется shared).
+            observer (Optional[Observer]): Получатель метрик парсера, а также
+                создаваемых экземпляром хранилища и клиента; общие объекты
+                используют наблюдатель из set_observer() (по умолчанию: он же).
+            daemon_url (Optional[str]): Адрес локального сервиса курсов, например
+                'http://127.0.0.1:8080' или 'unix:/run/crb-rates.sock'; если задан,
+                экземпляр создаёт собственный HTTP-клиент (по умолчанию: запросы к ЦБ).
+            source (Optional[CompositeSource]): Источник снимков курсов с
+                резервными зеркалами; если задан, через него запрашиваются
+                только снимки курсов (актуальные и на дату). Динамика курса и
+                внутренние коды валют по-прежнему запрашиваются у ЦБ или
+                локального сервиса курсов, без резервирования и Provenance
+                (по умолчанию: XML_daily ЦБ).
         """
         self.base_currency = base_currency.upper()
-        self.client = ApiClient()
-        self.cache = CacheManager()
-        self.parser = XmlParser()
+        self._observer = observer
+        self._owns_client = not shared or client is not None or daemon_url is not None
+        self._uds_path: Optional[str] = None
+        self.source = source
+        if daemon_url is not None and daemon_url.startswith("unix:"):
+            self._uds_path = daemon_url[len("unix:") :]
+            daemon_url = "http://localhost"
+        self.daemon_url = daemon_url.rstrip("/") if daemon_url else None
+        self._client = client
+        self._client_factory: Callable[[], "ApiClient"] = self._make_client
+        if store is None:
+            store = RateStore(observer=observer) if not shared else shared_store()
+        self.store = store
+        self.cache = self.store.cache
+        self.inflight = self.store.inflight
+        self._parser: Optional["XmlParser"] = None
+        self._dynamic_parser: Optional["XmlDynamicParser"] = None
+        self._json_parser: Optional["JsonParser"] = None
+
+    @property
+    def client(self) -> "ApiClient":
+        """HTTP-клиент для запросов; создаётся при первом обращении."""
+        client = self._client
+        if client is None:
+            client = self._client = self._client_factory()
+        return client
+
+    def _make_client(self) -> "ApiClient":
+        """Создать HTTP-клиент экземпляра или вернуть общий для процесса.
+
+        Возвращает:
+            ApiClient: HTTP-клиент для запросов.
+        """
+        if not self._owns_client:
+            return shared_client()
+        from Crb_currency_api.api_client import ApiClient
+
+        if self._uds_path is None:
+            return ApiClient(observer=self._observer)
+        import httpx
 
-    async def _fetch_rates(self) -> Dict[str, Decimal]:
+        transport = httpx.AsyncHTTPTransport(uds=self._uds_path)
+        return ApiClient(transport=transport, observer=self._observer)
+
+    @property
+    def parser(self) -> "XmlParser":
+        """Парсер ежедневных курсов ЦБ; создаётся при первом обращении."""
+        if self._parser is None:
+            from Crb_currency_api.parsers import XmlParser
+
+            self._parser = XmlParser(observer=self._observer)
+        return self._parser
+
+    @property
+    def dynamic_parser(self) -> "XmlDynamicParser":
+        """Парсер динамики курса валюты; создаётся при первом обращении."""
+        if self._dynamic_parser is None:
+            from Crb_currency_api.parsers import XmlDynamicParser
+
+            self._dynamic_parser = XmlDynamicParser(observer=self._observer)
+        return self._dynamic_parser
+
+    @property
+    def json_parser(self) -> "JsonParser":
+        """Парсер ответов локального сервиса курсов; создаётся при первом обращении."""
+        if self._json_parser is None:
+            from Crb_currency_api.parsers import JsonParser
+
+            self._json_parser = JsonParser()
+        return self._json_parser
+
+    @property
+    def coalesced_requests(self) -> int:
+        """Количество вызовов, дождавшихся чужой загрузки вместо своей."""
+        return self.inflight.coalesced
+
+    async def _fetch_rates(self, on: Optional[date] = None) -> Mapping[str, Decimal]:
         """Получить и распарсить курсы валют от API ЦБ.
 
+        Аргументы:
+            on (Optional[date]): Дата, на которую нужны курсы (по умолчанию: актуальные).
+
+        Возвращает:
+            Mapping[str, Decimal]: Снимок курсов валют относительно RUB.
+
+        Исключения:
+            httpx.HTTPStatusError: Если запрос к API завершился ошибкой.
+        """
+        if self.source is not None:
+            return await self.source.fetch(on)
+        if self.daemon_url is not None:
+            url = f"{self.daemon_url}/v1/snapshot"
+            if on is not None:
+                url += f"?date={on.isoformat()}"
+            return await self.client.get_parsed(
+                url, lambda response: self.json_parser.parse_snapshot(response.content)
+            )
+        url = self.url if on is None else f"{self.url}?date_req={on:%d/%m/%Y}"
+        return await self.client.get_parsed(
+            url, lambda response: self.parser.parse_snapshot(response.content)
+        )
+
+    async def _valute_id(self, currency_code: str) -> str:
+        """Получить внутренний код ЦБ валюты для запроса динамики курса.
+
+        Коды запоминаются при разборе ежедневных курсов; если код ещё неизвестен,
+        ежедневные курсы запрашиваются заново напрямую у ЦБ: источник source
+        используется только для снимков, и его зеркала внутренних кодов не отдают.
+
+        Аргументы:
+            currency_code (str): Код валюты (например, 'USD').
+
+        Возвращает:
+            str: Внутренний код ЦБ (например, 'R01235').
+
+        Исключения:
+            ValueError: Если валюта не найдена в данных ЦБ.
+        """
+        from Crb_currency_api.parsers import valute_id
+
+        found = valute_id(currency_code)
+        if found is None:
+            response = await self.client.get(self.url)
+            self.parser.parse_snapshot(response.content)
+            found = valute_id(currency_code)
+            if found is None:
+                raise ValueError(f"Валюта {currency_code} не найдена в данных ЦБ")
+        return found
+
+    async def _fetch_series(
+        self, currency_code: str, start: date, end: date
+    ) -> Mapping[date, Decimal]:
+        """Получить и распарсить динамику курса валюты за диапазон дат.
+
+        Динамика запрашивается у локального сервиса курсов или XML_dynamic ЦБ;
+        источник source к ней не применяется.
+
+        Аргументы:
+            currency_code (str): Код валюты.
+            start (date): Первый день диапазона.
+            end (date): Последний день диапазона (включительно).
+
         Возвращает:
-            Dict[str, Decimal]: Курсы валют относительно RUB.
+            Mapping[date, Decimal]: Курсы относительно RUB по датам их смены.
 
         Исключения:
+            ValueError: Если валюта не найдена в данных ЦБ.
             httpx.HTTPStatusError: Если запрос к API завершился ошибкой.
         """
-        response = await self.client.get(self.url)
-        return self.parser.parse(response.text)
+        if self.daemon_url is not None:
+            url = (
+                f"{self.daemon_url}/v1/series?code={currency_code}"
+                f"&start={start.isoformat()}&end={end.isoformat()}"
+            )
+            return await self.client.get_parsed(
+                url, lambda response: self.json_parser.parse_series(response.content)
+            )
+        code_id = await self._valute_id(currency_code)
+        url = (
+            f"{self.dynamic_url}?date_req1={start:%d/%m/%Y}"
+            f"&date_req2={end:%d/%m/%Y}&VAL_NM_RQ={code_id}"
+        )
+        return await self.client.get_parsed(
+            url, lambda response: self.dynamic_parser.parse_series(response.content)
+        )
 
-    async def _get_all_rates(self) -> Dict[str, Decimal]:
+    async def _get_all_rates(
+        self, on: Optional[date] = None, at: Optional[Moment] = None
+    ) -> RateSnapshot:
         """Получить все курсы валют, пересчитанные относительно базовой валюты.
 
-        Извлекает курсы из кэша или запрашивает их, если кэш пуст, затем
-        пересчитывает их относительно заданной базовой валюты.
+        Извлекает курсы из кэша или запрашивает их, если кэш пуст. Пересчёт
+        относительно базовой валюты выполняется один раз на снимок курсов.
+        Одновременные промахи кэша ожидают одну общую загрузку.
+
+        Аргументы:
+            on (Optional[date]): Дата, на которую нужны курсы (по умолчанию: актуальные).
+            at (Optional[Moment]): Момент времени, курсы на который нужны
+                (по умолчанию: не используется).
 
         Возвращает:
-            Dict[str, Decimal]: Курсы валют относительно базовой валюты.
+            RateSnapshot: Курсы валют относительно базовой валюты.
 
         Исключения:
-            ValueError: Если базовая валюта не найдена в данных ЦБ.
+            ValueError: Если базовая валюта не найдена в данных ЦБ или заданы
+                одновременно on и at.
         """
-        if "rates" not in self.cache:
-            self.cache.set("rates", await self._fetch_rates())
-        rub_rates = self.cache.get("rates")
+        matrix = await self._get_matrix(on, at)
+        return matrix.rates_for(self.base_currency)
 
-        if self.base_currency not in rub_rates:
-            raise ValueError(
-                f"Базовая валюта {self.base_currency} не найдена в данных ЦБ"
+    async def _get_matrix(
+        self, on: Optional[date] = None, at: Optional[Moment] = None
+    ) -> CrossRateMatrix:
+        """Получить кросс-курсы актуального снимка, на дату или на момент времени.
+
+        Аргументы:
+            on (Optional[date]): Дата, на которую нужны курсы (по умолчанию: актуальные).
+            at (Optional[Moment]): Момент времени, курсы на который нужны
+                (по умолчанию: не используется).
+
+        Возвращает:
+            CrossRateMatrix: Кросс-курсы снимка.
+
+        Исключения:
+            ValueError: Если заданы одновременно on и at.
+        """
+        if at is not None:
+            if on is not None:
+                raise ValueError("Нельзя одновременно задать on и at")
+            return await self.store.get_matrix_at(
+                at, self._fetch_rates, self._fetch_rates
             )
+        if on is None:
+            return await self.store.get_matrix(self._fetch_rates)
+        return await self.store.get_matrix_on(on, self._fetch_rates)
+
+    async def rub_snapshot(self, on: Optional[date] = None) -> RateSnapshot:
+        """Получить исходный снимок курсов относительно RUB без округления.
+
+        В отличие от snapshot(), курсы не пересчитываются к базовой валюте и не
+        округляются до 5 знаков, поэтому снимок пригоден как источник курсов
+        для других клиентов (например, локального сервиса курсов).
+
+        Аргументы:
+            on (Optional[date]): Дата, на которую нужны курсы (по умолчанию: актуальные).
+
+        Возвращает:
+            RateSnapshot: Снимок курсов относительно RUB в том виде, в каком он
+                загружен.
+        """
+        return (await self._get_matrix(on)).rub_rates
+
+    async def snapshot(
+        self, on: Optional[date] = None, at: Optional[Moment] = None
+    ) -> RateSnapshot:
+        """Получить неизменяемый снимок курсов относительно базовой валюты.
+
+        Снимок предназначен для синхронной обработки больших пакетов: все
+        конвертации через него используют один набор курсов.
+
+        Аргументы:
+            on (Optional[date]): Дата, на которую нужны курсы (по умолчанию: актуальные).
+            at (Optional[Moment]): Момент времени (datetime или date), курсы на
+                который нужны: последняя публикация ЦБ, действовавшая в этот
+                момент по московскому времени (по умолчанию: не используется).
+
+        Возвращает:
+            RateSnapshot: Снимок курсов с датой публикации.
+
+        Исключения:
+            ValueError: Если базовая валюта не найдена в данных ЦБ или заданы
+                одновременно on и at.
+        """
+        return await self._get_all_rates(on, at)
+
+    async def snapshots_at(self, moments: Iterable[Moment]) -> List[RateSnapshot]:
+        """Получить снимки курсов, действовавших в каждый из моментов времени.
+
+        Для потока моментов по возрастанию (например, времени транзакций)
+        загруженные публикации находятся одним проходом, а курсы на остальные
+        дни загружаются параллельно, каждый день один раз.
 
-        base_rate = rub_rates[self.base_currency]
-        adjusted_rates = {code: rate / base_rate for code, rate in rub_rates.items()}
-        return adjusted_rates
+        Аргументы:
+            moments (Iterable[Moment]): Моменты времени (datetime или date);
+                datetime без часового пояса считается московским временем.
+
+        Возвращает:
+            List[RateSnapshot]: Снимки курсов относительно базовой валюты.
+
+        Исключения:
+            ValueError: Если базовая валюта не найдена в данных ЦБ.
+        """
+        matrices = await self.store.get_matrices_at(
+            moments, self._fetch_rates, self._fetch_rates, self.RANGE_CONCURRENCY
+        )
+        return [matrix.rates_for(self.base_currency) for matrix in matrices]
+
+    async def load_range(
+        self, start: date, end: date, concurrency: Optional[int] = None
+    ) -> Dict[date, RateSnapshot]:
+        """Загрузить курсы на каждый день диапазона с ограничением параллельности.
+
+        Дни, курсы на которые уже загружены, повторно не запрашиваются.
+
+        Аргументы:
+            start (date): Первый день диапазона.
+            end (date): Последний день диапазона (включительно).
+            concurrency (Optional[int]): Максимальное число одновременных запросов
+                (по умолчанию: RANGE_CONCURRENCY).
+
+        Возвращает:
+            Dict[date, RateSnapshot]: Снимки курсов относительно RUB по датам.
+        """
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        return await self.store.load_range(
+            days, self._fetch_rates, concurrency or self.RANGE_CONCURRENCY
+        )
+
+    async def get_rate_series(
+        self, currency_code: str, start: date, end: date
+    ) -> Dict[date, Decimal]:
+        """Получить курс валюты относительно базовой валюты на каждый день диапазона.
+
+        Автоматически выбирается более дешёвый способ загрузки: ежедневные курсы
+        (запрос на каждый ещё не загруженный день) или динамика курса XML_dynamic
+        (один запрос на валюту за весь диапазон). Загруженные курсы на прошедшие
+        даты сохраняются в хранилище и переиспользуются get_currency_rate(on=...).
+
+        Аргументы:
+            currency_code (str): Код валюты (например, 'USD', 'EUR').
+            start (date): Первый день диапазона.
+            end (date): Последний день диапазона (включительно).
+
+        Возвращает:
+            Dict[date, Decimal]: Курсы, действующие на каждый день, с точностью до
+                5 знаков после запятой; дни без известного курса пропускаются.
+
+        Исключения:
+            ValueError: Если валюта не найдена в данных ЦБ.
+        """
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        base = self.base_currency
+        series = await self.store.load_series(
+            {currency_code, base},
+            days,
+            self._fetch_series,
+            self._fetch_rates,
+            self.RANGE_CONCURRENCY,
+        )
+        return {
+            on: (rates[currency_code] / rates[base]).quantize(RATE_QUANTUM)
+            for on, rates in series.items()
+        }
+
+    async def rub_series(
+        self, currency_code: str, start: date, end: date
+    ) -> Dict[date, Decimal]:
+        """Получить исходные курсы валюты относительно RUB на каждый день диапазона.
+
+        В отличие от get_rate_series(), курсы не пересчитываются к базовой
+        валюте и не округляются до 5 знаков, поэтому пригодны как источник
+        динамики для других клиентов (например, локального сервиса курсов).
+
+        Аргументы:
+            currency_code (str): Код валюты (например, 'USD', 'EUR').
+            start (date): Первый день диапазона.
+            end (date): Последний день диапазона (включительно).
+
+        Возвращает:
+            Dict[date, Decimal]: Курсы относительно RUB в том виде, в каком они
+                загружены; дни без известного курса пропускаются.
+
+        Исключения:
+            ValueError: Если валюта не найдена в данных ЦБ.
+        """
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        series = await self.store.load_series(
+            {currency_code},
+            days,
+            self._fetch_series,
+            self._fetch_rates,
+            self.RANGE_CONCURRENCY,
+        )
+        return {on: rates[currency_code] for on, rates in series.items()}
+
+    def refresher(
+        self, max_staleness: Optional[float] = MAX_STALENESS, **kwargs
+    ) -> RateRefresher:
+        """Создать фоновое обновление курсов для хранилища этого экземпляра.
+
+        Пока обновление запущено, запросы не ждут ответа ЦБ: после истечения
+        кэша отдаётся предыдущий снимок, не старше max_staleness (если у
+        хранилища не задан свой). Настройки хранилища не изменяются.
+
+        Аргументы:
+            max_staleness (Optional[float]): Допустимый возраст устаревшего снимка
+                в секундах (по умолчанию: MAX_STALENESS).
+            **kwargs: Параметры RateRefresher (jitter, retry_interval, max_attempts).
+
+        Возвращает:
+            RateRefresher: Планировщик; запускается через start() или async with.
+        """
+        return RateRefresher(
+            self.store, self._fetch_rates, max_staleness=max_staleness, **kwargs
+        )
+
+    async def watch(
+        self,
+        codes: Optional[Iterable[str]] = None,
+        maxsize: int = 16,
+        initial: bool = False,
+        refresh: bool = True,
+    ) -> AsyncIterator[RateUpdate]:
+        """Получать изменения курсов по мере публикации вместо опроса.
+
+        Подписка питается тем же механизмом обновления, что и остальные
+        запросы: каждый новый снимок хранилища загружается один раз и
+        рассылается всем подписчикам. Если фоновое обновление хранилища ещё не
+        запущено, подписка запускает его и останавливает, когда закрывается
+        последняя подписка. Медленный подписчик не задерживает остальных: его
+        очередь ограничена maxsize снимками, старые выбрасываются, а изменения
+        считаются от последних отданных ему курсов.
+
+        Пример:
+            async for update in api.watch(codes=["USD", "EUR"]):
+                for code, (old, new) in update.changes.items():
+                    ...
+
+        Аргументы:
+            codes (Optional[Iterable[str]]): Отслеживаемые валюты (по умолчанию: все).
+            maxsize (int): Размер очереди снимков подписчика (по умолчанию: 16).
+            initial (bool): Сначала отдать текущие курсы как изменения с прежним
+                значением None (по умолчанию: False).
+            refresh (bool): Запустить фоновое обновление, если оно не запущено
+                (по умолчанию: True).
+
+        Возвращает:
+            AsyncIterator[RateUpdate]: Изменения курсов относительно базовой
+                валюты с точностью до 5 знаков после запятой; в каждом только
+                изменившиеся валюты.
+        """
+        watched = None if codes is None else {code.upper() for code in codes}
+        store = self.store
+        subscription = store.subscribe(maxsize)
+        if refresh and store.refresher is None:
+            subscription.refresher = self.refresher()
+            subscription.refresher.start()
+        try:
+            snapshot = store.latest or await store.get_rates(self._fetch_rates)
+            values = self._watched_rates(snapshot, watched)
+            if initial:
+                changes = {code: (None, rate) for code, rate in values.items()}
+                yield RateUpdate(snapshot.date, changes, snapshot)
+            while True:
+                snapshot = await subscription.get()
+                if snapshot is None:
+                    return
+                current = self._watched_rates(snapshot, watched)
+                changes = {
+                    code: (values.get(code), current.get(code))
+                    for code in values.keys() | current.keys()
+                    if values.get(code) != current.get(code)
+                }
+                values = current
+                if changes:
+                    yield RateUpdate(snapshot.date, changes, snapshot)
+        finally:
+            store.unsubscribe(subscription)
+            refresher = subscription.refresher
+            if refresher is not None:
+                if store.subscriptions:
+                    next(iter(store.subscriptions)).refresher = refresher
+                else:
+                    await refresher.stop()
+
+    def _watched_rates(
+        self, snapshot: RateSnapshot, codes: Optional[Collection[str]]
+    ) -> Dict[str, Decimal]:
+        """Вычислить курсы отслеживаемых валют относительно базовой валюты.
 
-    async def get_currency_rate(self, currency_code: str) -> Decimal:
+        Аргументы:
+            snapshot (RateSnapshot): Снимок курсов относительно RUB.
+            codes (Optional[Collection[str]]): Отслеживаемые валюты (None — все).
+
+        Возвращает:
+            Dict[str, Decimal]: Курсы валют, которые есть в снимке; пустой
+                словарь, если в снимке нет базовой валюты.
+        """
+        base = snapshot.get(self.base_currency)
+        if base is None:
+            return {}
+        return {
+            code: (rate / base).quantize(RATE_QUANTUM)
+            for code, rate in snapshot.items()
+            if codes is None or code in codes
+        }
+
+    async def get_currency_rate(
+        self,
+        currency_code: str,
+        on: Optional[date] = None,
+        at: Optional[Moment] = None,
+    ) -> Decimal:
         """Получить курс указанной валюты относительно базовой валюты.
 
         Аргументы:
             currency_code (str): Код валюты (например, 'USD', 'EUR').
+            on (Optional[date]): Дата, на которую нужен курс (по умолчанию: актуальный).
+            at (Optional[Moment]): Момент времени, в который действовал курс,
+                например время транзакции в выходной (по умолчанию: не используется).
 
         Возвращает:
             Decimal: Курс валюты с точностью до 5 знаков после запятой.
 
         Исключения:
-            ValueError: Если валюта не найдена в данных ЦБ.
+            ValueError: Если валюта не найдена в данных ЦБ или заданы
+                одновременно on и at.
         """
-        getcontext().prec = 5
-        rates = await self._get_all_rates()
-        if currency_code not in rates:
-            raise ValueError(f"Валюта {currency_code} не найдена")
-        return rates[currency_code]
+        if on is not None and on not in self.store.history:
+            known = self.store.known_rates(on, (currency_code, self.base_currency))
+            if known is not None:
+                rate = known[currency_code] / known[self.base_currency]
+                return rate.quantize(RATE_QUANTUM)
+        return (await self.snapshot(on, at)).rate(currency_code)
 
     async def exchange(
-        self, from_currency: str, to_currency: str, amount: Decimal
+        self,
+        from_currency: str,
+        to_currency: str,
+        amount: Decimal,
+        on: Optional[date] = None,
+        at: Optional[Moment] = None,
     ) -> Decimal:
         """Конвертировать сумму из одной валюты в другую.
 
@@ -98,23 +619,67 @@ class CrbRequestCurrencyApi(BaseApi):
             from_currency (str): Код валюты, из которой конвертируем (например, 'USD').
             to_currency (str): Код валюты, в которую конвертируем (например, 'EUR').
             amount (Decimal): Сумма для конвертации.
+            on (Optional[date]): Дата, на которую нужен курс (по умолчанию: актуальный).
+            at (Optional[Moment]): Момент времени, в который действовал курс
+                (по умолчанию: не используется).
 
         Возвращает:
             Decimal: Сконвертированная сумма с точностью до 5 знаков после запятой.
 
+        Исключения:
+            ValueError: Если одна из валют не найдена в данных ЦБ или заданы
+                одновременно on и at.
+        """
+        snapshot = await self.snapshot(on, at)
+        return snapshot.convert(from_currency, to_currency, amount)
+
+    async def exchange_array(
+        self,
+        amounts: Any,
+        from_currency: Any,
+        to_currency: Any,
+        on: Optional[date] = None,
+        dates: Any = None,
+        exact: bool = False,
+    ) -> "np.ndarray":
+        """Конвертировать столбец сумм целиком (нужен NumPy).
+
+        Коды валют отображаются в индексы вектора курсов снимка, и конвертация
+        выполняется над массивами без цикла по строкам.
+
+        Аргументы:
+            amounts: Суммы (массив NumPy или последовательность).
+            from_currency: Код исходной валюты или массив кодов по строкам.
+            to_currency: Код целевой валюты или массив кодов по строкам.
+            on (Optional[date]): Дата курсов для всех строк (по умолчанию: актуальные).
+            dates: Дата курсов для каждой строки; недостающие даты загружаются,
+                для сегодняшнего дня используется актуальный снимок
+                (по умолчанию: не используется).
+            exact (bool): Точный режим: Decimal с точностью до 5 знаков, как в
+                exchange() (по умолчанию: float64 без округления).
+
+        Возвращает:
+            np.ndarray: Суммы в целевых валютах (float64 или object с Decimal).
+
         Исключения:
             ValueError: Если одна из валют не найдена в данных ЦБ.
         """
-        getcontext().prec = 5
-        rates = await self._get_all_rates()
-        if from_currency not in rates or to_currency not in rates:
-            raise ValueError(
-                f"Одна из валют ({from_currency}, {to_currency}) не найдена"
+        from Crb_currency_api import vectorized
+
+        if dates is None:
+            if on is None:
+                matrix = await self.store.get_matrix(self._fetch_rates)
+            else:
+                matrix = await self.store.get_matrix_on(on, self._fetch_rates)
+            return vectorized.convert_array(
+                matrix, amounts, from_currency, to_currency, exact
             )
-        from_rate = rates[from_currency]
-        to_rate = rates[to_currency]
-        return (
-            (from_rate / to_rate) * amount if from_currency != to_currency else amount
+        days, _ = vectorized.unique_dates(dates)
+        matrices = await self.store.get_matrices_at(
+            days, self._fetch_rates, self._fetch_rates, self.RANGE_CONCURRENCY
+        )
+        return vectorized.convert_dated_array(
+            dict(zip(days, matrices)), dates, amounts, from_currency, to_currency, exact
         )
 
     async def __aenter__(self):
@@ -128,9 +693,12 @@ class CrbRequestCurrencyApi(BaseApi):
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Выход из асинхронного контекстного менеджера и закрытие HTTP-клиента.
 
+        Общий HTTP-клиент не закрывается: для него используется close_shared().
+
         Аргументы:
             exc_type: Тип исключения (если есть).
             exc_val: Значение исключения (если есть).
             exc_tb: Трассировка исключения (если есть).
         """
-        await self.client.__aexit__(exc_type, exc_val, exc_tb)
+        if self._owns_client and self._client is not None:
+            await self._client.__aexit__(exc_type, exc_val, exc_tb)
@@ -0,0 +1,102 @@
+from decimal import Decimal
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, Tuple
+
+from Crb_currency_api.rate_table import RateTable
+from Crb_currency_api.snapshot import RATE_QUANTUM, RateSnapshot
+
+if TYPE_CHECKING:
+    from Crb_currency_api.vectorized import RateVector
+
+# Знаков после запятой в компактных курсах относительно базы, как у RATE_QUANTUM
+RATE_SCALE = -RATE_QUANTUM.as_tuple().exponent
+
+
+class CrossRateMatrix:
+    """Кросс-курсы, вычисленные для одного снимка курсов ЦБ относительно RUB.
+
+    Курсы относительно каждой базовой валюты и курсы пар валют вычисляются
+    один раз и переиспользуются, пока не сменится сам снимок. Курс пары не
+    зависит от базовой валюты, поэтому матрица пар общая для всех баз. Для
+    компактного исходного снимка курсы относительно баз тоже хранятся в RateTable.
+
+    Атрибуты:
+        rub_rates (Mapping[str, Decimal]): Курсы валют относительно RUB.
+        date (Optional[date]): Дата публикации снимка (None, если неизвестна).
+    """
+
+    def __init__(self, rub_rates: Mapping[str, Decimal], eager: bool = False):
+        """Инициализировать матрицу кросс-курсов.
+
+        Аргументы:
+            rub_rates (Mapping[str, Decimal]): Курсы валют относительно RUB.
+            eager (bool): Сразу вычислить все пары валют (по умолчанию: лениво).
+        """
+        self.rub_rates = rub_rates
+        self.date = getattr(rub_rates, "date", None)
+        self._bases: Dict[str, RateSnapshot] = {}
+        self._pairs: Dict[Tuple[str, str], Decimal] = {}
+        self._vector: Optional["RateVector"] = None  # См. vectorized.rate_vector()
+        if eager:
+            for from_currency, from_rate in rub_rates.items():
+                for to_currency, to_rate in rub_rates.items():
+                    self._pairs[from_currency, to_currency] = from_rate / to_rate
+
+    def rates_for(self, base_currency: str) -> RateSnapshot:
+        """Получить снимок курсов всех валют относительно базовой валюты.
+
+        Аргументы:
+            base_currency (str): Код базовой валюты.
+
+        Возвращает:
+            RateSnapshot: Курсы валют относительно базовой валюты.
+
+        Исключения:
+            ValueError: Если базовая валюта не найдена в данных ЦБ.
+        """
+        rates = self._bases.get(base_currency)
+        if rates is None:
+            if base_currency not in self.rub_rates:
+                raise ValueError(
+                    f"Базовая валюта {base_currency} не найдена в данных ЦБ"
+                )
+            base_rate = self.rub_rates[base_currency]
+            values: Mapping[str, Decimal] = {
+                code: (rate / base_rate).quantize(RATE_QUANTUM)
+                for code, rate in self.rub_rates.items()
+            }
+            if isinstance(self.rub_rates, RateSnapshot) and self.rub_rates.is_compact:
+                values = RateTable.from_mapping(values, RATE_SCALE)
+            rates = RateSnapshot(
+                values,
+                base=base_currency,
+                date=self.date,
+                matrix=self,
+                provenance=getattr(self.rub_rates, "provenance", None),
+            )
+            self._bases[base_currency] = rates
+        return rates
+
+    def pair(self, from_currency: str, to_currency: str) -> Decimal:
+        """Получить курс пары валют без округления.
+
+        Аргументы:
+            from_currency (str): Код валюты, из которой конвертируем.
+            to_currency (str): Код валюты, в которую конвертируем.
+
+        Возвращает:
+            Decimal: Количество единиц to_currency за единицу from_currency.
+
+        Исключения:
+            ValueError: Если одна из валют не найдена в данных ЦБ.
+        """
+        key = (from_currency, to_currency)
+        rate = self._pairs.get(key)
+        if rate is None:
+            rates = self.rub_rates
+            if from_currency not in rates or to_currency not in rates:
+                raise ValueError(
+                    f"Одна из валют ({from_currency}, {to_currency}) не найдена"
+                )
+            rate = rates[from_currency] / rates[to_currency]
+            self._pairs[key] = rate
+        return rate
@@ -0,0 +1,373 @@
+"""Локальный сервис курсов: один процесс опрашивает ЦБ и раздаёт курсы по HTTP.
+
+Сервисы хоста или кластера обращаются к нему вместо cbr.ru (см. параметр
+daemon_url у CrbRequestCurrencyApi), поэтому ЦБ опрашивается один раз на всех.
+Ответы — JSON, курсы и суммы передаются строками без потери точности.
+
+Конечные точки:
+    GET  /v1/snapshot?base=RUB&date=2024-01-10  — все курсы относительно base;
+    GET  /v1/rate?code=USD&base=RUB&date=...     — курс одной валюты;
+    GET  /v1/convert?from=USD&to=EUR&amount=100&date=... — конвертация суммы;
+    GET  /v1/series?code=USD&start=...&end=...&base=RUB  — курсы по дням;
+    POST /v1/batch {"requests": [{"op": "rate"|"convert", ...}, ...]};
+    GET  /healthz.
+
+Снимок и курсы по дням относительно RUB отдаются без округления: это исходные
+курсы для клиентов в режиме daemon_url.
+
+На GET-запросы отдаётся ETag; запрос с совпадающим If-None-Match получает 304.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from aiohttp import web
+from cachetools import LRUCache
+
+from Crb_currency_api.api_client import ApiClient
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.persistent_cache import SqliteSnapshotCache
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.refresher import RateRefresher
+from Crb_currency_api.resilience import CircuitOpenError
+from Crb_currency_api.snapshot import RateSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def _dumps(payload: Any) -> bytes:
+    """Сериализовать ответ в компактный JSON."""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _etag(body: bytes) -> str:
+    """Вычислить ETag тела ответа."""
+    return f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+
+
+class RateServer:
+    """HTTP-сервис курсов поверх общего хранилища снимков.
+
+    Держит в памяти актуальный и исторические снимки (RateStore), обновляет
+    актуальный в фоне по расписанию публикаций ЦБ и отдаёт курсы в JSON.
+
+    Атрибуты:
+        MAX_BATCH (int): Максимальное число операций в одном пакетном запросе.
+        store (RateStore): Хранилище курсов относительно RUB.
+        client (ApiClient): HTTP-клиент для запросов к ЦБ.
+        refresh (bool): Обновлять актуальные курсы в фоне.
+    """
+
+    MAX_BATCH = 1000
+
+    def __init__(
+        self,
+        store: Optional[RateStore] = None,
+        client: Optional[ApiClient] = None,
+        refresh: bool = True,
+    ):
+        """Инициализировать сервис.
+
+        Аргументы:
+            store (Optional[RateStore]): Хранилище курсов (по умолчанию: новое).
+            client (Optional[ApiClient]): HTTP-клиент для запросов к ЦБ
+                (по умолчанию: новый); закрывается при остановке сервиса.
+            refresh (bool): Обновлять актуальные курсы в фоне (по умолчанию: True).
+        """
+        self.store = store or RateStore()
+        self.client = client or ApiClient()
+        self.refresh = refresh
+        self._apis: Dict[str, CrbRequestCurrencyApi] = {}
+        self._bodies: LRUCache[RateSnapshot, Tuple[bytes, str]] = LRUCache(256)
+        self._refresher: Optional[RateRefresher] = None
+
+    def api(self, base_currency: str) -> CrbRequestCurrencyApi:
+        """Получить клиент курсов для базовой валюты.
+
+        Аргументы:
+            base_currency (str): Код базовой валюты.
+
+        Возвращает:
+            CrbRequestCurrencyApi: Клиент, использующий хранилище сервиса.
+        """
+        base_currency = base_currency.upper()
+        api = self._apis.get(base_currency)
+        if api is None:
+            api = CrbRequestCurrencyApi(
+                base_currency, store=self.store, client=self.client
+            )
+        return api
+
+    async def snapshot(
+        self, base_currency: str, on: Optional[date] = None, raw: bool = False
+    ) -> RateSnapshot:
+        """Получить снимок курсов, запоминая клиент только для известных баз.
+
+        Аргументы:
+            base_currency (str): Код базовой валюты.
+            on (Optional[date]): Дата, на которую нужны курсы.
+            raw (bool): Для базы RUB вернуть загруженный снимок без округления
+                до 5 знаков (по умолчанию: False).
+
+        Возвращает:
+            RateSnapshot: Снимок курсов относительно базовой валюты.
+
+        Исключения:
+            ValueError: Если базовая валюта не найдена в данных ЦБ.
+        """
+        api = self.api(base_currency)
+        if raw and api.base_currency == "RUB":
+            snapshot = await api.rub_snapshot(on)
+        else:
+            snapshot = await api.snapshot(on)
+        self._apis.setdefault(api.base_currency, api)
+        return snapshot
+
+    def app(self) -> web.Application:
+        """Создать приложение aiohttp с маршрутами сервиса.
+
+        Возвращает:
+            web.Application: Приложение для web.run_app или тестового сервера.
+        """
+        app = web.Application(middlewares=[self._errors])
+        app.router.add_get("/v1/snapshot", self._handle_snapshot)
+        app.router.add_get("/v1/rate", self._handle_rate)
+        app.router.add_get("/v1/convert", self._handle_convert)
+        app.router.add_get("/v1/series", self._handle_series)
+        app.router.add_post("/v1/batch", self._handle_batch)
+        app.router.add_get("/healthz", self._handle_health)
+        app.on_startup.append(self._startup)
+        app.on_cleanup.append(self._cleanup)
+        return app
+
+    async def _startup(self, app: web.Application) -> None:
+        """Запустить фоновое обновление курсов."""
+        if self.refresh:
+            self._refresher = self.api("RUB").refresher()
+            self._refresher.start()
+
+    async def _cleanup(self, app: web.Application) -> None:
+        """Остановить фоновое обновление и закрыть HTTP-клиент."""
+        if self._refresher is not None:
+            await self._refresher.stop()
+        await self.client.client.aclose()
+
+    @web.middleware
+    async def _errors(self, request: web.Request, handler) -> web.StreamResponse:
+        """Преобразовать ошибки в JSON-ответы с подходящим кодом состояния."""
+        try:
+            return await handler(request)
+        except ValueError as exc:
+            return self._error(404, str(exc))
+        except (KeyError, InvalidOperation) as exc:
+            return self._error(400, f"Некорректный параметр: {exc}")
+        except CircuitOpenError:
+            return self._error(503, "Сервер ЦБ временно недоступен")
+        except httpx.HTTPError as exc:
+            logger.warning("Не удалось получить курсы ЦБ: %s", exc)
+            return self._error(502, "Сервер ЦБ недоступен")
+
+    @staticmethod
+    def _error(status: int, message: str) -> web.Response:
+        """Сформировать JSON-ответ с ошибкой."""
+        return web.Response(
+            status=status,
+            body=_dumps({"error": message}),
+            content_type="application/json",
+        )
+
+    @staticmethod
+    def _respond(
+        request: web.Request, body: bytes, etag: Optional[str] = None
+    ) -> web.Response:
+        """Сформировать JSON-ответ с ETag или 304, если клиент его уже имеет.
+
+        Аргументы:
+            request (web.Request): Запрос клиента.
+            body (bytes): Тело ответа.
+            etag (Optional[str]): Готовый ETag (по умолчанию: вычисляется по телу).
+
+        Возвращает:
+            web.Response: Ответ сервиса.
+        """
+        etag = etag or _etag(body)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    @staticmethod
+    def _date(value: Optional[str]) -> Optional[date]:
+        """Разобрать необязательную дату в формате ISO (ГГГГ-ММ-ДД)."""
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise KeyError(f"дата {value!r}") from None
+
+    def _serialized(self, snapshot: RateSnapshot) -> Tuple[bytes, str]:
+        """Получить сериализованный снимок и его ETag, вычисляя их один раз.
+
+        Аргументы:
+            snapshot (RateSnapshot): Снимок курсов.
+
+        Возвращает:
+            Tuple[bytes, str]: Тело ответа и ETag.
+        """
+        cached = self._bodies.get(snapshot)
+        if cached is None:
+            body = _dumps(
+                {
+                    "date": snapshot.date.isoformat() if snapshot.date else None,
+                    "base": snapshot.base,
+                    "rates": {code: str(rate) for code, rate in snapshot.items()},
+                }
+            )
+            cached = self._bodies[snapshot] = (body, _etag(body))
+        return cached
+
+    async def _handle_snapshot(self, request: web.Request) -> web.Response:
+        query = request.query
+        # Снимок относительно RUB — исходные курсы для клиентов в режиме
+        # daemon_url, поэтому он отдаётся без округления
+        snapshot = await self.snapshot(
+            query.get("base", "RUB"), self._date(query.get("date")), raw=True
+        )
+        body, etag = self._serialized(snapshot)
+        return self._respond(request, body, etag)
+
+    async def _handle_rate(self, request: web.Request) -> web.Response:
+        result = await self._rate(dict(request.query))
+        return self._respond(request, _dumps(result))
+
+    async def _handle_convert(self, request: web.Request) -> web.Response:
+        result = await self._convert(dict(request.query))
+        return self._respond(request, _dumps(result))
+
+    async def _handle_series(self, request: web.Request) -> web.Response:
+        query = request.query
+        start, end = self._date(query["start"]), self._date(query["end"])
+        if start is None or end is None or start > end:
+            raise KeyError("start/end")
+        base = query.get("base", "RUB")
+        api = self.api(base)
+        if api.base_currency == "RUB":
+            # Как и снимок, динамика относительно RUB — исходные курсы для
+            # клиентов в режиме daemon_url, поэтому она отдаётся без округления
+            series = await api.rub_series(query["code"].upper(), start, end)
+        else:
+            series = await api.get_rate_series(query["code"], start, end)
+        body = _dumps(
+            {
+                "code": query["code"],
+                "base": base.upper(),
+                "rates": {on.isoformat(): str(rate) for on, rate in series.items()},
+            }
+        )
+        return self._respond(request, body)
+
+    async def _handle_batch(self, request: web.Request) -> web.Response:
+        try:
+            operations = (await request.json())["requests"]
+        except (ValueError, TypeError, KeyError):
+            return self._error(400, 'Ожидается JSON вида {"requests": [...]}')
+        if not isinstance(operations, list) or len(operations) > self.MAX_BATCH:
+            return self._error(400, f"Ожидается список до {self.MAX_BATCH} операций")
+        results: List[Dict[str, Any]] = []
+        for operation in operations:
+            try:
+                if operation.get("op") == "convert":
+                    results.append(await self._convert(operation))
+                else:
+                    results.append(await self._rate(operation))
+            except (ValueError, KeyError, InvalidOperation, AttributeError) as exc:
+                results.append({"error": str(exc)})
+        return web.Response(
+            body=_dumps({"results": results}), content_type="application/json"
+        )
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        latest = self.store.latest
+        return web.Response(
+            body=_dumps(
+                {
+                    "status": "ok",
+                    "date": latest.date.isoformat() if latest and latest.date else None,
+                    "age": self.store.latest_age,
+                }
+            ),
+            content_type="application/json",
+        )
+
+    async def _rate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Выполнить операцию получения курса.
+
+        Аргументы:
+            params (Dict[str, Any]): Параметры code, base и date.
+
+        Возвращает:
+            Dict[str, Any]: Результат операции.
+        """
+        snapshot = await self.snapshot(
+            params.get("base") or "RUB", self._date(params.get("date"))
+        )
+        code = params["code"]
+        return {
+            "code": code,
+            "base": snapshot.base,
+            "date": snapshot.date.isoformat() if snapshot.date else None,
+            "rate": str(snapshot.rate(code)),
+        }
+
+    async def _convert(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Выполнить операцию конвертации суммы.
+
+        Аргументы:
+            params (Dict[str, Any]): Параметры from, to, amount и date.
+
+        Возвращает:
+            Dict[str, Any]: Результат операции.
+        """
+        snapshot = await self.snapshot("RUB", self._date(params.get("date")))
+        amount = Decimal(str(params["amount"]))
+        result = snapshot.convert(params["from"], params["to"], amount)
+        return {
+            "from": params["from"],
+            "to": params["to"],
+            "amount": str(amount),
+            "date": snapshot.date.isoformat() if snapshot.date else None,
+            "result": str(result),
+        }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Локальный сервис курсов ЦБ РФ")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", help="путь к Unix-сокету вместо TCP")
+    parser.add_argument("--persistent", help="файл SQLite для кэша снимков")
+    parser.add_argument(
+        "--no-refresh", action="store_true", help="не обновлять курсы в фоне"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Запустить сервис курсов с параметрами командной строки."""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    persistent = SqliteSnapshotCache(args.persistent) if args.persistent else None
+    server = RateServer(
+        store=RateStore(persistent=persistent), refresh=not args.no_refresh
+    )
+    if args.unix:
+        web.run_app(server.app(), path=args.unix)
+    else:
+        web.run_app(server.app(), host=args.host, port=args.port)
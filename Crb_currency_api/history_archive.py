@@ -0,0 +1,541 @@
+"""Колоночный архив истории курсов на диске, читаемый через mmap без копирования.
+
+Многолетнюю историю курсов всех валют невыгодно ни перепарсивать из XML, ни
+держать в словарях Decimal. HistoryArchive хранит её в одном файле как матрицу
+«день × валюта» целых курсов, умноженных на 10**scale (как в RateTable):
+
+    заголовок HEADER | словарь валют (capacity кодов по CODE_SIZE байт) |
+    блоки по CHUNK_DAYS дней
+
+Внутри блока данные лежат по столбцам: сначала столбец дат публикации
+(порядковые номера дней), затем по столбцу на каждую валюту словаря. Курсы
+одной валюты за диапазон дней — непрерывные участки памяти, которые отдаются
+как memoryview поверх mmap без копирования; курсы одного дня — memoryview с
+шагом CHUNK_DAYS.
+
+Ось дат сплошная: строка дня содержит курсы, действующие в этот день, то есть
+публикации не позже него (выходные и праздники повторяют предыдущую
+публикацию), поэтому поиск по дате — арифметика, без поиска и сканирования.
+Будние дни между публикациями, про которые неизвестно, выходили ли в них
+курсы, остаются пустыми строками (дата публикации 0) — данные за них не
+выдумываются.
+Архив только дополняется: append() принимает публикации в порядке дат, новые
+валюты занимают свободные места словаря. Заголовок обновляется последним,
+поэтому читатели в других процессах видят только полностью записанные дни.
+
+Пример:
+    with HistoryArchive("cbr-history.crbh", writable=True) as archive:
+        import_dynamic(archive, {"USD": usd_xml, "EUR": eur_xml})
+        archive.append(await api.snapshot())
+        usd = archive.series("USD", date(2015, 1, 1), date(2024, 12, 31))
+"""
+
+import mmap
+import os
+import struct
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+from Crb_currency_api.rate_table import RateTable
+from Crb_currency_api.snapshot import RateSnapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows: дописывать архив должен один процесс
+    fcntl = None  # type: ignore[assignment]
+
+
+class HistoryArchive:
+    """Дополняемый колоночный архив курсов относительно RUB по дням.
+
+    Формат описан в документации модуля. Значение 0 означает, что валюта в
+    этот день не котировалась. Дописывать архив может любой процесс: запись
+    выполняется под блокировкой файла (fcntl.flock).
+
+    Атрибуты:
+        MAGIC (bytes): Сигнатура файла архива.
+        FORMAT_VERSION (int): Версия формата.
+        HEADER (struct.Struct): Сигнатура, версия формата, масштаб курсов,
+            ёмкость словаря валют, дней в блоке, число валют, порядковый номер
+            первого дня и число дней.
+        CODE_SIZE (int): Размер поля кода валюты в байтах.
+        CHUNK_DAYS (int): Число дней в блоке по умолчанию.
+        path (str): Путь к файлу архива.
+        writable (bool): Архив открыт для дописывания.
+        scale (int): Число хранимых знаков после запятой.
+        capacity (int): Максимальное число валют в словаре.
+        chunk_days (int): Число дней в блоке.
+    """
+
+    MAGIC = b"CRBH"
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct("=4sHHIIIqq")
+    CODE_SIZE = 8
+    CHUNK_DAYS = 256
+
+    def __init__(
+        self,
+        path: str,
+        writable: bool = False,
+        capacity: int = 128,
+        scale: int = RateTable.DEFAULT_SCALE,
+        chunk_days: int = CHUNK_DAYS,
+    ):
+        """Открыть архив; при writable=True несуществующий архив создаётся.
+
+        Аргументы:
+            path (str): Путь к файлу архива.
+            writable (bool): Открыть для дописывания (по умолчанию: только чтение).
+            capacity (int): Ёмкость словаря валют нового архива (по умолчанию: 128).
+            scale (int): Масштаб курсов нового архива (по умолчанию: 8).
+            chunk_days (int): Дней в блоке нового архива (по умолчанию: 256).
+
+        Исключения:
+            FileNotFoundError: Если архива нет, а writable=False.
+            ValueError: Если файл не является архивом курсов.
+        """
+        self.path = path
+        self.writable = writable
+        flags = os.O_RDWR | os.O_CREAT if writable else os.O_RDONLY
+        self._fd = os.open(path, flags, 0o644)
+        if writable and os.fstat(self._fd).st_size == 0:
+            self._create(capacity, scale, chunk_days)
+        self._mmap: Optional[mmap.mmap] = None
+        self._view = memoryview(b"")
+        self._remap()
+        magic, version, scale, capacity, chunk_days, _, _, _ = self.HEADER.unpack_from(
+            self._mmap
+        )
+        if magic != self.MAGIC or version != self.FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} не является архивом курсов")
+        self.scale = scale
+        self.capacity = capacity
+        self.chunk_days = chunk_days
+        self._data_offset = self._align(self.HEADER.size + capacity * self.CODE_SIZE)
+        self._chunk_size = (capacity + 1) * chunk_days * 8
+        self._codes: Tuple[str, ...] = ()
+        self._index: Dict[str, int] = {}
+
+    @staticmethod
+    def _align(offset: int) -> int:
+        """Выровнять смещение по границе 64 байт."""
+        return (offset + 63) // 64 * 64
+
+    def _create(self, capacity: int, scale: int, chunk_days: int) -> None:
+        """Записать заголовок пустого архива.
+
+        Аргументы:
+            capacity (int): Ёмкость словаря валют.
+            scale (int): Масштаб курсов.
+            chunk_days (int): Дней в блоке.
+        """
+        header = self.HEADER.pack(
+            self.MAGIC, self.FORMAT_VERSION, scale, capacity, chunk_days, 0, 0, 0
+        )
+        size = self._align(self.HEADER.size + capacity * self.CODE_SIZE)
+        os.pwrite(self._fd, header.ljust(size, b"\0"), 0)
+
+    def _remap(self) -> None:
+        """Отобразить файл в память заново, если он вырос.
+
+        Прежнее отображение не закрывается явно: выданные из него memoryview
+        остаются корректными, пока на них есть ссылки.
+        """
+        size = os.fstat(self._fd).st_size
+        if self._mmap is not None and len(self._mmap) == size:
+            return
+        access = mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ
+        self._mmap = mmap.mmap(self._fd, size, access=access)
+        self._view = memoryview(self._mmap)
+
+    def _header(self) -> Tuple[int, int, int]:
+        """Прочитать изменяемые поля заголовка.
+
+        Возвращает:
+            Tuple[int, int, int]: Число валют, порядковый номер первого дня и
+                число дней.
+        """
+        fields = self.HEADER.unpack_from(self._mmap)
+        return fields[5], fields[6], fields[7]
+
+    def _sync(self) -> Tuple[int, int]:
+        """Подхватить дни и валюты, дописанные с прошлого обращения.
+
+        Возвращает:
+            Tuple[int, int]: Порядковый номер первого дня и число дней.
+        """
+        count, start, days = self._header()
+        if days and self._data_offset + self._chunks(days) * self._chunk_size > len(
+            self._mmap
+        ):
+            self._remap()
+        if count != len(self._codes):
+            offset = self.HEADER.size
+            self._codes = tuple(
+                bytes(self._view[at : at + self.CODE_SIZE]).rstrip(b"\0").decode()
+                for at in range(offset, offset + count * self.CODE_SIZE, self.CODE_SIZE)
+            )
+            self._index = {code: i for i, code in enumerate(self._codes)}
+        return start, days
+
+    def _chunks(self, days: int) -> int:
+        """Число блоков, нужных для days дней."""
+        return (days + self.chunk_days - 1) // self.chunk_days
+
+    def _column(self, row: int, column: int) -> int:
+        """Смещение (в элементах int64) начала столбца блока, содержащего строку.
+
+        Аргументы:
+            row (int): Номер дня от начала архива.
+            column (int): Номер столбца: 0 — даты публикации, 1 + i — валюта i.
+
+        Возвращает:
+            int: Смещение начала столбца от начала файла в элементах int64.
+        """
+        chunk = row // self.chunk_days
+        offset = self._data_offset + chunk * self._chunk_size
+        return offset // 8 + column * self.chunk_days
+
+    def _values(self) -> memoryview:
+        """Весь файл как массив int64 (смещение данных кратно 8)."""
+        return self._view.cast("q", (len(self._view) // 8,))
+
+    @property
+    def codes(self) -> Tuple[str, ...]:
+        """Коды валют словаря в порядке столбцов."""
+        self._sync()
+        return self._codes
+
+    @property
+    def start(self) -> Optional[date]:
+        """Первый день архива (None — архив пуст)."""
+        start, days = self._sync()
+        return date.fromordinal(start) if days else None
+
+    @property
+    def end(self) -> Optional[date]:
+        """Последний день архива (None — архив пуст)."""
+        start, days = self._sync()
+        return date.fromordinal(start + days - 1) if days else None
+
+    def __len__(self) -> int:
+        return self._sync()[1]
+
+    def __contains__(self, day: object) -> bool:
+        return isinstance(day, date) and self._row(day) is not None
+
+    def _row(self, day: date) -> Optional[int]:
+        """Номер строки дня или None, если дня нет в архиве."""
+        start, days = self._sync()
+        row = day.toordinal() - start
+        return row if days and 0 <= row < days else None
+
+    def day_view(self, day: date) -> Optional[memoryview]:
+        """Получить курсы всех валют на день без копирования.
+
+        Аргументы:
+            day (date): День.
+
+        Возвращает:
+            Optional[memoryview]: Масштабированные курсы int64 в порядке codes,
+                первый элемент — порядковый номер дня публикации (0 — курсы
+                неизвестны); None, если дня нет в архиве.
+        """
+        row = self._row(day)
+        if row is None:
+            return None
+        first = self._column(row, 0) + row % self.chunk_days
+        step = self.chunk_days
+        return self._values()[first : first + (len(self._codes) + 1) * step : step]
+
+    def rates_on(self, day: date) -> Optional[RateSnapshot]:
+        """Получить снимок курсов, действовавших в день.
+
+        Аргументы:
+            day (date): День.
+
+        Возвращает:
+            Optional[RateSnapshot]: Снимок на основе RateTable с датой
+                публикации; None, если дня нет в архиве или курсы на него
+                неизвестны.
+        """
+        view = self.day_view(day)
+        if view is None:
+            return None
+        published, *values = view.tolist()
+        if not published:
+            return None
+        if all(values):
+            table = RateTable(self._codes, values, self.scale)
+        else:
+            quoted = [
+                (code, value) for code, value in zip(self._codes, values) if value
+            ]
+            table = RateTable(
+                [code for code, _ in quoted], [value for _, value in quoted], self.scale
+            )
+        return RateSnapshot(table, date=date.fromordinal(published))
+
+    def column(
+        self,
+        currency_code: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Iterator[Tuple[date, memoryview]]:
+        """Получить курсы валюты за диапазон дней участками без копирования.
+
+        Аргументы:
+            currency_code (str): Код валюты.
+            start (Optional[date]): Первый день (по умолчанию: начало архива).
+            end (Optional[date]): Последний день включительно (по умолчанию:
+                конец архива).
+
+        Возвращает:
+            Iterator[Tuple[date, memoryview]]: Первый день участка и непрерывный
+                memoryview масштабированных курсов int64 (0 — нет котировки) по
+                одному на блок архива.
+
+        Исключения:
+            KeyError: Если валюты нет в архиве.
+        """
+        first, days = self._sync()
+        column = self._index[currency_code] + 1
+        row = max((start.toordinal() if start else first) - first, 0)
+        stop = min((end.toordinal() if end else first + days - 1) - first + 1, days)
+        values = self._values()
+        while row < stop:
+            offset = self._column(row, column)
+            within = row % self.chunk_days
+            length = min(self.chunk_days - within, stop - row)
+            yield date.fromordinal(first + row), values[
+                offset + within : offset + within + length
+            ]
+            row += length
+
+    def series(self, currency_code: str, start: date, end: date) -> Dict[date, Decimal]:
+        """Получить курсы валюты относительно RUB, действующие на каждый день.
+
+        Аргументы:
+            currency_code (str): Код валюты.
+            start (date): Первый день.
+            end (date): Последний день включительно.
+
+        Возвращает:
+            Dict[date, Decimal]: Курсы по дням; дни без котировки пропускаются.
+
+        Исключения:
+            KeyError: Если валюты нет в архиве.
+        """
+        scale = -self.scale
+        result: Dict[date, Decimal] = {}
+        for first, values in self.column(currency_code, start, end):
+            for offset, value in enumerate(values):
+                if value:
+                    result[first + timedelta(days=offset)] = Decimal(value).scaleb(
+                        scale
+                    )
+        return result
+
+    def append(
+        self,
+        rates: Mapping[str, Decimal],
+        on: Optional[date] = None,
+        complete: bool = False,
+    ) -> bool:
+        """Дописать публикацию курсов.
+
+        Выходные сразу после последнего дня архива заполняются предыдущей
+        публикацией: она действовала до выхода новой. Будние дни перед датой
+        публикации заполняются так же, только если вызывающий знает, что
+        публикаций между ними не было (complete=True); иначе они остаются
+        пустыми и курсы на них надо запрашивать у ЦБ.
+
+        Аргументы:
+            rates (Mapping[str, Decimal]): Курсы относительно RUB.
+            on (Optional[date]): Дата публикации (по умолчанию: rates.date).
+            complete (bool): Между последним днём архива и on публикаций не было
+                (по умолчанию: False).
+
+        Возвращает:
+            bool: True, если публикация дописана; False, если день уже в архиве.
+
+        Исключения:
+            ValueError: Если архив открыт только для чтения, дата неизвестна,
+                курс не представим с масштабом архива или словарь валют заполнен.
+        """
+        if not self.writable:
+            raise ValueError("Архив открыт только для чтения")
+        on = on or getattr(rates, "date", None)
+        if on is None:
+            raise ValueError("Неизвестна дата публикации курсов")
+        table = RateTable.from_mapping(rates, self.scale)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            return self._append(table, on, complete)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _append(self, table: RateTable, on: date, complete: bool) -> bool:
+        """Дописать публикацию под блокировкой файла.
+
+        Аргументы:
+            table (RateTable): Курсы в масштабе архива.
+            on (date): Дата публикации.
+            complete (bool): Между последним днём архива и on публикаций не было.
+
+        Возвращает:
+            bool: True, если публикация дописана.
+        """
+        start, days = self._sync()
+        if not days:
+            start = on.toordinal()
+        row = on.toordinal() - start
+        if row < days:
+            return False
+        codes = list(self._codes)
+        new_codes = [code for code in table.codes if code not in self._index]
+        if len(codes) + len(new_codes) > self.capacity:
+            raise ValueError(f"В архиве нет места для валют {', '.join(new_codes)}")
+        for code in new_codes:
+            if len(code.encode("ascii")) > self.CODE_SIZE:
+                raise ValueError(f"Код валюты длиннее {self.CODE_SIZE} байт")
+        for code in new_codes:
+            at = self.HEADER.size + len(codes) * self.CODE_SIZE
+            self._mmap[at : at + self.CODE_SIZE] = code.encode("ascii").ljust(
+                self.CODE_SIZE, b"\0"
+            )
+            codes.append(code)
+        size = self._data_offset + self._chunks(row + 1) * self._chunk_size
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._remap()
+        values = self._values()
+        index = {code: i for i, code in enumerate(codes)}
+        if days:
+            last = days - 1
+            previous = [
+                values[self._column(last, c) + last % self.chunk_days]
+                for c in range(len(codes) + 1)
+            ]
+            for fill in range(days, row):
+                if not complete and date.fromordinal(start + fill).weekday() < 5:
+                    break  # Будний день без публикации: курсы неизвестны
+                within = fill % self.chunk_days
+                for column, value in enumerate(previous):
+                    values[self._column(fill, column) + within] = value
+        within = row % self.chunk_days
+        values[self._column(row, 0) + within] = on.toordinal()
+        for code in codes:
+            column = index[code] + 1
+            values[self._column(row, column) + within] = (
+                table.scaled(code) if code in table else 0
+            )
+        self.HEADER.pack_into(
+            self._mmap,
+            0,
+            self.MAGIC,
+            self.FORMAT_VERSION,
+            self.scale,
+            self.capacity,
+            self.chunk_days,
+            len(codes),
+            start,
+            row + 1,
+        )
+        self._sync()
+        return True
+
+    def flush(self) -> None:
+        """Записать изменения на диск."""
+        if self._mmap is not None and self.writable:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        """Закрыть архив.
+
+        Отображение освобождается, когда исчезнут выданные из него memoryview.
+        """
+        self.flush()
+        self._view = memoryview(b"")
+        self._mmap = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "HistoryArchive":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def import_daily(
+    archive: HistoryArchive,
+    payloads: Iterable[bytes],
+    parser=None,
+    complete: bool = False,
+) -> int:
+    """Импортировать ответы XML_daily.asp в архив.
+
+    Аргументы:
+        archive (HistoryArchive): Архив, открытый для дописывания.
+        payloads (Iterable[bytes]): Тела ответов XML_daily в любом порядке.
+        parser (Optional[XmlParser]): Парсер (по умолчанию: XmlParser(compact=True)).
+        complete (bool): Ответы содержат все публикации между первой и
+            последней из них, так что дни между ними заполняются предыдущей
+            публикацией (по умолчанию: False).
+
+    Возвращает:
+        int: Число дописанных публикаций; публикации не позже конца архива
+            пропускаются.
+    """
+    if parser is None:
+        from Crb_currency_api.parsers import XmlParser
+
+        parser = XmlParser(compact=True)
+    snapshots = {}
+    for payload in payloads:
+        snapshot = parser.parse_snapshot(payload)
+        snapshots[snapshot.date] = snapshot
+    return sum(
+        archive.append(snapshots[on], on, complete and position > 0)
+        for position, on in enumerate(sorted(snapshots))
+    )
+
+
+def import_dynamic(
+    archive: HistoryArchive, payloads: Mapping[str, bytes], parser=None
+) -> int:
+    """Импортировать ответы XML_dynamic.asp (по одному на валюту) в архив.
+
+    Записи всех валют объединяются по датам: для каждой даты публикации
+    дописываются последние известные к ней курсы каждой валюты. Динамика
+    содержит все публикации диапазона, поэтому дни между её записями
+    заполняются предыдущей публикацией.
+
+    Аргументы:
+        archive (HistoryArchive): Архив, открытый для дописывания.
+        payloads (Mapping[str, bytes]): Тела ответов XML_dynamic по кодам валют.
+        parser (Optional[XmlDynamicParser]): Парсер (по умолчанию: XmlDynamicParser()).
+
+    Возвращает:
+        int: Число дописанных публикаций.
+    """
+    if parser is None:
+        from Crb_currency_api.parsers import XmlDynamicParser
+
+        parser = XmlDynamicParser()
+    series = {code: parser.parse_series(payload) for code, payload in payloads.items()}
+    current: Dict[str, Decimal] = {"RUB": Decimal("1.0")}
+    appended = 0
+    days = sorted({on for rates in series.values() for on in rates})
+    for position, on in enumerate(days):
+        for code, rates in series.items():
+            if on in rates:
+                current[code] = rates[on]
+        appended += archive.append(current, on, complete=position > 0)
+    return appended
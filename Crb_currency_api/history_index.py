@@ -0,0 +1,159 @@
+from bisect import bisect_left, bisect_right
+from datetime import date as Date
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple, Union
+
+from Crb_currency_api.cache_manager import MOSCOW_TZ
+from Crb_currency_api.cross_rates import CrossRateMatrix
+
+Moment = Union[datetime, Date]
+
+
+def moscow_date(moment: Moment) -> Date:
+    """Получить московскую дату момента времени.
+
+    Аргументы:
+        moment (Union[datetime, date]): Момент времени; datetime без часового
+            пояса считается московским временем, date возвращается как есть.
+
+    Возвращает:
+        date: Дата по московскому времени.
+    """
+    if isinstance(moment, datetime):
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(MOSCOW_TZ)
+        return moment.date()
+    return moment
+
+
+class HistoryIndex:
+    """Индекс загруженных курсов по датам публикации для поиска «на момент».
+
+    По выходным и праздникам ЦБ курсы не публикует, и действует последняя
+    публикация. Каждая публикация хранится один раз как интервал дней: от даты
+    публикации до последнего дня, на который она заведомо действовала (дня
+    запроса, вернувшего её). Поиск курса на день — бинарный поиск по началам
+    интервалов; день внутри интервала не требует загрузки, даже если курсы на
+    него не запрашивались (например, воскресенье между загруженными субботой и
+    понедельником с субботней публикацией).
+
+    Индекс можно читать из других потоков: add() и discard() не изменяют
+    списки на месте, а заменяют их новыми одним присваиванием.
+
+    Атрибуты:
+        starts (List[date]): Даты публикаций по возрастанию.
+        ends (List[date]): Последний день действия каждой публикации.
+        matrices (List[CrossRateMatrix]): Кросс-курсы каждой публикации.
+    """
+
+    def __init__(self):
+        """Инициализировать пустой индекс."""
+        self._entries: Tuple[List[Date], List[Date], List[CrossRateMatrix]] = (
+            [],
+            [],
+            [],
+        )
+
+    @property
+    def starts(self) -> List[Date]:
+        """Даты публикаций по возрастанию."""
+        return self._entries[0]
+
+    @property
+    def ends(self) -> List[Date]:
+        """Последний день действия каждой публикации."""
+        return self._entries[1]
+
+    @property
+    def matrices(self) -> List[CrossRateMatrix]:
+        """Кросс-курсы каждой публикации."""
+        return self._entries[2]
+
+    def __len__(self) -> int:
+        """Количество публикаций в индексе."""
+        return len(self._entries[0])
+
+    def add(self, on: Date, matrix: CrossRateMatrix) -> None:
+        """Добавить курсы, действовавшие на дату.
+
+        Аргументы:
+            on (date): Дата, на которую запрашивались курсы.
+            matrix (CrossRateMatrix): Кросс-курсы на эту дату; дата публикации
+                берётся из снимка (если неизвестна — совпадает с on).
+        """
+        published = matrix.date if matrix.date is not None else on
+        published = min(published, on)
+        starts, ends, matrices = (list(items) for items in self._entries)
+        index = bisect_left(starts, published)
+        if index < len(starts) and starts[index] == published:
+            if on <= ends[index]:
+                return
+            ends[index] = on
+        else:
+            starts.insert(index, published)
+            ends.insert(index, on)
+            matrices.insert(index, matrix)
+        self._entries = (starts, ends, matrices)
+
+    def discard(self, matrix: CrossRateMatrix) -> None:
+        """Удалить публикации с этими кросс-курсами, чтобы освободить память.
+
+        Аргументы:
+            matrix (CrossRateMatrix): Кросс-курсы, больше не хранящиеся в кэше.
+        """
+        starts, ends, matrices = self._entries
+        keep = [i for i, item in enumerate(matrices) if item is not matrix]
+        if len(keep) != len(matrices):
+            self._entries = (
+                [starts[i] for i in keep],
+                [ends[i] for i in keep],
+                [matrices[i] for i in keep],
+            )
+
+    def lookup(self, moment: Moment) -> Optional[CrossRateMatrix]:
+        """Найти курсы, действовавшие в момент времени.
+
+        Аргументы:
+            moment (Union[datetime, date]): Момент времени (см. moscow_date).
+
+        Возвращает:
+            Optional[CrossRateMatrix]: Кросс-курсы действовавшей публикации или
+                None, если курсы на этот день ещё не загружены.
+        """
+        starts, ends, matrices = self._entries
+        day = moscow_date(moment)
+        index = bisect_right(starts, day) - 1
+        if index >= 0 and day <= ends[index]:
+            return matrices[index]
+        return None
+
+    def lookup_many(self, moments: Iterable[Moment]) -> List[Optional[CrossRateMatrix]]:
+        """Найти курсы для последовательности моментов времени.
+
+        Для упорядоченной по возрастанию последовательности поиск выполняется
+        одним проходом слиянием с интервалами публикаций; при шаге назад
+        позиция находится бинарным поиском, поэтому порядок не обязателен.
+
+        Аргументы:
+            moments (Iterable[Union[datetime, date]]): Моменты времени.
+
+        Возвращает:
+            List[Optional[CrossRateMatrix]]: Кросс-курсы для каждого момента или
+                None, если курсы на его день ещё не загружены.
+        """
+        starts, ends, matrices = self._entries
+        count = len(starts)
+        result: List[Optional[CrossRateMatrix]] = []
+        index = -1
+        previous: Optional[Date] = None
+        for moment in moments:
+            day = moscow_date(moment)
+            if previous is None or day < previous:
+                index = bisect_right(starts, day) - 1
+            while index + 1 < count and starts[index + 1] <= day:
+                index += 1
+            previous = day
+            result.append(
+                matrices[index] if index >= 0 and day <= ends[index] else None
+            )
+        return result
@@ -0,0 +1,297 @@
+"""Точки наблюдения за работой библиотеки: кэш, HTTP-запросы, парсинг."""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+
+class Observer:
+    """Получатель событий библиотеки. Реализация по умолчанию ничего не делает.
+
+    Чтобы собирать метрики или трассировку, достаточно унаследоваться и
+    переопределить нужные методы. Методы вызываются синхронно на горячем пути,
+    поэтому не должны блокировать поток или выполнять ввод-вывод.
+    """
+
+    def cache_hit(self, key: str) -> None:
+        """Значение найдено в кэше.
+
+        Аргументы:
+            key (str): Ключ кэша.
+        """
+
+    def cache_miss(self, key: str) -> None:
+        """Значения нет в кэше или оно истекло.
+
+        Аргументы:
+            key (str): Ключ кэша.
+        """
+
+    def cache_eviction(self, key: str, reason: str) -> None:
+        """Значение удалено из кэша.
+
+        Аргументы:
+            key (str): Ключ кэша.
+            reason (str): Причина: 'expired', 'size' или 'invalidated'.
+        """
+
+    def request(self, url: str, status: Optional[int], duration: float) -> None:
+        """Выполнена одна попытка HTTP-запроса.
+
+        Аргументы:
+            url (str): URL запроса.
+            status (Optional[int]): Код ответа или None при ошибке транспорта.
+            duration (float): Длительность попытки в секундах.
+        """
+
+    def retry(self, url: str, attempt: int, error: BaseException) -> None:
+        """Запрос будет повторён после неудачной попытки.
+
+        Аргументы:
+            url (str): URL запроса.
+            attempt (int): Номер неудачной попытки (начиная с 1).
+            error (BaseException): Причина повтора.
+        """
+
+    def hedge(self, url: str) -> None:
+        """Отправлен дублирующий запрос, потому что ответ задерживается.
+
+        Аргументы:
+            url (str): URL запроса.
+        """
+
+    def circuit_state(self, state: str) -> None:
+        """Предохранитель запросов сменил состояние.
+
+        Аргументы:
+            state (str): Новое состояние: 'closed', 'open' или 'half_open'.
+        """
+
+    def circuit_rejected(self, url: str) -> None:
+        """Запрос отклонён без обращения к источнику: предохранитель разомкнут.
+
+        Аргументы:
+            url (str): URL запроса.
+        """
+
+    def provider_result(
+        self, provider: str, duration: float, error: Optional[BaseException]
+    ) -> None:
+        """Завершён запрос снимка к одному из источников CompositeSource.
+
+        Аргументы:
+            provider (str): Имя источника.
+            duration (float): Длительность запроса и разбора в секундах.
+            error (Optional[BaseException]): Ошибка или None, если снимок принят.
+        """
+
+    def parse(self, duration: float, rows: int, rejected: int) -> None:
+        """Разобран ответ ЦБ.
+
+        Аргументы:
+            duration (float): Длительность разбора в секундах.
+            rows (int): Число принятых курсов.
+            rejected (int): Число пропущенных некорректных записей.
+        """
+
+    def snapshot_served(self, age: float) -> None:
+        """Отдан снимок актуальных курсов.
+
+        Аргументы:
+            age (float): Возраст снимка в секундах с момента загрузки.
+        """
+
+
+NULL_OBSERVER = Observer()
+
+_default_observer: Observer = NULL_OBSERVER
+
+
+def get_observer() -> Observer:
+    """Вернуть наблюдатель, который получают создаваемые объекты по умолчанию.
+
+    Возвращает:
+        Observer: Текущий наблюдатель по умолчанию.
+    """
+    return _default_observer
+
+
+def set_observer(observer: Optional[Observer]) -> None:
+    """Задать наблюдатель по умолчанию для создаваемых объектов.
+
+    Влияет на объекты, созданные после вызова, в том числе на общие хранилище
+    и HTTP-клиент, поэтому вызывать следует при старте приложения.
+
+    Аргументы:
+        observer (Optional[Observer]): Наблюдатель (None — без наблюдения).
+    """
+    global _default_observer
+    _default_observer = observer or NULL_OBSERVER
+
+
+class Histogram:
+    """Накопительная гистограмма с фиксированными границами корзин.
+
+    Атрибуты:
+        bounds (Tuple[float, ...]): Верхние границы корзин по возрастанию.
+        buckets (List[int]): Количество наблюдений в каждой корзине; последняя —
+            для значений больше всех границ.
+        count (int): Общее число наблюдений.
+        total (float): Сумма наблюдений.
+        max (float): Максимальное наблюдение.
+    """
+
+    __slots__ = ("bounds", "buckets", "count", "total", "max")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        """Инициализировать гистограмму.
+
+        Аргументы:
+            bounds (Tuple[float, ...]): Верхние границы корзин по возрастанию.
+        """
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Добавить наблюдение.
+
+        Аргументы:
+            value (float): Наблюдаемое значение.
+        """
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Оценить квантиль по верхней границе корзины.
+
+        Аргументы:
+            q (float): Квантиль от 0 до 1.
+
+        Возвращает:
+            float: Верхняя граница корзины, содержащей квантиль (0 без наблюдений).
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, bucket in zip(self.bounds, self.buckets):
+            seen += bucket
+            if seen >= rank and seen:
+                return bound
+        return self.max
+
+
+class InMemoryMetrics(Observer):
+    """Наблюдатель, накапливающий счётчики и гистограммы в памяти процесса.
+
+    Подходит для периодического опроса (например, из обработчика /metrics):
+    collect() возвращает плоский словарь значений. События могут приходить из
+    разных потоков (синхронный фасад вызывает хранилище из потоков вызывающих),
+    поэтому значения изменяются и читаются под блокировкой.
+
+    Атрибуты:
+        LATENCY_BOUNDS (Tuple[float, ...]): Границы корзин длительностей, с.
+        counters (Dict[str, int]): Счётчики событий.
+        request_latency (Histogram): Длительности HTTP-запросов.
+        parse_latency (Histogram): Длительности разбора ответов.
+        snapshot_age (float): Возраст последнего отданного снимка, с.
+        snapshot_age_max (float): Наибольший возраст отданного снимка, с.
+    """
+
+    LATENCY_BOUNDS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self):
+        """Инициализировать пустые метрики."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Обнулить все накопленные значения."""
+        with self._lock:
+            self.counters: Dict[str, int] = {}
+            self.request_latency = Histogram(self.LATENCY_BOUNDS)
+            self.parse_latency = Histogram(self.LATENCY_BOUNDS)
+            self.snapshot_age = 0.0
+            self.snapshot_age_max = 0.0
+
+    def _inc(self, name: str, value: int = 1) -> None:
+        """Увеличить счётчик.
+
+        Аргументы:
+            name (str): Имя счётчика.
+            value (int): Приращение (по умолчанию: 1).
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def cache_hit(self, key: str) -> None:
+        self._inc("cache_hits")
+
+    def cache_miss(self, key: str) -> None:
+        self._inc("cache_misses")
+
+    def cache_eviction(self, key: str, reason: str) -> None:
+        self._inc("cache_evictions")
+        self._inc(f"cache_evictions_{reason}")
+
+    def request(self, url: str, status: Optional[int], duration: float) -> None:
+        self._inc("requests")
+        self._inc(f"requests_{status or 'error'}")
+        with self._lock:
+            self.request_latency.observe(duration)
+
+    def retry(self, url: str, attempt: int, error: BaseException) -> None:
+        self._inc("retries")
+
+    def hedge(self, url: str) -> None:
+        self._inc("hedged_requests")
+
+    def circuit_state(self, state: str) -> None:
+        self._inc(f"circuit_{state}")
+
+    def circuit_rejected(self, url: str) -> None:
+        self._inc("circuit_rejected")
+
+    def provider_result(
+        self, provider: str, duration: float, error: Optional[BaseException]
+    ) -> None:
+        self._inc(f"provider_{provider}_{'failed' if error else 'ok'}")
+
+    def parse(self, duration: float, rows: int, rejected: int) -> None:
+        self._inc("parses")
+        self._inc("parsed_rows", rows)
+        self._inc("rejected_rows", rejected)
+        with self._lock:
+            self.parse_latency.observe(duration)
+
+    def snapshot_served(self, age: float) -> None:
+        self._inc("snapshots_served")
+        with self._lock:
+            self.snapshot_age = age
+            if age > self.snapshot_age_max:
+                self.snapshot_age_max = age
+
+    def collect(self) -> Dict[str, float]:
+        """Получить текущие значения всех метрик.
+
+        Возвращает:
+            Dict[str, float]: Имена метрик и их значения.
+        """
+        with self._lock:
+            values: Dict[str, float] = dict(self.counters)
+            for name, histogram in (
+                ("request_seconds", self.request_latency),
+                ("parse_seconds", self.parse_latency),
+            ):
+                values[f"{name}_count"] = histogram.count
+                values[f"{name}_sum"] = histogram.total
+                values[f"{name}_max"] = histogram.max
+                values[f"{name}_p50"] = histogram.quantile(0.5)
+                values[f"{name}_p99"] = histogram.quantile(0.99)
+            values["snapshot_age_seconds"] = self.snapshot_age
+            values["snapshot_age_max_seconds"] = self.snapshot_age_max
+        return values
@@ -1,8 +1,36 @@
+import json
+import logging
+import time
 from abc import ABC, abstractmethod
+from datetime import date, datetime
 from decimal import Decimal
-from typing import Dict
+from types import SimpleNamespace
+from typing import Any, AsyncIterable, Dict, List, Optional, Union
 from xml.etree import ElementTree
 
+from Crb_currency_api.metrics import Observer, get_observer
+from Crb_currency_api.rate_table import RateTable, parse_scaled
+from Crb_currency_api.snapshot import RateSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Внутренние коды валют ЦБ (атрибут ID элемента Valute, например 'R01235' для
+# USD). Они постоянны, поэтому собираются при разборе ежедневных курсов в общий
+# для процесса словарь и используются в запросах XML_dynamic.
+_VALUTE_IDS: Dict[str, str] = {}
+
+
+def valute_id(currency_code: str) -> Optional[str]:
+    """Получить внутренний код ЦБ для валюты из ранее разобранных ответов.
+
+    Аргументы:
+        currency_code (str): Код валюты (например, 'USD').
+
+    Возвращает:
+        Optional[str]: Код ЦБ (например, 'R01235') или None, если ещё неизвестен.
+    """
+    return _VALUTE_IDS.get(currency_code)
+
 
 class Parser(ABC):
     """Абстрактный базовый класс для парсинга ответов API.
@@ -22,47 +50,521 @@ class Parser(ABC):
         """
         pass
 
+    def parse_snapshot(self, response_text: str) -> RateSnapshot:
+        """Распарсить ответ API в неизменяемый снимок курсов относительно RUB.
+
+        Реализация по умолчанию не знает даты публикации; дочерние классы могут
+        переопределить метод, чтобы её извлечь.
+
+        Аргументы:
+            response_text (str): Необработанный текстовый ответ от API.
+
+        Возвращает:
+            RateSnapshot: Снимок курсов.
+        """
+        return RateSnapshot(self.parse(response_text))
+
+
+class ValCursCollector:
+    """Инкрементальный сборщик курсов из XML-фида ЦБ.
+
+    Принимает документ частями (байты в исходной кодировке или строки) и
+    разбирает его потоково, без построения дерева элементов: expat вызывает
+    обработчики тегов напрямую, а сохраняется только текст CharCode и
+    VunitRate. Поэтому память не растёт с размером документа. Некорректные
+    записи пропускаются и накапливаются в списке errors.
+
+    В компактном режиме курсы сразу переводятся в масштабированные целые без
+    создания Decimal, и результатом становится снимок на основе RateTable.
+
+    Атрибуты:
+        rates (Dict[str, Decimal]): Собранные курсы относительно RUB
+            (в компактном режиме — масштабированные целые).
+        date (Optional[date]): Дата публикации из атрибута Date элемента ValCurs.
+        errors (List[str]): Описания пропущенных некорректных записей.
+    """
+
+    FIELDS = frozenset(("CharCode", "VunitRate"))
+
+    def __init__(
+        self, date_format: str = "%d.%m.%Y", compact_scale: Optional[int] = None
+    ):
+        """Инициализировать сборщик.
+
+        Аргументы:
+            date_format (str): Формат даты публикации (по умолчанию: '%d.%m.%Y').
+            compact_scale (Optional[int]): Масштаб RateTable для компактного режима
+                (по умолчанию: курсы собираются в Decimal).
+        """
+        self._scale = compact_scale
+        self.rates: Dict[str, Any] = {
+            "RUB": Decimal("1.0") if compact_scale is None else 10**compact_scale
+        }
+        self.date: Optional[date] = None
+        self.errors: List[str] = []
+        self._date_format = date_format
+        self._parser = ElementTree.XMLParser(
+            target=SimpleNamespace(start=self._start, data=self._data, end=self._end)
+        )
+        self._text: Optional[List[str]] = None
+        self._fields: Dict[str, str] = {}
+        self._valute_id: Optional[str] = None
+
+    def feed(self, chunk: Union[str, bytes]) -> None:
+        """Передать очередную часть документа.
+
+        Аргументы:
+            chunk (Union[str, bytes]): Часть XML-документа.
+
+        Исключения:
+            ElementTree.ParseError: Если документ не является корректным XML.
+        """
+        self._parser.feed(chunk)
+
+    def close(self) -> RateSnapshot:
+        """Завершить разбор и вернуть снимок курсов.
+
+        Возвращает:
+            RateSnapshot: Снимок курсов относительно RUB.
+
+        Исключения:
+            ElementTree.ParseError: Если документ оборван или некорректен.
+            ValueError: Если дата публикации указана в неверном формате.
+        """
+        self._parser.close()
+        if self._scale is None:
+            return RateSnapshot(self.rates, date=self.date)
+        table = RateTable(self.rates.keys(), self.rates.values(), self._scale)
+        return RateSnapshot(table, date=self.date)
+
+    def _start(self, tag: str, attrib: Dict[str, str]) -> None:
+        """Обработать открывающий тег (вызывается парсером)."""
+        if tag in self.FIELDS:
+            self._text = []
+        elif tag == "Valute":
+            self._fields = {}
+            self._valute_id = attrib.get("ID")
+        elif tag == "ValCurs":
+            date_text = attrib.get("Date")
+            if date_text:
+                self.date = datetime.strptime(date_text, self._date_format).date()
+
+    def _data(self, text: str) -> None:
+        """Обработать текст внутри элемента (вызывается парсером)."""
+        if self._text is not None:
+            self._text.append(text)
+
+    def _end(self, tag: str) -> None:
+        """Обработать закрывающий тег (вызывается парсером)."""
+        if self._text is not None:
+            self._fields[tag] = "".join(self._text)
+            self._text = None
+        elif tag == "Valute":
+            self._add()
+
+    def _add(self) -> None:
+        """Добавить курс текущего элемента Valute или записать ошибку."""
+        code = self._fields.get("CharCode")
+        rate = self._fields.get("VunitRate")
+        if not code or not rate:
+            error = f"Valute {self._valute_id}: нет CharCode или VunitRate"
+        else:
+            try:
+                if self._scale is None:
+                    self.rates[code] = Decimal(rate.replace(",", "."))
+                else:
+                    self.rates[code] = parse_scaled(rate, self._scale)
+                if self._valute_id:
+                    _VALUTE_IDS[code] = self._valute_id
+                return
+            except (ArithmeticError, ValueError):
+                error = f"Valute {self._valute_id} ({code}): некорректный курс {rate!r}"
+        self.errors.append(error)
+        logger.warning("Ошибка парсинга валюты: %s", error)
+
 
 class XmlParser(Parser):
     """Парсер для XML-ответов API Центрального банка России.
 
-    Извлекает курсы валют из ежедневного XML-фида ЦБ РФ.
+    Извлекает курсы валют из ежедневного XML-фида ЦБ РФ. Принимает как текст,
+    так и исходные байты ответа (без декодирования windows-1251 в строку), в том
+    числе по частям из потока ответа.
+
+    Атрибуты:
+        compact (bool): Возвращать снимки на основе компактной RateTable.
+        observer (Observer): Получатель событий о длительности разбора.
     """
 
-    def parse(self, response_text: str) -> Dict[str, Decimal]:
+    DATE_FORMAT = "%d.%m.%Y"
+
+    def __init__(self, compact: bool = False, observer: Optional[Observer] = None):
+        """Инициализировать парсер.
+
+        Аргументы:
+            compact (bool): Возвращать из parse_snapshot снимки на основе
+                RateTable (по умолчанию: словарь Decimal).
+            observer (Optional[Observer]): Получатель событий о длительности
+                разбора и пропущенных записях (по умолчанию: get_observer()).
+        """
+        self.compact = compact
+        self.observer = observer or get_observer()
+
+    def collector(self) -> ValCursCollector:
+        """Создать сборщик для инкрементального разбора документа.
+
+        Возвращает:
+            ValCursCollector: Новый сборщик курсов.
+        """
+        return ValCursCollector(
+            self.DATE_FORMAT, RateTable.DEFAULT_SCALE if self.compact else None
+        )
+
+    def parse(self, response_text: Union[str, bytes]) -> Dict[str, Decimal]:
         """Распарсить XML-данные ЦБ в словарь курсов валют относительно RUB.
 
         Аргументы:
-            response_text (str): Текст XML-ответа от API ЦБ.
+            response_text (Union[str, bytes]): Текст или байты XML-ответа от API ЦБ.
 
         Возвращает:
             Dict[str, Decimal]: Коды валют и их курсы (RUB всегда 1.0).
 
         Исключения:
-            AttributeError: Если структура XML некорректна.
-            ValueError: Если парсинг курса завершился неудачей.
+            ElementTree.ParseError: Если документ не является корректным XML.
         """
-        root = ElementTree.fromstring(response_text)
-        rates: Dict[str, Decimal] = {"RUB": Decimal("1.0")}
+        start = time.perf_counter()
+        collector = ValCursCollector(self.DATE_FORMAT)
+        collector.feed(response_text)
+        collector.close()
+        self._report(collector, time.perf_counter() - start)
+        return collector.rates
 
-        for currency in root.findall("Valute"):
-            try:
-                code_el = currency.find("CharCode")
-                rate_el = currency.find("VunitRate")
+    def parse_snapshot(self, response_text: Union[str, bytes]) -> RateSnapshot:
+        """Распарсить XML-данные ЦБ в снимок курсов с датой публикации.
+
+        Дата берётся из атрибута Date корневого элемента ValCurs.
 
-                if code_el is None or rate_el is None:
-                    raise AttributeError("Missing CharCode or VunitRate element")
+        Аргументы:
+            response_text (Union[str, bytes]): Текст или байты XML-ответа от API ЦБ.
 
-                code_text = code_el.text
-                rate_text = rate_el.text
+        Возвращает:
+            RateSnapshot: Снимок курсов относительно RUB.
 
-                if code_text is None or rate_text is None:
-                    raise AttributeError("CharCode or VunitRate text is missing")
+        Исключения:
+            ElementTree.ParseError: Если документ не является корректным XML.
+            ValueError: Если дата публикации указана в неверном формате.
+        """
+        start = time.perf_counter()
+        collector = self.collector()
+        collector.feed(response_text)
+        snapshot = collector.close()
+        self._report(collector, time.perf_counter() - start)
+        return snapshot
 
-                rate = rate_text.replace(",", ".")
-                rates[code_text] = Decimal(rate)
+    async def parse_stream(self, chunks: AsyncIterable[bytes]) -> RateSnapshot:
+        """Распарсить XML-данные ЦБ по мере получения частей ответа.
 
-            except (AttributeError, ValueError) as e:
-                print(f"Ошибка парсинга валюты: {e}")
+        Длительность разбора учитывается без ожидания очередных частей.
+
+        Аргументы:
+            chunks (AsyncIterable[bytes]): Части тела ответа, например
+                httpx.Response.aiter_bytes().
+
+        Возвращает:
+            RateSnapshot: Снимок курсов относительно RUB.
+        """
+        collector = self.collector()
+        elapsed = 0.0
+        async for chunk in chunks:
+            start = time.perf_counter()
+            collector.feed(chunk)
+            elapsed += time.perf_counter() - start
+        start = time.perf_counter()
+        snapshot = collector.close()
+        self._report(collector, elapsed + time.perf_counter() - start)
+        return snapshot
 
+    def _report(self, collector: ValCursCollector, duration: float) -> None:
+        """Сообщить наблюдателю о завершённом разборе.
+
+        Аргументы:
+            collector (ValCursCollector): Сборщик, завершивший разбор.
+            duration (float): Длительность разбора в секундах.
+        """
+        self.observer.parse(duration, len(collector.rates) - 1, len(collector.errors))
+
+
+class RecordCollector:
+    """Инкрементальный сборщик динамики курса одной валюты из XML_dynamic ЦБ.
+
+    Разбирает документ потоково, как ValCursCollector: сохраняются только дата
+    записи Record и текст VunitRate. Некорректные записи пропускаются и
+    накапливаются в списке errors.
+
+    Атрибуты:
+        rates (Dict[date, Decimal]): Курсы относительно RUB по датам записей.
+        errors (List[str]): Описания пропущенных некорректных записей.
+    """
+
+    def __init__(self, date_format: str = "%d.%m.%Y"):
+        """Инициализировать сборщик.
+
+        Аргументы:
+            date_format (str): Формат дат записей (по умолчанию: '%d.%m.%Y').
+        """
+        self.rates: Dict[date, Decimal] = {}
+        self.errors: List[str] = []
+        self._date_format = date_format
+        self._parser = ElementTree.XMLParser(
+            target=SimpleNamespace(start=self._start, data=self._data, end=self._end)
+        )
+        self._text: Optional[List[str]] = None
+        self._rate: Optional[str] = None
+        self._date: Optional[str] = None
+
+    def feed(self, chunk: Union[str, bytes]) -> None:
+        """Передать очередную часть документа.
+
+        Аргументы:
+            chunk (Union[str, bytes]): Часть XML-документа.
+
+        Исключения:
+            ElementTree.ParseError: Если документ не является корректным XML.
+        """
+        self._parser.feed(chunk)
+
+    def close(self) -> Dict[date, Decimal]:
+        """Завершить разбор и вернуть курсы по датам.
+
+        Возвращает:
+            Dict[date, Decimal]: Курсы относительно RUB по датам записей.
+
+        Исключения:
+            ElementTree.ParseError: Если документ оборван или некорректен.
+        """
+        self._parser.close()
+        return self.rates
+
+    def _start(self, tag: str, attrib: Dict[str, str]) -> None:
+        """Обработать открывающий тег (вызывается парсером)."""
+        if tag == "VunitRate":
+            self._text = []
+        elif tag == "Record":
+            self._date = attrib.get("Date")
+            self._rate = None
+
+    def _data(self, text: str) -> None:
+        """Обработать текст внутри элемента (вызывается парсером)."""
+        if self._text is not None:
+            self._text.append(text)
+
+    def _end(self, tag: str) -> None:
+        """Обработать закрывающий тег (вызывается парсером)."""
+        if self._text is not None:
+            self._rate = "".join(self._text)
+            self._text = None
+        elif tag == "Record":
+            self._add()
+
+    def _add(self) -> None:
+        """Добавить курс текущей записи Record или записать ошибку."""
+        try:
+            on = datetime.strptime(self._date or "", self._date_format).date()
+            self.rates[on] = Decimal((self._rate or "").replace(",", "."))
+            return
+        except (ArithmeticError, ValueError):
+            error = f"Record {self._date}: некорректная дата или курс {self._rate!r}"
+        self.errors.append(error)
+        logger.warning("Ошибка парсинга динамики курса: %s", error)
+
+
+class XmlDynamicParser:
+    """Парсер для XML-ответов XML_dynamic.asp Центрального банка России.
+
+    Ответ содержит курсы одной валюты за диапазон дат: по записи Record на
+    каждую дату, с которой действует новый курс.
+
+    Атрибуты:
+        observer (Observer): Получатель событий о длительности разбора.
+    """
+
+    DATE_FORMAT = "%d.%m.%Y"
+
+    def __init__(self, observer: Optional[Observer] = None):
+        """Инициализировать парсер.
+
+        Аргументы:
+            observer (Optional[Observer]): Получатель событий о длительности
+                разбора и пропущенных записях (по умолчанию: get_observer()).
+        """
+        self.observer = observer or get_observer()
+
+    def parse_series(self, response_text: Union[str, bytes]) -> Dict[date, Decimal]:
+        """Распарсить динамику курса валюты.
+
+        Аргументы:
+            response_text (Union[str, bytes]): Текст или байты XML-ответа от API ЦБ.
+
+        Возвращает:
+            Dict[date, Decimal]: Курсы валюты относительно RUB по датам, с которых
+                они действуют.
+
+        Исключения:
+            ElementTree.ParseError: Если документ не является корректным XML.
+        """
+        start = time.perf_counter()
+        collector = RecordCollector(self.DATE_FORMAT)
+        collector.feed(response_text)
+        rates = collector.close()
+        self.observer.parse(
+            time.perf_counter() - start, len(rates), len(collector.errors)
+        )
         return rates
+
+
+class JsonParser(Parser):
+    """Парсер JSON-ответов локального сервиса курсов (Crb_currency_api.daemon).
+
+    Курсы передаются строками, чтобы не терять точность Decimal.
+    """
+
+    def parse(self, response_text: Union[str, bytes]) -> Dict[str, Decimal]:
+        """Распарсить снимок курсов в словарь.
+
+        Аргументы:
+            response_text (Union[str, bytes]): Тело ответа /v1/snapshot.
+
+        Возвращает:
+            Dict[str, Decimal]: Коды валют и их курсы.
+        """
+        return dict(self.parse_snapshot(response_text))
+
+    def parse_snapshot(self, response_text: Union[str, bytes]) -> RateSnapshot:
+        """Распарсить снимок курсов с датой публикации и базовой валютой.
+
+        Аргументы:
+            response_text (Union[str, bytes]): Тело ответа /v1/snapshot.
+
+        Возвращает:
+            RateSnapshot: Снимок курсов.
+
+        Исключения:
+            ValueError: Если ответ не является корректным снимком.
+        """
+        payload = json.loads(response_text)
+        on = payload.get("date")
+        return RateSnapshot(
+            {code: Decimal(rate) for code, rate in payload["rates"].items()},
+            base=payload.get("base", "RUB"),
+            date=date.fromisoformat(on) if on else None,
+        )
+
+    def parse_series(self, response_text: Union[str, bytes]) -> Dict[date, Decimal]:
+        """Распарсить курсы валюты по датам.
+
+        Аргументы:
+            response_text (Union[str, bytes]): Тело ответа /v1/series.
+
+        Возвращает:
+            Dict[date, Decimal]: Курсы по датам.
+        """
+        payload = json.loads(response_text)
+        return {
+            date.fromisoformat(on): Decimal(rate)
+            for on, rate in payload["rates"].items()
+        }
+
+
+class CbrJsonParser(Parser):
+    """Парсер JSON-зеркала ежедневных курсов ЦБ (формат daily_json.js).
+
+    Курсы указаны за Nominal единиц валюты и приводятся к курсу за единицу;
+    числа читаются сразу в Decimal, без двоичной погрешности float.
+    """
+
+    def parse(self, response_text: Union[str, bytes]) -> Dict[str, Decimal]:
+        """Распарсить курсы в словарь.
+
+        Аргументы:
+            response_text (Union[str, bytes]): Тело ответа зеркала.
+
+        Возвращает:
+            Dict[str, Decimal]: Коды валют и их курсы относительно RUB.
+        """
+        return dict(self.parse_snapshot(response_text))
+
+    def parse_snapshot(self, response_text: Union[str, bytes]) -> RateSnapshot:
+        """Распарсить снимок курсов с датой публикации.
+
+        Аргументы:
+            response_text (Union[str, bytes]): Тело ответа зеркала.
+
+        Возвращает:
+            RateSnapshot: Снимок курсов относительно RUB.
+
+        Исключения:
+            ValueError: Если ответ не является корректным снимком.
+        """
+        payload = json.loads(response_text, parse_float=Decimal)
+        try:
+            rates = {"RUB": Decimal("1.0")}
+            for code, valute in payload["Valute"].items():
+                rates[code] = Decimal(valute["Value"]) / Decimal(valute["Nominal"])
+            on = datetime.fromisoformat(payload["Date"]).date()
+        except (KeyError, TypeError, ArithmeticError) as error:
+            raise ValueError(f"Некорректный снимок JSON: {error!r}") from None
+        return RateSnapshot(rates, date=on)
+
+
+class EcbXmlParser(Parser):
+    """Парсер XML-фида курсов в формате ЕЦБ (eurofxref-daily.xml).
+
+    Фид содержит количество единиц каждой валюты за 1 EUR. Курсы пересчитываются
+    относительно RUB (с точностью RateTable.DEFAULT_SCALE знаков), поэтому фид
+    пригоден, только если в нём есть RUB.
+    """
+
+    NAMESPACE = "{http://www.ecb.int/vocabulary/2002-08-01/eurofxref}"
+    QUANTUM = Decimal(1).scaleb(-RateTable.DEFAULT_SCALE)
+
+    def parse(self, response_text: Union[str, bytes]) -> Dict[str, Decimal]:
+        """Распарсить курсы в словарь.
+
+        Аргументы:
+            response_text (Union[str, bytes]): Тело ответа фида.
+
+        Возвращает:
+            Dict[str, Decimal]: Коды валют и их курсы относительно RUB.
+        """
+        return dict(self.parse_snapshot(response_text))
+
+    def parse_snapshot(self, response_text: Union[str, bytes]) -> RateSnapshot:
+        """Распарсить снимок курсов с датой публикации.
+
+        Аргументы:
+            response_text (Union[str, bytes]): Тело ответа фида.
+
+        Возвращает:
+            RateSnapshot: Снимок курсов относительно RUB.
+
+        Исключения:
+            ElementTree.ParseError: Если документ не является корректным XML.
+            ValueError: Если в фиде нет RUB или курс некорректен.
+        """
+        per_euro = {"EUR": Decimal(1)}
+        on: Optional[date] = None
+        for cube in ElementTree.fromstring(response_text).iter(f"{self.NAMESPACE}Cube"):
+            if "time" in cube.attrib:
+                on = date.fromisoformat(cube.attrib["time"])
+            elif "currency" in cube.attrib:
+                try:
+                    per_euro[cube.attrib["currency"]] = Decimal(cube.attrib["rate"])
+                except (KeyError, ArithmeticError):
+                    raise ValueError(f"Некорректный курс {cube.attrib!r}") from None
+        rub = per_euro.get("RUB")
+        if rub is None:
+            raise ValueError("В фиде ЕЦБ нет курса RUB")
+        rates = {
+            code: (rub / rate).quantize(self.QUANTUM) for code, rate in per_euro.items()
+        }
+        rates["RUB"] = Decimal("1.0")
+        return RateSnapshot(rates, date=on)
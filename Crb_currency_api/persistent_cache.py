@@ -0,0 +1,129 @@
+import json
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date
+from decimal import Decimal
+from typing import Optional, Tuple
+
+from Crb_currency_api.snapshot import RateSnapshot
+
+
+class SqliteSnapshotCache:
+    """Постоянный кэш снимков курсов в файле SQLite.
+
+    Позволяет новым процессам (воркерам, cron-задачам, перезапускам) стартовать
+    с уже загруженными курсами без запроса к ЦБ. Файл открывается в режиме WAL,
+    поэтому несколько процессов одного хоста могут одновременно читать и
+    безопасно записывать снимки.
+
+    Ключ снимка — дата, на которую запрашивались курсы (в формате ISO), или
+    LATEST_KEY для актуальных курсов. Вместе со снимком хранится момент его
+    получения, чтобы возраст прочитанного снимка считался от загрузки, а не от
+    чтения с диска.
+
+    Атрибуты:
+        LATEST_KEY (str): Ключ снимка актуальных курсов.
+        path (str): Путь к файлу базы данных.
+    """
+
+    LATEST_KEY = "latest"
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        """Инициализировать кэш и создать таблицу, если её нет.
+
+        Аргументы:
+            path (str): Путь к файлу базы данных.
+            timeout (float): Время ожидания блокировки записи в секундах (по умолчанию: 5.0).
+        """
+        self.path = path
+        self.timeout = timeout
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " key TEXT PRIMARY KEY,"
+                " published TEXT,"
+                " rates TEXT NOT NULL,"
+                " expires_at REAL,"
+                " fetched_at REAL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(snapshots)")}
+            if "fetched_at" not in columns:  # Файл, созданный прежней версией
+                conn.execute("ALTER TABLE snapshots ADD COLUMN fetched_at REAL")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открыть соединение с базой данных.
+
+        Соединение открывается на каждую операцию, поэтому объект кэша можно
+        использовать из любых потоков.
+
+        Возвращает:
+            sqlite3.Connection: Соединение с базой данных.
+        """
+        return sqlite3.connect(self.path, timeout=self.timeout)
+
+    def load(self, key: str) -> Optional[RateSnapshot]:
+        """Загрузить снимок по ключу, если он есть и не истёк.
+
+        Аргументы:
+            key (str): Ключ снимка.
+
+        Возвращает:
+            Optional[RateSnapshot]: Снимок курсов или None.
+        """
+        entry = self.load_entry(key)
+        return entry[0] if entry is not None else None
+
+    def load_entry(
+        self, key: str
+    ) -> Optional[Tuple[RateSnapshot, Optional[float], Optional[float]]]:
+        """Загрузить снимок по ключу вместе с моментами получения и истечения.
+
+        Аргументы:
+            key (str): Ключ снимка.
+
+        Возвращает:
+            Optional[Tuple[RateSnapshot, Optional[float], Optional[float]]]:
+                Снимок, момент его получения и момент истечения (time.time();
+                None — неизвестен или бессрочно) либо None, если снимка нет или
+                он истёк.
+        """
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT published, rates, expires_at, fetched_at"
+                " FROM snapshots WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        published, rates, expires_at, fetched_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        snapshot = RateSnapshot(
+            {code: Decimal(rate) for code, rate in json.loads(rates).items()},
+            date=date.fromisoformat(published) if published else None,
+        )
+        return snapshot, fetched_at, expires_at
+
+    def save(
+        self, key: str, snapshot: RateSnapshot, ttl: Optional[float] = None
+    ) -> None:
+        """Сохранить только что полученный снимок по ключу, заменив предыдущий.
+
+        Аргументы:
+            key (str): Ключ снимка.
+            snapshot (RateSnapshot): Снимок курсов относительно RUB.
+            ttl (Optional[float]): Время жизни в секундах (None — бессрочно).
+        """
+        rates = json.dumps({code: str(rate) for code, rate in snapshot.items()})
+        published = snapshot.date.isoformat() if snapshot.date else None
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots"
+                " (key, published, rates, expires_at, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, published, rates, expires_at, now),
+            )
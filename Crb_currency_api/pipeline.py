@@ -0,0 +1,495 @@
+"""Потоковая конвертация больших файлов транзакций (CSV и JSONL).
+
+Строки читаются лениво пакетами из файла, итератора или асинхронного
+итератора. Для каждого пакета курсы на все встречающиеся даты загружаются
+заранее одним вызовом (курс, действовавший в момент транзакции, см.
+CrbRequestCurrencyApi.snapshots_at), после чего строки конвертируются
+синхронно и сразу передаются дальше. Чтение и загрузка курсов следующих
+пакетов идут параллельно с записью текущего, а очередь между ними ограничена,
+поэтому медленная запись приостанавливает чтение и память не растёт с
+размером файла.
+
+Запуск: python convert.py transactions.csv converted.csv --to RUB --date-field date
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Union,
+)
+
+from Crb_currency_api.cache_manager import MOSCOW_TZ
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.history_index import Moment, moscow_date
+from Crb_currency_api.snapshot import RateSnapshot
+
+Row = Dict[str, Any]
+Rows = Union[Iterable[Row], AsyncIterable[Row]]
+
+BATCH_SIZE = 1000
+PREFETCH = 4
+
+
+class _Batch:
+    """Пакет строк с датами транзакций и курсами на эти даты."""
+
+    __slots__ = ("start", "rows", "days", "snapshots")
+
+    def __init__(self, start: int, rows: List[Row]):
+        self.start = start
+        self.rows = rows
+        # Московская дата строки, None (актуальные курсы) или ошибка разбора даты
+        self.days: List[Union[date, None, ValueError]] = []
+        # Курсы по датам строк; под ключом None — актуальные
+        self.snapshots: Dict[Optional[date], RateSnapshot] = {}
+
+
+def _parse_moment(value: Any) -> Optional[Moment]:
+    """Разобрать дату или момент транзакции из значения поля.
+
+    Аргументы:
+        value: date, datetime или строка ISO 8601 ('2024-01-13',
+            '2024-01-13T21:30:00+00:00'); пустое значение — актуальные курсы.
+
+    Возвращает:
+        Optional[Moment]: Момент транзакции или None.
+
+    Исключения:
+        ValueError: Если строка не является датой ISO 8601.
+    """
+    if value is None or isinstance(value, date):
+        return value
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        if len(text) > 10:
+            return datetime.fromisoformat(text)
+        return date.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Некорректная дата {text!r}") from None
+
+
+def _field(row: Row, name: str) -> Any:
+    """Получить значение поля строки.
+
+    Исключения:
+        ValueError: Если поля нет в строке.
+    """
+    try:
+        return row[name]
+    except KeyError:
+        raise ValueError(f"Нет поля {name!r}") from None
+
+
+async def _read_batches(rows: Rows, batch_size: int) -> AsyncIterator[List[Row]]:
+    """Читать строки пакетами.
+
+    Синхронный итератор (например, csv.DictReader) читается в потоке, чтобы
+    разбор файла не блокировал цикл событий.
+
+    Аргументы:
+        rows (Rows): Итератор или асинхронный итератор строк.
+        batch_size (int): Размер пакета.
+    """
+    if isinstance(rows, AsyncIterable):
+        batch: List[Row] = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        return
+    iterator = iter(rows)
+    while True:
+        batch = await asyncio.to_thread(list, islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class ConversionPipeline:
+    """Потоковая конвертация сумм в строках транзакций.
+
+    Каждая строка дополняется полем result_field с суммой в целевой валюте
+    (строка Decimal с точностью до 5 знаков, как в exchange()). Курсы на
+    прошедшие даты запоминаются на всё время работы, поэтому каждая дата
+    загружается не больше одного раза.
+
+    Атрибуты:
+        api (CrbRequestCurrencyApi): Клиент, через который загружаются курсы.
+        to_currency (str): Целевая валюта.
+        amount_field (str): Поле суммы.
+        currency_field (str): Поле исходной валюты.
+        to_field (Optional[str]): Поле целевой валюты строки (если задано,
+            имеет приоритет над to_currency).
+        date_field (Optional[str]): Поле даты или момента транзакции (если не
+            задано, используются актуальные курсы).
+        result_field (str): Поле результата.
+        error_field (Optional[str]): Поле для текста ошибки строки (если не
+            задано, ошибка прерывает конвертацию).
+        batch_size (int): Количество строк в пакете.
+        prefetch (int): Сколько пакетов может ждать записи.
+        rows (int): Количество обработанных строк.
+        errors (int): Количество строк с ошибками.
+    """
+
+    def __init__(
+        self,
+        api: CrbRequestCurrencyApi,
+        to_currency: Optional[str] = None,
+        amount_field: str = "amount",
+        currency_field: str = "currency",
+        to_field: Optional[str] = None,
+        date_field: Optional[str] = None,
+        result_field: str = "converted",
+        error_field: Optional[str] = None,
+        batch_size: int = BATCH_SIZE,
+        prefetch: int = PREFETCH,
+    ):
+        """Инициализировать конвертацию.
+
+        Аргументы:
+            api (CrbRequestCurrencyApi): Клиент, через который загружаются курсы.
+            to_currency (Optional[str]): Целевая валюта (по умолчанию: базовая
+                валюта api).
+            amount_field (str): Поле суммы (по умолчанию: 'amount').
+            currency_field (str): Поле исходной валюты (по умолчанию: 'currency').
+            to_field (Optional[str]): Поле целевой валюты строки (по умолчанию:
+                у всех строк to_currency).
+            date_field (Optional[str]): Поле даты или момента транзакции
+                (по умолчанию: актуальные курсы).
+            result_field (str): Поле результата (по умолчанию: 'converted').
+            error_field (Optional[str]): Поле для текста ошибки строки
+                (по умолчанию: ошибка прерывает конвертацию).
+            batch_size (int): Количество строк в пакете (по умолчанию: 1000).
+            prefetch (int): Сколько пакетов может ждать записи (по умолчанию: 4).
+        """
+        self.api = api
+        self.to_currency = (to_currency or api.base_currency).upper()
+        self.amount_field = amount_field
+        self.currency_field = currency_field
+        self.to_field = to_field
+        self.date_field = date_field
+        self.result_field = result_field
+        self.error_field = error_field
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.rows = 0
+        self.errors = 0
+        self._known: Dict[date, RateSnapshot] = {}
+
+    async def batches(self, rows: Rows) -> AsyncIterator[List[Row]]:
+        """Конвертировать строки, выдавая их пакетами по мере готовности.
+
+        Аргументы:
+            rows (Rows): Итератор или асинхронный итератор строк (словарей).
+
+        Возвращает:
+            AsyncIterator[List[Row]]: Пакеты сконвертированных строк.
+
+        Исключения:
+            ValueError: Если в строке нет нужного поля, сумма, дата или валюта
+                некорректны и error_field не задан.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+        done = object()
+
+        async def produce() -> None:
+            start = 0
+            try:
+                async for rows_batch in _read_batches(rows, self.batch_size):
+                    batch = _Batch(start, rows_batch)
+                    start += len(rows_batch)
+                    await self._resolve(batch)
+                    await queue.put(batch)
+            except Exception as error:
+                await queue.put(error)
+            else:
+                await queue.put(done)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield self._convert(item)
+        finally:
+            producer.cancel()
+
+    async def convert(self, rows: Rows) -> AsyncIterator[Row]:
+        """Конвертировать строки, выдавая их по одной (см. batches()).
+
+        Аргументы:
+            rows (Rows): Итератор или асинхронный итератор строк (словарей).
+
+        Возвращает:
+            AsyncIterator[Row]: Сконвертированные строки.
+        """
+        async for batch in self.batches(rows):
+            for row in batch:
+                yield row
+
+    async def _resolve(self, batch: _Batch) -> None:
+        """Определить московскую дату каждой строки и загрузить курсы на даты.
+
+        Аргументы:
+            batch (_Batch): Пакет строк.
+        """
+        if self.date_field is None:
+            batch.days = [None] * len(batch.rows)
+        else:
+            field, days = self.date_field, batch.days
+            for row in batch.rows:
+                try:
+                    moment = _parse_moment(row.get(field))
+                except ValueError as error:
+                    days.append(error)
+                    continue
+                days.append(None if moment is None else moscow_date(moment))
+        wanted = set(batch.days)
+        snapshots = batch.snapshots
+        if None in wanted:
+            snapshots[None] = await self.api.snapshot()
+        known = self._known
+        missing = []
+        for day in wanted:
+            if isinstance(day, date):
+                if day in known:
+                    snapshots[day] = known[day]
+                else:
+                    missing.append(day)
+        if missing:
+            missing.sort()
+            today = datetime.now(MOSCOW_TZ).date()
+            for day, snapshot in zip(missing, await self.api.snapshots_at(missing)):
+                snapshots[day] = snapshot
+                if day < today:
+                    known[day] = snapshot
+
+    def _convert(self, batch: _Batch) -> List[Row]:
+        """Сконвертировать суммы в строках пакета по загруженным курсам.
+
+        Аргументы:
+            batch (_Batch): Пакет строк с курсами.
+
+        Возвращает:
+            List[Row]: Те же строки с полем результата.
+        """
+        snapshots = batch.snapshots
+        amount_field, currency_field = self.amount_field, self.currency_field
+        to_field, result_field = self.to_field, self.result_field
+        target = self.to_currency
+        for offset, (row, day) in enumerate(zip(batch.rows, batch.days)):
+            try:
+                snapshot = snapshots.get(day)
+                if snapshot is None:  # Дата строки не разобрана, day — ошибка
+                    raise day
+                text = _field(row, amount_field)
+                if not isinstance(text, str):
+                    text = str(text)
+                try:
+                    amount = Decimal(text)
+                except InvalidOperation:
+                    amount = None
+                if amount is None or not amount.is_finite():  # Также 'Infinity'
+                    raise ValueError(f"Некорректная сумма {text!r}")
+                source = str(_field(row, currency_field)).strip().upper()
+                if to_field is not None:
+                    target = str(_field(row, to_field)).strip().upper()
+                row[result_field] = str(snapshot.convert(source, target, amount))
+            except ValueError as error:
+                if self.error_field is None:
+                    number = batch.start + offset + 1
+                    raise ValueError(f"Строка {number}: {error}") from error
+                self.errors += 1
+                row[result_field] = ""
+                row[self.error_field] = str(error)
+        self.rows += len(batch.rows)
+        return batch.rows
+
+
+async def convert_rows(
+    api: CrbRequestCurrencyApi, rows: Rows, **options: Any
+) -> AsyncIterator[Row]:
+    """Конвертировать строки транзакций потоково.
+
+    Аргументы:
+        api (CrbRequestCurrencyApi): Клиент, через который загружаются курсы.
+        rows (Rows): Итератор или асинхронный итератор строк (словарей).
+        **options: Параметры ConversionPipeline (to_currency, date_field, ...).
+
+    Возвращает:
+        AsyncIterator[Row]: Строки с полем результата.
+    """
+    async for row in ConversionPipeline(api, **options).convert(rows):
+        yield row
+
+
+def _detect_format(path: str, fmt: Optional[str]) -> str:
+    """Определить формат файла по явному значению или расширению."""
+    if fmt is not None:
+        return fmt
+    return "jsonl" if Path(path).suffix in (".jsonl", ".ndjson") else "csv"
+
+
+def _read_jsonl(source: IO[str]) -> Iterable[Row]:
+    """Читать строки JSONL; пустые строки пропускаются."""
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
+
+
+async def convert_file(
+    pipeline: ConversionPipeline,
+    source: str,
+    target: str,
+    input_format: Optional[str] = None,
+    output_format: Optional[str] = None,
+) -> int:
+    """Сконвертировать файл транзакций, записывая результат по мере готовности.
+
+    Столбцы выходного CSV — столбцы входного файла (для JSONL — ключи первой
+    строки), поле результата и поле ошибки.
+
+    Аргументы:
+        pipeline (ConversionPipeline): Параметры конвертации.
+        source (str): Входной файл или '-' для stdin.
+        target (str): Выходной файл или '-' для stdout.
+        input_format (Optional[str]): 'csv' или 'jsonl' (по умолчанию: по
+            расширению, иначе CSV).
+        output_format (Optional[str]): 'csv' или 'jsonl' (по умолчанию: по
+            расширению, иначе как у входного файла).
+
+    Возвращает:
+        int: Количество записанных строк.
+
+    Исключения:
+        ValueError: Если строка некорректна и pipeline.error_field не задан.
+    """
+    input_format = _detect_format(source, input_format)
+    if output_format is None:
+        output_format = input_format if target == "-" else None
+    output_format = _detect_format(target, output_format)
+    reader = sys.stdin if source == "-" else open(source, newline="", encoding="utf-8")
+    writer = (
+        sys.stdout if target == "-" else open(target, "w", newline="", encoding="utf-8")
+    )
+    try:
+        if input_format == "csv":
+            rows: Iterable[Row] = csv.DictReader(reader)
+        else:
+            rows = _read_jsonl(reader)
+        csv_writer: Optional[csv.DictWriter] = None
+        count = 0
+        async for batch in pipeline.batches(rows):
+            if output_format == "jsonl":
+                text = "".join(
+                    json.dumps(row, ensure_ascii=False, default=str) + "\n"
+                    for row in batch
+                )
+                await asyncio.to_thread(writer.write, text)
+            else:
+                if csv_writer is None:
+                    if isinstance(rows, csv.DictReader):
+                        fields = list(rows.fieldnames or ())
+                    else:
+                        fields = list(batch[0])
+                    extra = [pipeline.result_field, pipeline.error_field]
+                    fields += [name for name in extra if name and name not in fields]
+                    csv_writer = csv.DictWriter(
+                        writer, fields, restval="", extrasaction="ignore"
+                    )
+                    csv_writer.writeheader()
+                await asyncio.to_thread(csv_writer.writerows, batch)
+            count += len(batch)
+        return count
+    finally:
+        if reader is not sys.stdin:
+            reader.close()
+        if writer is not sys.stdout:
+            writer.close()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Потоковая конвертация сумм в файлах транзакций по курсам ЦБ РФ"
+    )
+    parser.add_argument("source", help="входной файл CSV/JSONL или '-' для stdin")
+    parser.add_argument("target", help="выходной файл CSV/JSONL или '-' для stdout")
+    parser.add_argument("--to", default="RUB", help="целевая валюта")
+    parser.add_argument("--to-field", help="поле целевой валюты строки")
+    parser.add_argument("--amount-field", default="amount")
+    parser.add_argument("--currency-field", default="currency")
+    parser.add_argument("--date-field", help="поле даты или момента транзакции")
+    parser.add_argument("--result-field", default="converted")
+    parser.add_argument(
+        "--error-field", help="записывать ошибки строк в это поле, а не прерываться"
+    )
+    parser.add_argument("--input-format", choices=("csv", "jsonl"))
+    parser.add_argument("--output-format", choices=("csv", "jsonl"))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--prefetch", type=int, default=PREFETCH)
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Выполнить конвертацию с параметрами командной строки.
+
+    Возвращает:
+        int: Количество записанных строк.
+    """
+    from Crb_currency_api.rate_store import close_shared
+
+    api = CrbRequestCurrencyApi()
+    pipeline = ConversionPipeline(
+        api,
+        to_currency=args.to,
+        amount_field=args.amount_field,
+        currency_field=args.currency_field,
+        to_field=args.to_field,
+        date_field=args.date_field,
+        result_field=args.result_field,
+        error_field=args.error_field,
+        batch_size=args.batch_size,
+        prefetch=args.prefetch,
+    )
+    try:
+        return await convert_file(
+            pipeline, args.source, args.target, args.input_format, args.output_format
+        )
+    finally:
+        await close_shared()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Запустить конвертацию файла с параметрами командной строки."""
+    args = parse_args(argv)
+    start = time.perf_counter()
+    count = asyncio.run(run(args))
+    elapsed = time.perf_counter() - start
+    print(
+        f"Строк: {count:,}, {elapsed:.1f} с, {count / max(elapsed, 1e-9):,.0f} строк/с",
+        file=sys.stderr,
+    )
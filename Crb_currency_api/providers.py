@@ -0,0 +1,359 @@
+"""Источники курсов и составной источник с резервированием и гонкой запросов.
+
+Снимок курсов относительно RUB можно получить не только из XML_daily ЦБ, но и
+из зеркал (JSON/XML) или фида в формате ЕЦБ. CompositeSource опрашивает
+несколько источников по приоритету: следующий запрашивается, когда предыдущий
+вернул ошибку или некорректный снимок, либо — в режиме гонки — когда предыдущий
+не ответил за hedge_delay. Первый корректный снимок побеждает, остальные
+запросы отменяются, а в снимке сохраняется его происхождение (Provenance).
+
+Источник применяется только к снимкам курсов (актуальным и на дату): динамика
+курса (get_rate_series) и внутренние коды валют ЦБ запрашиваются напрямую у
+ЦБ или локального сервиса курсов, без резервирования.
+
+Пример:
+    source = CompositeSource([cbr_xml(), cbr_json_mirror()], hedge_delay=0.3)
+    api = CrbRequestCurrencyApi(source=source)
+"""
+
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING, Collection, Dict, List, Optional, Sequence
+
+import httpx
+
+from Crb_currency_api.metrics import Observer, get_observer
+from Crb_currency_api.parsers import CbrJsonParser, EcbXmlParser, Parser, XmlParser
+from Crb_currency_api.resilience import CircuitOpenError
+from Crb_currency_api.snapshot import Provenance, RateSnapshot
+
+if TYPE_CHECKING:
+    from Crb_currency_api.api_client import ApiClient
+
+logger = logging.getLogger(__name__)
+
+
+class RateProvider:
+    """Один источник снимков курсов: адрес и парсер его ответов.
+
+    У каждого источника свой HTTP-клиент, а значит свои пул соединений,
+    политика повторов и предохранитель: недоступность одного источника не
+    размыкает предохранитель остальных.
+
+    Атрибуты:
+        name (str): Имя источника для Provenance и метрик.
+        url (str): URL актуальных курсов.
+        dated_url (Optional[str]): Шаблон URL курсов на дату с полем {on}
+            (например, '...?date_req={on:%d/%m/%Y}'); None — курсы на дату
+            источник не отдаёт.
+        parser (Parser): Парсер ответов источника.
+        client (ApiClient): HTTP-клиент источника (создаётся при первом обращении).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        parser: Parser,
+        dated_url: Optional[str] = None,
+        client: Optional["ApiClient"] = None,
+        **client_options,
+    ):
+        """Инициализировать источник.
+
+        Аргументы:
+            name (str): Имя источника.
+            url (str): URL актуальных курсов.
+            parser (Parser): Парсер ответов.
+            dated_url (Optional[str]): Шаблон URL курсов на дату с полем {on}
+                (по умолчанию: курсы на дату не поддерживаются).
+            client (Optional[ApiClient]): HTTP-клиент (по умолчанию: собственный
+                ApiClient).
+            **client_options: Параметры собственного ApiClient (timeout,
+                transport, retry_policy, circuit_breaker и т. д.).
+        """
+        self.name = name
+        self.url = url
+        self.dated_url = dated_url
+        self.parser = parser
+        self._client = client
+        self._client_options = client_options
+
+    @property
+    def client(self) -> "ApiClient":
+        """HTTP-клиент источника; создаётся при первом обращении."""
+        if self._client is None:
+            from Crb_currency_api.api_client import ApiClient
+
+            self._client = ApiClient(**self._client_options)
+        return self._client
+
+    def supports(self, on: Optional[date]) -> bool:
+        """Проверить, отдаёт ли источник курсы на дату (None — актуальные)."""
+        return on is None or self.dated_url is not None
+
+    def url_for(self, on: Optional[date]) -> str:
+        """Получить URL курсов на дату (None — актуальных)."""
+        return self.url if on is None else self.dated_url.format(on=on)
+
+    async def fetch(self, on: Optional[date] = None) -> RateSnapshot:
+        """Загрузить и распарсить снимок курсов относительно RUB.
+
+        Аргументы:
+            on (Optional[date]): Дата курсов (по умолчанию: актуальные).
+
+        Возвращает:
+            RateSnapshot: Снимок курсов.
+
+        Исключения:
+            httpx.HTTPError: Если запрос завершился ошибкой.
+            ValueError: Если ответ не удалось разобрать.
+        """
+        return await self.client.get_parsed(
+            self.url_for(on),
+            lambda response: self.parser.parse_snapshot(response.content),
+        )
+
+    async def aclose(self) -> None:
+        """Закрыть HTTP-клиент источника, если он был создан."""
+        if self._client is not None:
+            await self._client.client.aclose()
+
+
+def cbr_xml(**kwargs) -> RateProvider:
+    """Источник XML_daily.asp ЦБ РФ (параметры — как у RateProvider)."""
+    return RateProvider(
+        "cbr",
+        "http://www.cbr.ru/scripts/XML_daily.asp",
+        XmlParser(),
+        dated_url="http://www.cbr.ru/scripts/XML_daily.asp?date_req={on:%d/%m/%Y}",
+        **kwargs,
+    )
+
+
+def cbr_json_mirror(**kwargs) -> RateProvider:
+    """Источник JSON-зеркала курсов ЦБ cbr-xml-daily.ru (daily_json.js)."""
+    return RateProvider(
+        "cbr-json",
+        "https://www.cbr-xml-daily.ru/daily_json.js",
+        CbrJsonParser(),
+        dated_url="https://www.cbr-xml-daily.ru/archive/{on:%Y/%m/%d}/daily_json.js",
+        **kwargs,
+    )
+
+
+def cbr_xml_mirror(**kwargs) -> RateProvider:
+    """Источник XML-зеркала курсов ЦБ cbr-xml-daily.ru (формат XML_daily)."""
+    return RateProvider(
+        "cbr-xml-mirror",
+        "https://www.cbr-xml-daily.ru/daily_utf8.xml",
+        XmlParser(),
+        dated_url="https://www.cbr-xml-daily.ru/archive/{on:%Y/%m/%d}/daily_utf8.xml",
+        **kwargs,
+    )
+
+
+def ecb_xml(url: str, **kwargs) -> RateProvider:
+    """Источник фида в формате ЕЦБ (eurofxref-daily.xml) с курсом RUB.
+
+    Аргументы:
+        url (str): Адрес фида.
+        **kwargs: Параметры RateProvider.
+    """
+    return RateProvider("ecb", url, EcbXmlParser(), **kwargs)
+
+
+class SourceUnavailableError(httpx.HTTPError):
+    """Ни один источник не вернул корректный снимок курсов.
+
+    Атрибуты:
+        errors (Dict[str, BaseException]): Ошибки по именам источников.
+    """
+
+    def __init__(self, errors: Dict[str, BaseException]):
+        self.errors = errors
+        details = "; ".join(f"{name}: {error!r}" for name, error in errors.items())
+        super().__init__(f"Ни один источник курсов не ответил ({details})")
+
+
+class CompositeSource:
+    """Составной источник: резервирование и гонка запросов к нескольким источникам.
+
+    Источники опрашиваются в порядке приоритета. Следующий запускается сразу,
+    как только все запущенные завершились ошибкой или некорректным снимком, а
+    если задан hedge_delay — ещё и тогда, когда ни один запущенный не ответил за
+    hedge_delay секунд. Без hedge_delay это последовательное резервирование,
+    с hedge_delay=0 — одновременная гонка всех источников. Возвращается первый
+    корректный снимок; остальные запросы отменяются.
+
+    Атрибуты:
+        providers (List[RateProvider]): Источники в порядке приоритета.
+        hedge_delay (Optional[float]): Задержка запуска следующего источника,
+            пока запущенные не ответили, в секундах (None — только при ошибке).
+        required (Collection[str]): Валюты, без которых снимок некорректен.
+        observer (Observer): Получатель результатов запросов к источникам.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[RateProvider],
+        hedge_delay: Optional[float] = None,
+        required: Collection[str] = ("USD", "EUR"),
+        observer: Optional[Observer] = None,
+    ):
+        """Инициализировать составной источник.
+
+        Аргументы:
+            providers (Sequence[RateProvider]): Источники в порядке приоритета.
+            hedge_delay (Optional[float]): Задержка запуска следующего источника
+                в секундах (по умолчанию: только при ошибке предыдущего).
+            required (Collection[str]): Валюты, которые должны быть в снимке
+                (по умолчанию: USD и EUR).
+            observer (Optional[Observer]): Получатель результатов запросов
+                (по умолчанию: get_observer()).
+
+        Исключения:
+            ValueError: Если не задан ни один источник.
+        """
+        if not providers:
+            raise ValueError("Нужен хотя бы один источник курсов")
+        self.providers = list(providers)
+        self.hedge_delay = hedge_delay
+        self.required = tuple(required)
+        self.observer = observer or get_observer()
+
+    def validate(self, snapshot: RateSnapshot) -> None:
+        """Проверить, что снимок пригоден к использованию.
+
+        Аргументы:
+            snapshot (RateSnapshot): Снимок курсов относительно RUB.
+
+        Исключения:
+            ValueError: Если в снимке нет обязательных валют или курсы не
+                положительны.
+        """
+        missing = [code for code in self.required if code not in snapshot]
+        if missing:
+            raise ValueError(f"В снимке нет валют {', '.join(missing)}")
+        if any(rate <= 0 for rate in snapshot.values()):
+            raise ValueError("В снимке есть неположительный курс")
+
+    async def _attempt(
+        self, provider: RateProvider, on: Optional[date]
+    ) -> RateSnapshot:
+        """Запросить снимок у одного источника и проверить его.
+
+        Аргументы:
+            provider (RateProvider): Источник.
+            on (Optional[date]): Дата курсов (None — актуальные).
+
+        Возвращает:
+            RateSnapshot: Корректный снимок без сведений о происхождении.
+        """
+        start = time.perf_counter()
+        try:
+            snapshot = await provider.fetch(on)
+            self.validate(snapshot)
+        except Exception as error:
+            self.observer.provider_result(
+                provider.name, time.perf_counter() - start, error
+            )
+            raise
+        self.observer.provider_result(provider.name, time.perf_counter() - start, None)
+        return snapshot
+
+    async def fetch(self, on: Optional[date] = None) -> RateSnapshot:
+        """Получить первый корректный снимок курсов из источников.
+
+        Аргументы:
+            on (Optional[date]): Дата курсов (по умолчанию: актуальные); источники
+                без курсов на дату пропускаются.
+
+        Возвращает:
+            RateSnapshot: Снимок курсов относительно RUB с заполненным provenance.
+
+        Исключения:
+            CircuitOpenError: Если у всех источников разомкнут предохранитель.
+            SourceUnavailableError: Если ни один источник не вернул корректный
+                снимок.
+        """
+        queue = [provider for provider in self.providers if provider.supports(on)]
+        if not queue:
+            raise SourceUnavailableError(
+                {"*": ValueError("Нет источников курсов на дату")}
+            )
+        queue.reverse()
+        running: Dict[asyncio.Task, RateProvider] = {}
+        started: Dict[RateProvider, float] = {}
+        errors: Dict[str, BaseException] = {}
+
+        def launch() -> None:
+            provider = queue.pop()
+            started[provider] = time.perf_counter()
+            running[asyncio.ensure_future(self._attempt(provider, on))] = provider
+
+        launch()
+        try:
+            while running:
+                timeout = self.hedge_delay if queue else None
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    provider = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return self._with_provenance(
+                            task.result(), provider, on, started, errors
+                        )
+                    logger.warning("Источник курсов %s: %r", provider.name, error)
+                    errors[provider.name] = error
+                if queue and (not done or not running):
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+        if all(isinstance(error, CircuitOpenError) for error in errors.values()):
+            raise CircuitOpenError("Предохранители всех источников курсов разомкнуты")
+        raise SourceUnavailableError(errors)
+
+    def _with_provenance(
+        self,
+        snapshot: RateSnapshot,
+        provider: RateProvider,
+        on: Optional[date],
+        started: Dict[RateProvider, float],
+        errors: Dict[str, BaseException],
+    ) -> RateSnapshot:
+        """Вернуть копию снимка со сведениями о происхождении."""
+        provenance = Provenance(
+            provider.name,
+            provider.url_for(on),
+            datetime.now(timezone.utc),
+            time.perf_counter() - started[provider],
+            tuple(errors),
+        )
+        return RateSnapshot(
+            snapshot._rates,
+            base=snapshot.base,
+            date=snapshot.date,
+            provenance=provenance,
+        )
+
+    async def aclose(self) -> None:
+        """Закрыть HTTP-клиенты всех источников."""
+        await asyncio.gather(*(provider.aclose() for provider in self.providers))
+
+
+def default_providers(**kwargs) -> List[RateProvider]:
+    """Источники по умолчанию: XML_daily ЦБ, затем JSON-зеркало.
+
+    Аргументы:
+        **kwargs: Параметры RateProvider, общие для всех источников.
+
+    Возвращает:
+        List[RateProvider]: Источники в порядке приоритета.
+    """
+    return [cbr_xml(**kwargs), cbr_json_mirror(**kwargs)]
@@ -0,0 +1,803 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_right
+from datetime import date as Date
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import (
+    TYPE_CHECKING,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from Crb_currency_api.cache_manager import MOSCOW_TZ, CacheManager
+from Crb_currency_api.cross_rates import CrossRateMatrix
+from Crb_currency_api.history_index import HistoryIndex, Moment, moscow_date
+from Crb_currency_api.metrics import NULL_OBSERVER, Observer, get_observer
+from Crb_currency_api.single_flight import SingleFlight
+from Crb_currency_api.snapshot import RateSnapshot
+from Crb_currency_api.watch import RateSubscription
+
+if TYPE_CHECKING:
+    from Crb_currency_api.api_client import ApiClient
+    from Crb_currency_api.history_archive import HistoryArchive
+    from Crb_currency_api.persistent_cache import SqliteSnapshotCache
+    from Crb_currency_api.refresher import RateRefresher
+    from Crb_currency_api.shared_snapshot import SharedSnapshotFile
+
+RatesFetcher = Callable[[], Awaitable[Mapping[str, Decimal]]]
+DatedRatesFetcher = Callable[[Date], Awaitable[Mapping[str, Decimal]]]
+SeriesFetcher = Callable[[str, Date, Date], Awaitable[Mapping[Date, Decimal]]]
+
+logger = logging.getLogger(__name__)
+
+
+class RateStore:
+    """Хранилище снимков курсов ЦБ относительно RUB.
+
+    Один и тот же снимок используется всеми экземплярами API, независимо от их
+    базовой валюты, поэтому добавление новой базовой валюты не требует ни
+    дополнительного запроса, ни повторного парсинга.
+
+    Курсы на прошедшие даты не меняются после публикации, поэтому хранятся
+    в history бессрочно, пока их не вытеснят из общего кэша более нужные
+    записи (вместе с ними они удаляются и из index, так что память ограничена
+    maxsize); актуальные курсы живут в кэше до следующей публикации.
+    Если задан max_staleness, после истечения кэша хранилище продолжает отдавать
+    предыдущий снимок, пока он не старше max_staleness, и обновляет его в фоне.
+
+    Атрибуты:
+        cache (CacheManager): Кэш снимков курсов.
+        SERIES_LOOKBACK (timedelta): Насколько раньше начала диапазона запрашивать
+            динамику курса, чтобы узнать курс, действующий в первый день.
+        history (CacheNamespace): Бессрочные курсы по датам (CrossRateMatrix) в
+            пространстве 'history' кэша.
+        index (HistoryIndex): Курсы из history по датам публикации для поиска
+            курсов, действовавших в момент времени; публикации, вытесненные из
+            history, из него удаляются.
+        day_rates (CacheNamespace): Бессрочные курсы отдельных валют по датам
+            (Dict[str, Decimal]), загруженные как динамика курса, в пространстве
+            'day_rates' кэша.
+        inflight (SingleFlight): Реестр выполняющихся загрузок.
+        eager_matrix (bool): Вычислять все пары валют сразу при смене снимка.
+        persistent (Optional[SqliteSnapshotCache]): Постоянный кэш снимков на диске.
+        max_staleness (Optional[float]): Допустимый возраст устаревшего снимка в
+            секундах (None — как у запущенного обновления refresher, без него
+            устаревшие снимки не отдаются).
+        compact_history (bool): Хранить курсы на прошедшие даты в RateTable.
+        observer (Observer): Получатель событий кэша и возраста снимков.
+        shared_file (Optional[SharedSnapshotFile]): Снимок, общий для процессов
+            хоста через mmap.
+        archive (Optional[HistoryArchive]): Архив истории курсов на диске:
+            прошедшие дни читаются из него без запросов, а новые публикации
+            дописываются в него.
+        subscriptions (Set[RateSubscription]): Подписки на новые снимки.
+        refresher (Optional[RateRefresher]): Работающее фоновое обновление
+            хранилища, если оно запущено.
+        SHARED_WAIT (float): Сколько секунд ждать снимок, загружаемый другим
+            процессом, прежде чем загрузить курсы самостоятельно.
+        SHARED_POLL (float): Интервал проверки новой версии общего снимка.
+    """
+
+    SERIES_LOOKBACK = timedelta(days=14)
+    SHARED_WAIT = 30.0
+    SHARED_POLL = 0.05
+
+    def __init__(
+        self,
+        maxsize: int = 100,
+        eager_matrix: bool = False,
+        persistent: Optional["SqliteSnapshotCache"] = None,
+        max_staleness: Optional[float] = None,
+        compact_history: bool = False,
+        observer: Optional[Observer] = None,
+        shared_file: Optional["SharedSnapshotFile"] = None,
+        archive: Optional["HistoryArchive"] = None,
+    ):
+        """Инициализировать хранилище.
+
+        Аргументы:
+            maxsize (int): Максимальное количество элементов в кэше (по умолчанию: 100).
+            eager_matrix (bool): Вычислять все пары валют сразу (по умолчанию: лениво).
+            persistent (Optional[SqliteSnapshotCache]): Постоянный кэш на диске,
+                общий для процессов хоста (по умолчанию: не используется).
+            max_staleness (Optional[float]): Допустимый возраст устаревшего снимка
+                в секундах (по умолчанию: устаревшие снимки не отдаются).
+            compact_history (bool): Хранить курсы на прошедшие даты в компактной
+                RateTable вместо словарей Decimal (по умолчанию: False).
+            observer (Optional[Observer]): Получатель событий кэша и возраста
+                отдаваемых снимков (по умолчанию: get_observer()).
+            shared_file (Optional[SharedSnapshotFile]): Снимок, общий для
+                процессов хоста: курсы загружает один процесс, остальные читают
+                их из разделяемой памяти (по умолчанию: не используется).
+            archive (Optional[HistoryArchive]): Архив истории курсов; если открыт
+                для записи, в него дописывается каждая новая публикация
+                (по умолчанию: не используется).
+        """
+        self.observer = observer or get_observer()
+        self.cache = CacheManager(maxsize=maxsize, observer=self.observer)
+        self.index = HistoryIndex()
+        self.history = self.cache.namespace(
+            "history",
+            CacheManager.PERMANENT,
+            lambda key, matrix: self.index.discard(matrix),
+        )
+        self.day_rates = self.cache.namespace("day_rates", CacheManager.PERMANENT)
+        self.inflight = SingleFlight()
+        self.eager_matrix = eager_matrix
+        self.persistent = persistent
+        self.max_staleness = max_staleness
+        self.compact_history = compact_history
+        self.shared_file = shared_file
+        self.archive = archive
+        self._matrix: Optional[CrossRateMatrix] = None
+        self._latest: Optional[RateSnapshot] = None
+        self._latest_at = 0.0
+        self._background: Set[asyncio.Task] = set()
+        self.subscriptions: Set[RateSubscription] = set()
+        self.refresher: Optional["RateRefresher"] = None
+
+    @property
+    def latest(self) -> Optional[RateSnapshot]:
+        """Последний загруженный снимок актуальных курсов (даже если кэш истёк)."""
+        return self._latest
+
+    @property
+    def latest_age(self) -> Optional[float]:
+        """Возраст последнего загруженного снимка в секундах."""
+        if self._latest is None:
+            return None
+        return time.monotonic() - self._latest_at
+
+    async def get_rates(self, fetch: RatesFetcher) -> RateSnapshot:
+        """Получить курсы относительно RUB из кэша или загрузить их.
+
+        Одновременные промахи кэша ожидают одну общую загрузку. Если кэш истёк,
+        но предыдущий снимок не старше max_staleness, он возвращается сразу, а
+        новый загружается в фоне. Если задан shared_file, сначала проверяется
+        снимок, опубликованный любым процессом хоста. Пока предохранитель
+        запросов разомкнут (CircuitOpenError), отдаётся последний загруженный
+        снимок, если он есть.
+
+        Аргументы:
+            fetch (Callable): Функция, загружающая и парсящая курсы.
+
+        Возвращает:
+            RateSnapshot: Снимок курсов относительно RUB.
+        """
+        if self.shared_file is not None:
+            shared = self.shared_file.current()
+            if shared is not None and shared is not self._latest:
+                self.cache.set("rates", shared)
+                self._set_latest(shared)
+        rates = self.cache.get("rates")
+        if rates is None:
+            age = self.latest_age
+            max_staleness = self.max_staleness
+            if max_staleness is None and self.refresher is not None:
+                max_staleness = self.refresher.max_staleness
+            if max_staleness is not None and age is not None:
+                if age <= max_staleness:
+                    self._revalidate(fetch)
+                    self.observer.snapshot_served(age)
+                    return self._latest
+            try:
+                rates = await self.inflight.do("rates", lambda: self._load(fetch))
+            except Exception as error:
+                # Импорт здесь: resilience тянет httpx, не нужный до первого запроса
+                from Crb_currency_api.resilience import CircuitOpenError
+
+                if not isinstance(error, CircuitOpenError) or self._latest is None:
+                    raise
+                self.observer.snapshot_served(time.monotonic() - self._latest_at)
+                return self._latest
+        if self.observer is not NULL_OBSERVER:
+            self.observer.snapshot_served(time.monotonic() - self._latest_at)
+        return rates
+
+    async def refresh(self, fetch: RatesFetcher) -> RateSnapshot:
+        """Загрузить актуальные курсы из сети, минуя кэши.
+
+        Аргументы:
+            fetch (Callable): Функция, загружающая и парсящая курсы.
+
+        Возвращает:
+            RateSnapshot: Новый снимок курсов относительно RUB.
+        """
+        return await self.inflight.do(
+            "rates", lambda: self._load(fetch, from_disk=False)
+        )
+
+    def _revalidate(self, fetch: RatesFetcher) -> None:
+        """Запустить фоновую загрузку курсов, если она ещё не идёт.
+
+        Аргументы:
+            fetch (Callable): Функция, загружающая и парсящая курсы.
+        """
+        if "rates" in self.inflight:
+            return
+        task = asyncio.ensure_future(self.refresh(fetch))
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        """Записать в журнал ошибку фоновой загрузки.
+
+        Аргументы:
+            task (asyncio.Task): Завершённая фоновая задача.
+        """
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Фоновое обновление курсов не удалось: %s", task.exception())
+
+    async def get_matrix(self, fetch: RatesFetcher) -> CrossRateMatrix:
+        """Получить матрицу кросс-курсов для актуального снимка.
+
+        Матрица строится заново только при смене снимка в кэше.
+
+        Аргументы:
+            fetch (Callable): Функция, загружающая и парсящая курсы.
+
+        Возвращает:
+            CrossRateMatrix: Кросс-курсы актуального снимка.
+        """
+        rates = await self.get_rates(fetch)
+        matrix = self._matrix
+        if matrix is None or matrix.rub_rates is not rates:
+            matrix = self._matrix = CrossRateMatrix(rates, eager=self.eager_matrix)
+        return matrix
+
+    def current_matrix(self) -> Optional[CrossRateMatrix]:
+        """Получить матрицу актуального снимка, не загружая курсы.
+
+        Метод синхронный и не использует цикл событий, поэтому его можно
+        вызывать из любого потока: чтение ссылок атомарно, а матрица неизменяема.
+
+        Возвращает:
+            Optional[CrossRateMatrix]: Кросс-курсы, если кэш ещё не истёк и
+                матрица для снимка уже построена, иначе None.
+        """
+        rates = self.cache.peek("rates")
+        matrix = self._matrix
+        if rates is None or matrix is None or matrix.rub_rates is not rates:
+            return None
+        self.observer.cache_hit("rates")
+        if self.observer is not NULL_OBSERVER:
+            self.observer.snapshot_served(time.monotonic() - self._latest_at)
+        return matrix
+
+    async def get_matrix_on(
+        self, on: Date, fetch_on: DatedRatesFetcher
+    ) -> CrossRateMatrix:
+        """Получить матрицу кросс-курсов на указанную дату.
+
+        Курсы на прошедшие даты загружаются один раз и больше не истекают, пока
+        их не вытеснят из кэша. День, попадающий в интервал действия уже
+        загруженной публикации (index), не загружается вовсе и сразу
+        сохраняется в history; вытесненные из кэша публикации удаляются и из
+        index. Курсы на сегодня и будущие даты ещё могут измениться и не
+        кэшируются.
+
+        Аргументы:
+            on (date): Дата, на которую нужны курсы.
+            fetch_on (Callable): Функция, загружающая и парсящая курсы на дату.
+
+        Возвращает:
+            CrossRateMatrix: Кросс-курсы на указанную дату.
+        """
+        matrix = self.history.get(on)
+        if matrix is None:
+            matrix = self.index.lookup(on)
+            if matrix is not None:
+                self.history[on] = matrix
+        if matrix is None:
+            matrix = await self.inflight.do(
+                ("rates", on), lambda: self._load_on(on, fetch_on)
+            )
+        return matrix
+
+    async def get_matrix_at(
+        self, moment: Moment, fetch: RatesFetcher, fetch_on: DatedRatesFetcher
+    ) -> CrossRateMatrix:
+        """Получить кросс-курсы, действовавшие в момент времени.
+
+        Для прошедших дней сначала ищется загруженная публикация в index, и
+        только если её нет, курсы на день загружаются (и попадают в history).
+        Для сегодняшнего и будущих дней используется актуальный снимок, если он
+        уже действует, иначе курсы на день.
+
+        Аргументы:
+            moment (Union[datetime, date]): Момент времени; datetime без часового
+                пояса считается московским временем.
+            fetch (Callable): Функция, загружающая актуальные курсы.
+            fetch_on (Callable): Функция, загружающая и парсящая курсы на дату.
+
+        Возвращает:
+            CrossRateMatrix: Кросс-курсы, действовавшие в этот момент.
+        """
+        day = moscow_date(moment)
+        if day >= datetime.now(MOSCOW_TZ).date():
+            return await self._current_on(day, fetch, fetch_on)
+        matrix = self.index.lookup(day)
+        if matrix is None:
+            matrix = await self.get_matrix_on(day, fetch_on)
+        return matrix
+
+    async def get_matrices_at(
+        self,
+        moments: Iterable[Moment],
+        fetch: RatesFetcher,
+        fetch_on: DatedRatesFetcher,
+        concurrency: int,
+    ) -> List[CrossRateMatrix]:
+        """Получить кросс-курсы, действовавшие в каждый из моментов времени.
+
+        Загруженные публикации находятся одним проходом по упорядоченным
+        моментам (HistoryIndex.lookup_many); курсы на остальные прошедшие дни
+        загружаются параллельно, каждый день один раз.
+
+        Аргументы:
+            moments (Iterable[Union[datetime, date]]): Моменты времени, лучше
+                по возрастанию.
+            fetch (Callable): Функция, загружающая актуальные курсы.
+            fetch_on (Callable): Функция, загружающая и парсящая курсы на дату.
+            concurrency (int): Максимальное число одновременных запросов.
+
+        Возвращает:
+            List[CrossRateMatrix]: Кросс-курсы для каждого момента.
+        """
+        days = [moscow_date(moment) for moment in moments]
+        matrices = self.index.lookup_many(days)
+        today = datetime.now(MOSCOW_TZ).date()
+        missing = {
+            day for day, matrix in zip(days, matrices) if matrix is None and day < today
+        }
+        loaded = await self._load_matrices(sorted(missing), fetch_on, concurrency)
+        for day in sorted({day for day in days if day >= today}):
+            loaded[day] = await self._current_on(day, fetch, fetch_on)
+        for position, day in enumerate(days):
+            if matrices[position] is None:
+                matrices[position] = loaded[day]
+        return matrices
+
+    async def _current_on(
+        self, day: Date, fetch: RatesFetcher, fetch_on: DatedRatesFetcher
+    ) -> CrossRateMatrix:
+        """Получить кросс-курсы на сегодняшний или будущий день.
+
+        Актуальный снимок подходит, если его публикация уже действует в этот
+        день; после дневной публикации ЦБ он содержит курсы на завтра, и тогда
+        курсы на сегодня загружаются отдельно.
+
+        Аргументы:
+            day (date): День не раньше сегодняшнего.
+            fetch (Callable): Функция, загружающая актуальные курсы.
+            fetch_on (Callable): Функция, загружающая и парсящая курсы на дату.
+
+        Возвращает:
+            CrossRateMatrix: Кросс-курсы, действующие в этот день.
+        """
+        matrix = await self.get_matrix(fetch)
+        if matrix.date is not None and matrix.date > day:
+            matrix = await self.get_matrix_on(day, fetch_on)
+        return matrix
+
+    async def load_range(
+        self, dates: Iterable[Date], fetch_on: DatedRatesFetcher, concurrency: int
+    ) -> Dict[Date, RateSnapshot]:
+        """Загрузить курсы на несколько дат с ограничением параллельности.
+
+        Даты, уже имеющиеся в history, не запрашиваются повторно.
+
+        Аргументы:
+            dates (Iterable[date]): Даты, на которые нужны курсы.
+            fetch_on (Callable): Функция, загружающая и парсящая курсы на дату.
+            concurrency (int): Максимальное число одновременных запросов.
+
+        Возвращает:
+            Dict[date, RateSnapshot]: Снимки курсов относительно RUB по датам.
+        """
+        matrices = await self._load_matrices(dates, fetch_on, concurrency)
+        return {on: matrix.rub_rates for on, matrix in matrices.items()}
+
+    async def _load_matrices(
+        self, dates: Iterable[Date], fetch_on: DatedRatesFetcher, concurrency: int
+    ) -> Dict[Date, CrossRateMatrix]:
+        """Получить кросс-курсы на несколько дат с ограничением параллельности.
+
+        Аргументы:
+            dates (Iterable[date]): Даты, на которые нужны курсы.
+            fetch_on (Callable): Функция, загружающая и парсящая курсы на дату.
+            concurrency (int): Максимальное число одновременных запросов.
+
+        Возвращает:
+            Dict[date, CrossRateMatrix]: Кросс-курсы по датам.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def load(on: Date) -> CrossRateMatrix:
+            matrix = self.history.get(on)
+            if matrix is not None:
+                return matrix
+            async with semaphore:
+                return await self.get_matrix_on(on, fetch_on)
+
+        dates = list(dates)
+        matrices = await asyncio.gather(*(load(on) for on in dates))
+        return dict(zip(dates, matrices))
+
+    def known_rates(
+        self, on: Date, currency_codes: Iterable[str]
+    ) -> Optional[Dict[str, Decimal]]:
+        """Получить уже загруженные курсы валют относительно RUB на дату.
+
+        Аргументы:
+            on (date): Дата, на которую нужны курсы.
+            currency_codes (Iterable[str]): Коды валют.
+
+        Возвращает:
+            Optional[Dict[str, Decimal]]: Курсы по кодам или None, если хотя бы
+                один из них ещё не загружен.
+        """
+        matrix = self.history.get(on)
+        daily: Mapping[str, Decimal] = matrix.rub_rates if matrix is not None else {}
+        partial = self.day_rates.get(on) or {}
+        known = {}
+        for code in currency_codes:
+            rate = Decimal("1.0") if code == "RUB" else daily.get(code)
+            if rate is None:
+                rate = partial.get(code)
+                if rate is None:
+                    return None
+            known[code] = rate
+        return known
+
+    async def load_series(
+        self,
+        currency_codes: Collection[str],
+        days: Iterable[Date],
+        fetch_series: SeriesFetcher,
+        fetch_on: DatedRatesFetcher,
+        concurrency: int,
+    ) -> Dict[Date, Dict[str, Decimal]]:
+        """Загрузить курсы нескольких валют на каждую из дат.
+
+        Уже загруженные курсы не запрашиваются повторно. Для остальных выбирается
+        более дешёвый способ: ежедневные курсы (один запрос на дату, все валюты
+        попадают в history) или динамика курса (один запрос на валюту за весь
+        диапазон, курсы попадают в day_rates). Динамика содержит только даты
+        смены курса, поэтому на остальные даты берётся курс, действующий на них.
+
+        Аргументы:
+            currency_codes (Collection[str]): Коды валют.
+            days (Iterable[date]): Даты, на которые нужны курсы.
+            fetch_series (Callable): Функция, загружающая динамику курса валюты
+                за диапазон дат.
+            fetch_on (Callable): Функция, загружающая и парсящая курсы на дату.
+            concurrency (int): Максимальное число одновременных запросов.
+
+        Возвращает:
+            Dict[date, Dict[str, Decimal]]: Курсы валют относительно RUB по датам;
+                даты, на которые курс какой-либо валюты неизвестен, пропускаются.
+        """
+        days = sorted(set(days))
+        missing = {
+            code: [on for on in days if self.known_rates(on, (code,)) is None]
+            for code in currency_codes
+            if code != "RUB"
+        }
+        wanted = [code for code, code_days in missing.items() if code_days]
+        missing_days = sorted({on for code in wanted for on in missing[code]})
+        fetched: Dict[Date, Dict[str, Decimal]] = {}
+        if missing_days and len(missing_days) <= len(wanted):
+            loaded = await self.load_range(missing_days, fetch_on, concurrency)
+            fetched = {on: dict(rates) for on, rates in loaded.items()}
+        elif missing_days:
+            series_list = await asyncio.gather(
+                *(
+                    self._load_series(code, missing[code], fetch_series)
+                    for code in wanted
+                )
+            )
+            for code, series in zip(wanted, series_list):
+                for on, rate in series.items():
+                    fetched.setdefault(on, {})[code] = rate
+
+        result = {}
+        for on in days:
+            rates = self.known_rates(on, currency_codes)
+            if rates is None and on in fetched:
+                available = {"RUB": Decimal("1.0"), **fetched[on]}
+                if all(code in available for code in currency_codes):
+                    rates = {code: available[code] for code in currency_codes}
+            if rates is not None:
+                result[on] = rates
+        return result
+
+    async def _load_series(
+        self, currency_code: str, days: List[Date], fetch_series: SeriesFetcher
+    ) -> Dict[Date, Decimal]:
+        """Загрузить курс одной валюты на даты одним запросом динамики.
+
+        Аргументы:
+            currency_code (str): Код валюты.
+            days (List[date]): Даты по возрастанию.
+            fetch_series (Callable): Функция, загружающая динамику курса.
+
+        Возвращает:
+            Dict[date, Decimal]: Курсы, действующие на каждую из дат.
+        """
+        start, end = days[0] - self.SERIES_LOOKBACK, days[-1]
+        series = await self.inflight.do(
+            ("series", currency_code, start, end),
+            lambda: fetch_series(currency_code, start, end),
+        )
+        changes = sorted(series)
+        today = datetime.now(MOSCOW_TZ).date()
+        rates = {}
+        for on in days:
+            index = bisect_right(changes, on)
+            if index:
+                rates[on] = series[changes[index - 1]]
+                if on < today:
+                    known = self.day_rates.get(on)
+                    if known is None:
+                        known = self.day_rates[on] = {}
+                    known[currency_code] = rates[on]
+        return rates
+
+    async def _load_on(self, on: Date, fetch_on: DatedRatesFetcher) -> CrossRateMatrix:
+        """Загрузить курсы на дату и сохранить их, если дата уже прошла.
+
+        Аргументы:
+            on (date): Дата, на которую нужны курсы.
+            fetch_on (Callable): Функция, загружающая и парсящая курсы на дату.
+
+        Возвращает:
+            CrossRateMatrix: Кросс-курсы на указанную дату.
+        """
+        is_past = on < datetime.now(MOSCOW_TZ).date()
+        key = on.isoformat()
+        rates = None
+        if is_past and self.archive is not None:
+            rates = self.archive.rates_on(on)
+        if rates is None and is_past:
+            rates = await self._load_persistent(key)
+        if rates is None:
+            rates = await fetch_on(on)
+            if not isinstance(rates, RateSnapshot):
+                rates = RateSnapshot(rates)
+            if is_past:
+                await self._save_persistent(key, rates, None)
+        if is_past and self.compact_history:
+            rates = rates.compact()
+        matrix = CrossRateMatrix(rates, eager=self.eager_matrix)
+        if is_past:
+            self.history[on] = matrix
+            self.index.add(on, matrix)
+        return matrix
+
+    async def _load(self, fetch: RatesFetcher, from_disk: bool = True) -> RateSnapshot:
+        """Загрузить курсы и сохранить их в кэш.
+
+        Сначала проверяется постоянный кэш на диске, затем выполняется запрос.
+        Обычный словарь курсов сохраняется как снимок без даты публикации.
+        Снимок с диска сохраняет свой возраст и остаток срока жизни.
+
+        Аргументы:
+            fetch (Callable): Функция, загружающая и парсящая курсы.
+            from_disk (bool): Проверять постоянный кэш перед запросом.
+
+        Возвращает:
+            RateSnapshot: Снимок курсов относительно RUB.
+        """
+        if self.shared_file is None:
+            rates, age, ttl = await self._fetch_snapshot(fetch, from_disk)
+        else:
+            rates, age, ttl = await self._load_shared(fetch, from_disk)
+        self.cache.set("rates", rates, ttl)
+        self._set_latest(rates, age)
+        return rates
+
+    def _set_latest(self, rates: RateSnapshot, age: float = 0.0) -> None:
+        """Запомнить последний снимок и разослать его подписчикам, если он новый.
+
+        Аргументы:
+            rates (RateSnapshot): Загруженный снимок курсов относительно RUB.
+            age (float): Сколько секунд назад снимок получен из сети
+                (по умолчанию: только что).
+        """
+        previous = self._latest
+        self._latest, self._latest_at = rates, time.monotonic() - age
+        if previous is not None and (rates is previous or rates == previous):
+            return
+        if self.archive is not None and self.archive.writable and rates.date:
+            try:
+                self.archive.append(rates)
+            except ValueError as error:
+                logger.warning("Публикация не дописана в архив: %s", error)
+        for subscription in self.subscriptions:
+            subscription.push(rates)
+
+    def subscribe(self, maxsize: int = 16) -> RateSubscription:
+        """Подписаться на новые снимки актуальных курсов.
+
+        Каждый снимок, отличающийся от предыдущего, добавляется в очередь всех
+        подписок; загрузка при этом выполняется одна на всё хранилище.
+
+        Аргументы:
+            maxsize (int): Размер очереди подписки (по умолчанию: 16).
+
+        Возвращает:
+            RateSubscription: Подписка; закрывается через unsubscribe().
+        """
+        subscription = RateSubscription(maxsize)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: RateSubscription) -> None:
+        """Закрыть подписку и перестать отправлять в неё снимки.
+
+        Аргументы:
+            subscription (RateSubscription): Подписка из subscribe().
+        """
+        self.subscriptions.discard(subscription)
+        subscription.close()
+
+    async def _fetch_snapshot(
+        self, fetch: RatesFetcher, from_disk: bool
+    ) -> Tuple[RateSnapshot, float, float]:
+        """Прочитать снимок из постоянного кэша или загрузить его.
+
+        Возраст снимка с диска отсчитывается от момента его загрузки из сети;
+        снимок, записанный без этого момента, загружается заново.
+
+        Аргументы:
+            fetch (Callable): Функция, загружающая и парсящая курсы.
+            from_disk (bool): Проверять постоянный кэш перед запросом.
+
+        Возвращает:
+            Tuple[RateSnapshot, float, float]: Снимок курсов относительно RUB,
+                его возраст и оставшийся срок жизни в секундах.
+        """
+        persistent = self.persistent
+        if from_disk and persistent is not None:
+            entry = await asyncio.to_thread(
+                persistent.load_entry, persistent.LATEST_KEY
+            )
+            if entry is not None and entry[1] is not None:
+                rates, fetched_at, expires_at = entry
+                now = time.time()
+                if expires_at is None:
+                    ttl = float(self.cache.calculate_ttl())
+                else:
+                    ttl = expires_at - now
+                return rates, max(now - fetched_at, 0.0), ttl
+        rates = await fetch()
+        if not isinstance(rates, RateSnapshot):
+            rates = RateSnapshot(rates)
+        ttl = float(self.cache.calculate_ttl())
+        if persistent is not None:
+            await self._save_persistent(persistent.LATEST_KEY, rates, ttl)
+        return rates, 0.0, ttl
+
+    async def _load_shared(
+        self, fetch: RatesFetcher, from_disk: bool
+    ) -> Tuple[RateSnapshot, float, float]:
+        """Загрузить курсы в одном процессе хоста и опубликовать их остальным.
+
+        Процесс, получивший блокировку shared_file, загружает и публикует снимок;
+        остальные ждут новую версию не дольше SHARED_WAIT секунд, после чего
+        загружают курсы сами.
+
+        Аргументы:
+            fetch (Callable): Функция, загружающая и парсящая курсы.
+            from_disk (bool): Принимать снимок, опубликованный до вызова, и
+                проверять постоянный кэш перед запросом.
+
+        Возвращает:
+            Tuple[RateSnapshot, float, float]: Снимок курсов относительно RUB,
+                его возраст и оставшийся срок жизни в секундах (у снимка из
+                shared_file — 0 и срок до следующей публикации).
+        """
+        shared = self.shared_file
+        known = shared.version
+        deadline = time.monotonic() + self.SHARED_WAIT
+        while not shared.acquire():
+            if shared.version != known:
+                rates = shared.current()
+                if rates is not None:
+                    return rates, 0.0, float(self.cache.calculate_ttl())
+            if time.monotonic() >= deadline:
+                return await self._fetch_snapshot(fetch, from_disk)
+            await asyncio.sleep(self.SHARED_POLL)
+        try:
+            rates = shared.current() if from_disk else None
+            if rates is not None:
+                return rates, 0.0, float(self.cache.calculate_ttl())
+            rates, age, ttl = await self._fetch_snapshot(fetch, from_disk)
+            try:
+                shared.publish(rates, ttl)
+            except ValueError as error:
+                logger.warning("Снимок не опубликован для процессов: %s", error)
+                return rates, age, ttl
+            return shared.current() or rates, age, ttl
+        finally:
+            shared.release()
+
+    async def _load_persistent(self, key: str) -> Optional[RateSnapshot]:
+        """Прочитать снимок из постоянного кэша, не блокируя цикл событий.
+
+        Аргументы:
+            key (str): Ключ снимка.
+
+        Возвращает:
+            Optional[RateSnapshot]: Снимок курсов или None.
+        """
+        if self.persistent is None:
+            return None
+        return await asyncio.to_thread(self.persistent.load, key)
+
+    async def _save_persistent(
+        self, key: str, rates: RateSnapshot, ttl: Optional[float]
+    ) -> None:
+        """Записать снимок в постоянный кэш, не блокируя цикл событий.
+
+        Аргументы:
+            key (str): Ключ снимка.
+            rates (RateSnapshot): Снимок курсов относительно RUB.
+            ttl (Optional[float]): Время жизни в секундах (None — бессрочно).
+        """
+        if self.persistent is not None:
+            await asyncio.to_thread(self.persistent.save, key, rates, ttl)
+
+
+_shared_store: Optional[RateStore] = None
+_shared_client: Optional["ApiClient"] = None
+
+
+def shared_store() -> RateStore:
+    """Вернуть общее для процесса хранилище курсов.
+
+    Возвращает:
+        RateStore: Общее хранилище.
+    """
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = RateStore()
+    return _shared_store
+
+
+def shared_client() -> "ApiClient":
+    """Вернуть общий для процесса HTTP-клиент с единым пулом соединений.
+
+    Клиент привязан к циклу событий, в котором выполнялись запросы; при смене
+    цикла (например, между вызовами asyncio.run) его нужно закрыть через
+    close_shared().
+
+    Возвращает:
+        ApiClient: Общий HTTP-клиент.
+    """
+    global _shared_client
+    if _shared_client is None:
+        from Crb_currency_api.api_client import ApiClient
+
+        _shared_client = ApiClient()
+    return _shared_client
+
+
+async def close_shared() -> None:
+    """Закрыть общий HTTP-клиент и сбросить общее хранилище курсов."""
+    global _shared_store, _shared_client
+    client, _shared_client, _shared_store = _shared_client, None, None
+    if client is not None:
+        await client.client.aclose()
@@ -0,0 +1,173 @@
+import sys
+from array import array
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Mapping, Tuple
+
+# Общие для процесса индексы наборов кодов валют: таблицы с одинаковым набором
+# валют (например, все дни истории) хранят ссылку на один кортеж и один словарь.
+_INDEXES: Dict[Tuple[str, ...], Tuple[Tuple[str, ...], Dict[str, int]]] = {}
+
+
+def intern_codes(codes: Iterable[str]) -> Tuple[Tuple[str, ...], Dict[str, int]]:
+    """Получить общий кортеж кодов валют и индекс «код → позиция».
+
+    Аргументы:
+        codes (Iterable[str]): Коды валют в порядке хранения.
+
+    Возвращает:
+        Tuple[Tuple[str, ...], Dict[str, int]]: Кортеж кодов и индекс позиций.
+    """
+    key = tuple(codes)
+    interned = _INDEXES.get(key)
+    if interned is None:
+        key = tuple(sys.intern(code) for code in key)
+        interned = _INDEXES[key] = (key, {code: i for i, code in enumerate(key)})
+    return interned
+
+
+def parse_scaled(text: str, scale: int) -> int:
+    """Преобразовать десятичную строку курса в масштабированное целое без Decimal.
+
+    Аргументы:
+        text (str): Курс, например '84,7784' или '84.7784'.
+        scale (int): Число знаков после запятой в масштабе.
+
+    Возвращает:
+        int: Курс, умноженный на 10**scale.
+
+    Исключения:
+        ValueError: Если строка не является числом или требует большей точности.
+    """
+    whole, _, fraction = text.strip().replace(",", ".").partition(".")
+    if not (whole + fraction).isdecimal():
+        raise ValueError(f"Некорректный курс {text!r}")
+    if len(fraction) > scale:
+        if fraction[scale:].strip("0"):
+            raise ValueError(f"Курс {text!r} не представим с точностью 1e-{scale}")
+        fraction = fraction[:scale]
+    return int((whole or "0") + fraction.ljust(scale, "0"))
+
+
+class RateTable(Mapping[str, Decimal]):
+    """Компактная неизменяемая таблица курсов.
+
+    Курсы хранятся как целые, умноженные на 10**scale, в массиве array('q'),
+    а коды валют — в общем для всех таблиц с тем же набором валют индексе.
+    Значения Decimal создаются только при обращении, поэтому таблица занимает
+    в разы меньше памяти, чем словарь Decimal, что важно для многолетней истории.
+
+    Атрибуты:
+        DEFAULT_SCALE (int): Число хранимых знаков после запятой по умолчанию.
+        codes (Tuple[str, ...]): Коды валют в порядке хранения.
+        scale (int): Число хранимых знаков после запятой.
+    """
+
+    __slots__ = ("codes", "_index", "_values", "scale")
+
+    DEFAULT_SCALE = 8
+
+    def __init__(
+        self, codes: Iterable[str], values: Iterable[int], scale: int = DEFAULT_SCALE
+    ):
+        """Инициализировать таблицу из кодов и масштабированных значений.
+
+        Аргументы:
+            codes (Iterable[str]): Коды валют.
+            values (Iterable[int]): Курсы, умноженные на 10**scale, в том же порядке.
+            scale (int): Число хранимых знаков после запятой (по умолчанию: 8).
+
+        Исключения:
+            ValueError: Если число кодов и значений не совпадает.
+        """
+        self.codes, self._index = intern_codes(codes)
+        self._values = array("q", values)
+        self.scale = scale
+        if len(self._values) != len(self.codes):
+            raise ValueError("Число кодов валют и курсов не совпадает")
+
+    @classmethod
+    def from_mapping(
+        cls, rates: Mapping[str, Decimal], scale: int = DEFAULT_SCALE
+    ) -> "RateTable":
+        """Построить таблицу из словаря курсов.
+
+        Аргументы:
+            rates (Mapping[str, Decimal]): Курсы валют.
+            scale (int): Число хранимых знаков после запятой (по умолчанию: 8).
+
+        Возвращает:
+            RateTable: Компактная таблица с теми же курсами.
+
+        Исключения:
+            ValueError: Если курс не представим точно с заданным масштабом.
+        """
+        if isinstance(rates, RateTable) and rates.scale == scale:
+            return rates
+        values = []
+        for code, rate in rates.items():
+            scaled = Decimal(rate).scaleb(scale)
+            if scaled != scaled.to_integral_value():
+                raise ValueError(
+                    f"Курс {code}={rate} не представим с точностью 1e-{scale}"
+                )
+            values.append(int(scaled))
+        return cls(rates.keys(), values, scale)
+
+    @classmethod
+    def from_buffer(
+        cls, codes: Iterable[str], buffer: memoryview, scale: int = DEFAULT_SCALE
+    ) -> "RateTable":
+        """Построить таблицу поверх готового буфера без копирования значений.
+
+        Используется для таблиц, отображённых в память из общего файла
+        (см. SharedSnapshotFile): значения читаются прямо из буфера.
+
+        Аргументы:
+            codes (Iterable[str]): Коды валют.
+            buffer (memoryview): Буфер со значениями int64 в порядке байтов платформы.
+            scale (int): Число хранимых знаков после запятой (по умолчанию: 8).
+
+        Возвращает:
+            RateTable: Таблица, разделяющая память с буфером.
+
+        Исключения:
+            ValueError: Если число кодов и значений не совпадает.
+        """
+        table = cls.__new__(cls)
+        table.codes, table._index = intern_codes(codes)
+        table._values = buffer.cast("B").cast("q")
+        table.scale = scale
+        if len(table._values) != len(table.codes):
+            raise ValueError("Число кодов валют и курсов не совпадает")
+        return table
+
+    def scaled(self, currency_code: str) -> int:
+        """Получить курс как масштабированное целое без создания Decimal.
+
+        Аргументы:
+            currency_code (str): Код валюты.
+
+        Возвращает:
+            int: Курс, умноженный на 10**scale.
+        """
+        return self._values[self._index[currency_code]]
+
+    @property
+    def nbytes(self) -> int:
+        """Размер массива значений в байтах (без общего индекса кодов)."""
+        return self._values.itemsize * len(self._values)
+
+    def __getitem__(self, currency_code: str) -> Decimal:
+        return Decimal(self._values[self._index[currency_code]]).scaleb(-self.scale)
+
+    def __contains__(self, currency_code: object) -> bool:
+        return currency_code in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __repr__(self) -> str:
+        return f"RateTable(currencies={len(self.codes)}, scale={self.scale})"
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, time, timedelta
+from typing import Optional
+
+from Crb_currency_api.cache_manager import MOSCOW_TZ
+from Crb_currency_api.rate_store import RatesFetcher, RateStore
+from Crb_currency_api.snapshot import RateSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class RateRefresher:
+    """Фоновое обновление актуальных курсов по расписанию публикаций ЦБ.
+
+    ЦБ публикует курсы по рабочим дням во второй половине дня по московскому
+    времени. Обновление запускается после времени публикации со случайной
+    задержкой (чтобы процессы не обращались к ЦБ одновременно) и повторяется,
+    пока не будет получен снимок с более поздней датой. Пока новые курсы не
+    загружены, хранилище продолжает отдавать предыдущий снимок: пока
+    обновление запущено, хранилище без собственного max_staleness использует
+    max_staleness обновления, а после stop() возвращается к своим настройкам.
+
+    Атрибуты:
+        PUBLICATION_TIME (time): Время публикации курсов ЦБ по Москве.
+        store (RateStore): Обновляемое хранилище курсов.
+        fetch (Callable): Функция, загружающая и парсящая актуальные курсы.
+        jitter (float): Максимальная случайная задержка обновления в секундах.
+        retry_interval (float): Пауза между повторными попытками в секундах.
+        max_attempts (int): Число попыток получить новую публикацию.
+        max_staleness (Optional[float]): Допустимый возраст устаревшего снимка
+            в секундах, пока обновление запущено.
+    """
+
+    PUBLICATION_TIME = time(15, 30)
+
+    def __init__(
+        self,
+        store: RateStore,
+        fetch: RatesFetcher,
+        jitter: float = 300.0,
+        retry_interval: float = 300.0,
+        max_attempts: int = 12,
+        max_staleness: Optional[float] = None,
+    ):
+        """Инициализировать планировщик обновлений.
+
+        Аргументы:
+            store (RateStore): Обновляемое хранилище курсов.
+            fetch (Callable): Функция, загружающая и парсящая актуальные курсы.
+            jitter (float): Максимальная случайная задержка в секундах (по умолчанию: 300).
+            retry_interval (float): Пауза между попытками в секундах (по умолчанию: 300).
+            max_attempts (int): Число попыток получить новую публикацию (по умолчанию: 12).
+            max_staleness (Optional[float]): Допустимый возраст устаревшего
+                снимка в секундах, пока обновление запущено (по умолчанию:
+                устаревшие снимки не отдаются).
+        """
+        self.store = store
+        self.fetch = fetch
+        self.jitter = jitter
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        self.max_staleness = max_staleness
+        self._task: Optional[asyncio.Task] = None
+
+    def next_refresh_at(self, now: Optional[datetime] = None) -> datetime:
+        """Рассчитать момент следующего обновления без учёта случайной задержки.
+
+        Аргументы:
+            now (Optional[datetime]): Текущий момент (по умолчанию: сейчас).
+
+        Возвращает:
+            datetime: Ближайшее время публикации рабочего дня по Москве.
+        """
+        now = (now or datetime.now(MOSCOW_TZ)).astimezone(MOSCOW_TZ)
+        candidate = datetime.combine(now.date(), self.PUBLICATION_TIME, MOSCOW_TZ)
+        while candidate <= now or candidate.weekday() >= 5:
+            candidate += timedelta(days=1)
+        return candidate
+
+    async def refresh(self) -> Optional[RateSnapshot]:
+        """Загрузить новую публикацию, повторяя попытки, пока дата не сменится.
+
+        Возвращает:
+            Optional[RateSnapshot]: Новый снимок или None, если попытки исчерпаны.
+        """
+        previous = self.store.latest
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                snapshot = await self.store.refresh(self.fetch)
+            except Exception as exc:
+                logger.warning("Попытка %d обновить курсы не удалась: %s", attempt, exc)
+            else:
+                if previous is None or snapshot.date is None or previous.date is None:
+                    return snapshot
+                if snapshot.date > previous.date:
+                    return snapshot
+            if attempt < self.max_attempts:
+                await asyncio.sleep(self.retry_interval)
+        return None
+
+    async def _run(self) -> None:
+        """Цикл обновлений: загрузка при старте, затем по расписанию публикаций."""
+        if self.store.latest is None:
+            await self.refresh()
+        while True:
+            now = datetime.now(MOSCOW_TZ)
+            delay = (self.next_refresh_at(now) - now).total_seconds()
+            await asyncio.sleep(delay + random.uniform(0, self.jitter))
+            await self.refresh()
+
+    @property
+    def running(self) -> bool:
+        """Работает ли фоновое обновление."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Запустить фоновое обновление в текущем цикле событий.
+
+        Запущенный планировщик регистрируется в хранилище (store.refresher),
+        чтобы подписки на курсы не запускали второе обновление.
+        """
+        if not self.running:
+            self._task = asyncio.ensure_future(self._run())
+        self.store.refresher = self
+
+    async def stop(self) -> None:
+        """Остановить фоновое обновление."""
+        task, self._task = self._task, None
+        if self.store.refresher is self:
+            self.store.refresher = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def __aenter__(self):
+        """Запустить обновление при входе в асинхронный контекстный менеджер.
+
+        Возвращает:
+            RateRefresher: Экземпляр планировщика.
+        """
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Остановить обновление при выходе из асинхронного контекстного менеджера.
+
+        Аргументы:
+            exc_type: Тип исключения (если есть).
+            exc_val: Значение исключения (если есть).
+            exc_tb: Трассировка исключения (если есть).
+        """
+        await self.stop()
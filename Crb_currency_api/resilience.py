@@ -0,0 +1,179 @@
+"""Политика повторов и предохранитель запросов к ЦБ."""
+
+import time
+from typing import Collection, Optional
+
+import httpx
+from tenacity import RetryCallState, wait_random_exponential
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Запрос не выполнен: предохранитель разомкнут, источник считается недоступным."""
+
+
+class RetryPolicy:
+    """Настройки повторов, общего срока и дублирования медленных запросов.
+
+    Пауза перед повтором выбирается случайно от 0 до min(max_backoff,
+    backoff * 2**попытка) (экспоненциальная задержка с полным джиттером),
+    поэтому клиенты, получившие ошибку одновременно, не повторяют запрос
+    одновременно. Повторы прекращаются по числу попыток или по общему сроку
+    deadline; таймаут каждой попытки сокращается до оставшегося срока.
+
+    Атрибуты:
+        attempts (int): Максимальное число попыток.
+        backoff (float): Базовая пауза перед повтором в секундах.
+        max_backoff (float): Наибольшая пауза перед повтором в секундах.
+        deadline (Optional[float]): Общий срок вызова со всеми повторами в
+            секундах (None — без ограничения).
+        retry_statuses (Collection[int]): Коды ответа, при которых запрос
+            повторяется.
+        retry_transport_errors (bool): Повторять запрос при таймаутах и ошибках
+            соединения.
+        hedge_after (Optional[float]): Через сколько секунд без ответа отправить
+            дублирующий запрос (None — не дублировать).
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        deadline: Optional[float] = 20.0,
+        retry_statuses: Collection[int] = (429, 500, 502, 503, 504),
+        retry_transport_errors: bool = True,
+        hedge_after: Optional[float] = None,
+    ):
+        """Инициализировать политику.
+
+        Аргументы:
+            attempts (int): Максимальное число попыток (по умолчанию: 3).
+            backoff (float): Базовая пауза перед повтором, с (по умолчанию: 0.5).
+            max_backoff (float): Наибольшая пауза перед повтором, с (по умолчанию: 8).
+            deadline (Optional[float]): Общий срок вызова, с (по умолчанию: 20).
+            retry_statuses (Collection[int]): Коды ответа для повтора
+                (по умолчанию: 429 и 5xx шлюза/сервера).
+            retry_transport_errors (bool): Повторять при ошибках транспорта
+                (по умолчанию: True).
+            hedge_after (Optional[float]): Задержка дублирующего запроса, с
+                (по умолчанию: не дублировать).
+        """
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_transport_errors = retry_transport_errors
+        self.hedge_after = hedge_after
+        self._wait = wait_random_exponential(multiplier=backoff, max=max_backoff)
+
+    def is_transient(self, exc: BaseException) -> bool:
+        """Определить, вызвана ли ошибка временной недоступностью источника.
+
+        Аргументы:
+            exc (BaseException): Исключение попытки запроса.
+
+        Возвращает:
+            bool: True, если запрос имеет смысл повторить.
+        """
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code in self.retry_statuses
+        return self.retry_transport_errors and isinstance(exc, httpx.TransportError)
+
+    def wait(self, state: RetryCallState) -> float:
+        """Вычислить паузу перед повтором, не выходящую за общий срок.
+
+        Аргументы:
+            state (RetryCallState): Состояние повторов tenacity.
+
+        Возвращает:
+            float: Пауза в секундах.
+        """
+        pause = self._wait(state)
+        if self.deadline is not None:
+            pause = min(pause, max(self.deadline - state.seconds_since_start, 0.0))
+        return pause
+
+
+class CircuitBreaker:
+    """Предохранитель: перестаёт обращаться к недоступному источнику.
+
+    После failure_threshold неудачных вызовов подряд предохранитель
+    размыкается, и вызовы сразу завершаются CircuitOpenError, не нагружая
+    источник и не заставляя клиентов ждать таймаутов. Через reset_timeout
+    секунд пропускается один пробный вызов: успех замыкает предохранитель,
+    ошибка снова размыкает его.
+
+    Атрибуты:
+        CLOSED (str): Состояние «замкнут»: вызовы выполняются.
+        OPEN (str): Состояние «разомкнут»: вызовы отклоняются.
+        HALF_OPEN (str): Состояние «пробный вызов».
+        failure_threshold (int): Число неудач подряд до размыкания.
+        reset_timeout (float): Пауза до пробного вызова в секундах.
+        state (str): Текущее состояние.
+        failures (int): Число неудач подряд.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Инициализировать замкнутый предохранитель.
+
+        Аргументы:
+            failure_threshold (int): Число неудач подряд до размыкания
+                (по умолчанию: 5).
+            reset_timeout (float): Пауза до пробного вызова, с (по умолчанию: 30).
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        """Проверить, можно ли выполнить вызов, и занять пробный вызов.
+
+        Возвращает:
+            bool: True, если вызов разрешён.
+        """
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            return True
+        return False  # Пробный вызов уже выполняется
+
+    def record_success(self) -> Optional[str]:
+        """Учесть успешный вызов.
+
+        Возвращает:
+            Optional[str]: Новое состояние, если оно изменилось.
+        """
+        self.failures = 0
+        if self.state == self.CLOSED:
+            return None
+        self.state = self.CLOSED
+        return self.state
+
+    def record_failure(self) -> Optional[str]:
+        """Учесть вызов, неудачный из-за недоступности источника.
+
+        Возвращает:
+            Optional[str]: Новое состояние, если оно изменилось.
+        """
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            if self.state != self.OPEN:
+                self.state = self.OPEN
+                return self.state
+        return None
+
+    def release(self) -> None:
+        """Вернуть пробный вызов, завершившийся без ответа источника (отмена)."""
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
@@ -0,0 +1,186 @@
+import mmap
+import os
+import struct
+import time
+from array import array
+from datetime import date
+from typing import Optional, Tuple
+
+from Crb_currency_api.rate_table import RateTable
+from Crb_currency_api.snapshot import RateSnapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows: без блокировки каждый процесс загружает курсы сам
+    fcntl = None  # type: ignore[assignment]
+
+
+class SharedSnapshotFile:
+    """Снимок курсов относительно RUB, общий для процессов хоста через mmap.
+
+    Предназначен для pre-fork серверов (gunicorn, uvicorn): один процесс
+    загружает и парсит курсы и публикует их в файл, остальные отображают файл
+    в память и читают курсы без копирования, без блокировок и без обмена
+    сообщениями.
+
+    Публикация пишет новый файл рядом и атомарно подменяет им основной
+    (os.replace), затем увеличивает счётчик версий в отдельном маленьком файле,
+    отображённом в память всеми процессами. Проверка новой версии — чтение
+    восьми байт из памяти. Ранее отображённые снимки остаются корректными:
+    старый файл не изменяется и живёт, пока на него есть отображения.
+
+    Для загрузки курсов процессы берут блокировку файла (fcntl.flock), поэтому
+    при истечении кэша запрос к ЦБ выполняет один процесс, а остальные ждут
+    новую версию.
+
+    Формат файла: заголовок HEADER, затем коды валют (по CODE_SIZE байт в ASCII)
+    и курсы в виде int64, умноженных на 10**scale, как в RateTable.
+
+    Атрибуты:
+        MAGIC (bytes): Сигнатура файла снимка.
+        HEADER (struct.Struct): Сигнатура, версия, дата публикации (порядковый
+            номер дня, 0 — неизвестна), число валют, срок годности (Unix time)
+            и масштаб курсов.
+        CODE_SIZE (int): Размер поля кода валюты в байтах.
+        path (str): Путь к файлу снимка.
+    """
+
+    MAGIC = b"CRBS"
+    HEADER = struct.Struct("=4sQIIdI4x")
+    CODE_SIZE = 8
+
+    def __init__(self, path: str):
+        """Открыть (или создать) счётчик версий снимка.
+
+        Аргументы:
+            path (str): Путь к файлу снимка; рядом создаются файлы
+                '<path>.version' и '<path>.lock'. Для хранения в памяти без
+                записи на диск подойдёт каталог /dev/shm.
+        """
+        self.path = path
+        fd = os.open(f"{path}.version", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < 8:
+                os.ftruncate(fd, 8)
+            self._version_map = mmap.mmap(fd, 8)
+        finally:
+            os.close(fd)
+        self._lock_fd: Optional[int] = None
+        self._version = -1
+        self._snapshot: Optional[RateSnapshot] = None
+        self._expires_at = 0.0
+
+    @property
+    def version(self) -> int:
+        """Номер последней опубликованной версии (0 — снимок ещё не публиковался)."""
+        return struct.unpack_from("=Q", self._version_map)[0]
+
+    def current(self, allow_expired: bool = False) -> Optional[RateSnapshot]:
+        """Получить последний опубликованный снимок.
+
+        Пока версия не изменилась, возвращается тот же объект снимка.
+
+        Аргументы:
+            allow_expired (bool): Возвращать снимок и после истечения срока
+                годности (по умолчанию: False).
+
+        Возвращает:
+            Optional[RateSnapshot]: Снимок курсов относительно RUB или None.
+        """
+        version = self.version
+        if version != self._version:
+            self._snapshot, self._expires_at = self._map() if version else (None, 0.0)
+            self._version = version
+        if self._snapshot is None:
+            return None
+        if not allow_expired and time.time() >= self._expires_at:
+            return None
+        return self._snapshot
+
+    def _map(self) -> Tuple[Optional[RateSnapshot], float]:
+        """Отобразить текущий файл снимка в память.
+
+        Возвращает:
+            Tuple[Optional[RateSnapshot], float]: Снимок (None, если файла нет или
+                он повреждён) и срок его годности.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None, 0.0
+        magic, _, ordinal, count, expires_at, scale = self.HEADER.unpack_from(mapped)
+        if magic != self.MAGIC:
+            return None, 0.0
+        view = memoryview(mapped)
+        codes_end = self.HEADER.size + count * self.CODE_SIZE
+        codes = [
+            bytes(view[offset : offset + self.CODE_SIZE]).rstrip(b"\0").decode()
+            for offset in range(self.HEADER.size, codes_end, self.CODE_SIZE)
+        ]
+        table = RateTable.from_buffer(
+            codes, view[codes_end : codes_end + count * 8], scale
+        )
+        on = date.fromordinal(ordinal) if ordinal else None
+        return RateSnapshot(table, date=on), expires_at
+
+    def publish(self, snapshot: RateSnapshot, ttl: float) -> int:
+        """Опубликовать снимок для всех процессов.
+
+        Аргументы:
+            snapshot (RateSnapshot): Снимок курсов относительно RUB.
+            ttl (float): Срок годности снимка в секундах.
+
+        Возвращает:
+            int: Номер опубликованной версии.
+
+        Исключения:
+            ValueError: Если курс не представим в RateTable или код валюты длиннее
+                CODE_SIZE байт.
+        """
+        table = RateTable.from_mapping(snapshot)
+        if any(len(code.encode("ascii")) > self.CODE_SIZE for code in table.codes):
+            raise ValueError(f"Код валюты длиннее {self.CODE_SIZE} байт")
+        version = self.version + 1
+        header = self.HEADER.pack(
+            self.MAGIC,
+            version,
+            snapshot.date.toordinal() if snapshot.date else 0,
+            len(table),
+            time.time() + ttl,
+            table.scale,
+        )
+        codes = b"".join(
+            code.encode("ascii").ljust(self.CODE_SIZE, b"\0") for code in table.codes
+        )
+        values = array("q", (table.scaled(code) for code in table.codes))
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(header + codes + values.tobytes())
+        os.replace(tmp_path, self.path)
+        struct.pack_into("=Q", self._version_map, 0, version)
+        return version
+
+    def acquire(self) -> bool:
+        """Попытаться стать процессом, загружающим курсы, не блокируясь.
+
+        Возвращает:
+            bool: True, если блокировка получена (или недоступна на платформе).
+        """
+        if fcntl is None:
+            return True
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def release(self) -> None:
+        """Снять блокировку загрузки, полученную acquire()."""
+        fd, self._lock_fd = self._lock_fd, None
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
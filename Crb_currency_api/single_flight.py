@@ -0,0 +1,67 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Реестр выполняющихся загрузок для объединения одновременных запросов.
+
+    Если по ключу уже идёт загрузка, новые вызовы не запускают свою, а ждут
+    результат общей. Ошибка загрузки передаётся всем ожидающим и не
+    сохраняется: следующий вызов после неё запустит загрузку заново.
+
+    Атрибуты:
+        coalesced (int): Количество вызовов, присоединившихся к чужой загрузке.
+    """
+
+    def __init__(self):
+        """Инициализировать пустой реестр загрузок."""
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполнить загрузку по ключу или присоединиться к уже идущей.
+
+        Загрузка выполняется в отдельной задаче, поэтому отмена одного из
+        ожидающих не прерывает её для остальных.
+
+        Аргументы:
+            key (Hashable): Ключ загрузки.
+            func (Callable[[], Awaitable[Any]]): Функция, выполняющая загрузку.
+
+        Возвращает:
+            Any: Результат загрузки.
+
+        Исключения:
+            Exception: Любое исключение, возникшее при загрузке.
+        """
+        task = self._calls.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Удалить завершённую загрузку из реестра.
+
+        Аргументы:
+            key (Hashable): Ключ загрузки.
+            task (asyncio.Task): Завершённая задача.
+        """
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Помечаем ошибку как полученную, если все ушли
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Проверить, выполняется ли сейчас загрузка по ключу.
+
+        Аргументы:
+            key (Hashable): Ключ для проверки.
+
+        Возвращает:
+            bool: True, если загрузка выполняется, иначе False.
+        """
+        return key in self._calls
@@ -0,0 +1,209 @@
+from datetime import date as Date
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterator, Mapping, Optional, Tuple
+
+from Crb_currency_api.rate_table import RateTable
+
+if TYPE_CHECKING:
+    from Crb_currency_api.cross_rates import CrossRateMatrix
+
+# Точность результатов: 5 знаков после запятой
+RATE_QUANTUM = Decimal("0.00001")
+
+
+class Provenance:
+    """Происхождение снимка: источник курсов и обстоятельства загрузки.
+
+    Атрибуты:
+        provider (str): Имя источника (например, 'cbr' или 'cbr-json').
+        url (str): URL, с которого получен снимок.
+        fetched_at (datetime): Момент получения (UTC).
+        elapsed (float): Длительность запроса и разбора в секундах.
+        failed (Tuple[str, ...]): Источники, опрошенные раньше и не давшие
+            корректного снимка.
+    """
+
+    __slots__ = ("provider", "url", "fetched_at", "elapsed", "failed")
+
+    def __init__(
+        self,
+        provider: str,
+        url: str,
+        fetched_at: datetime,
+        elapsed: float,
+        failed: Tuple[str, ...] = (),
+    ):
+        self.provider = provider
+        self.url = url
+        self.fetched_at = fetched_at
+        self.elapsed = elapsed
+        self.failed = failed
+
+    def __repr__(self) -> str:
+        return (
+            f"Provenance(provider={self.provider!r}, url={self.url!r}, "
+            f"elapsed={self.elapsed:.3f}, failed={self.failed!r})"
+        )
+
+
+class RateSnapshot(Mapping[str, Decimal]):
+    """Неизменяемый снимок одной публикации курсов относительно базовой валюты.
+
+    Снимок ведёт себя как словарь «код валюты → курс» и может использоваться
+    как ключ словаря. Методы rate() и convert() синхронные, поэтому пакет
+    конвертаций выполняется по одному согласованному набору курсов без
+    обращений к кэшу и await на каждую операцию.
+
+    Атрибуты:
+        date (Optional[date]): Дата публикации курсов (None, если неизвестна).
+        base (str): Код базовой валюты.
+        provenance (Optional[Provenance]): Источник, из которого получен снимок
+            (None, если неизвестен); не участвует в сравнении снимков.
+    """
+
+    __slots__ = ("date", "base", "provenance", "_rates", "_matrix", "_hash")
+
+    date: Optional[Date]
+    base: str
+    provenance: Optional[Provenance]
+
+    def __init__(
+        self,
+        rates: Mapping[str, Decimal],
+        base: str = "RUB",
+        date: Optional[Date] = None,
+        matrix: Optional["CrossRateMatrix"] = None,
+        provenance: Optional[Provenance] = None,
+    ):
+        """Инициализировать снимок курсов.
+
+        Аргументы:
+            rates (Mapping[str, Decimal]): Курсы валют относительно базовой валюты;
+                RateTable хранится как есть, остальные словари копируются.
+            base (str): Код базовой валюты (по умолчанию: 'RUB').
+            date (Optional[date]): Дата публикации курсов.
+            matrix (Optional[CrossRateMatrix]): Кросс-курсы исходного снимка для
+                точной конвертации; если не задана, строится по rates.
+            provenance (Optional[Provenance]): Источник снимка.
+        """
+        set_attr = object.__setattr__
+        set_attr(self, "date", date)
+        set_attr(self, "base", base)
+        set_attr(self, "provenance", provenance)
+        if not isinstance(rates, RateTable):
+            rates = MappingProxyType(dict(rates))
+        set_attr(self, "_rates", rates)
+        set_attr(self, "_matrix", matrix)
+        set_attr(self, "_hash", None)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("RateSnapshot неизменяем")
+
+    def __getitem__(self, currency_code: str) -> Decimal:
+        return self._rates[currency_code]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rates)
+
+    def __len__(self) -> int:
+        return len(self._rates)
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(
+                self,
+                "_hash",
+                hash((self.date, self.base, frozenset(self._rates.items()))),
+            )
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, RateSnapshot):
+            return (self.date, self.base, self._rates) == (
+                other.date,
+                other.base,
+                other._rates,
+            )
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return (
+            f"RateSnapshot(date={self.date!r}, base={self.base!r}, "
+            f"currencies={len(self._rates)})"
+        )
+
+    @property
+    def is_compact(self) -> bool:
+        """True, если курсы хранятся в компактной RateTable."""
+        return isinstance(self._rates, RateTable)
+
+    def compact(self, scale: int = RateTable.DEFAULT_SCALE) -> "RateSnapshot":
+        """Получить копию снимка, хранящую курсы в компактной RateTable.
+
+        Аргументы:
+            scale (int): Число хранимых знаков после запятой (по умолчанию: 8).
+
+        Возвращает:
+            RateSnapshot: Компактный снимок с теми же датой, базой и курсами.
+
+        Исключения:
+            ValueError: Если курс не представим точно с заданным масштабом.
+        """
+        if self.is_compact and self._rates.scale == scale:
+            return self
+        return RateSnapshot(
+            RateTable.from_mapping(self._rates, scale),
+            base=self.base,
+            date=self.date,
+            provenance=self.provenance,
+        )
+
+    def rate(self, currency_code: str) -> Decimal:
+        """Получить курс валюты относительно базовой валюты снимка.
+
+        Аргументы:
+            currency_code (str): Код валюты (например, 'USD', 'EUR').
+
+        Возвращает:
+            Decimal: Курс валюты.
+
+        Исключения:
+            ValueError: Если валюта не найдена в снимке.
+        """
+        try:
+            return self._rates[currency_code]
+        except KeyError:
+            raise ValueError(f"Валюта {currency_code} не найдена") from None
+
+    def convert(self, from_currency: str, to_currency: str, amount: Decimal) -> Decimal:
+        """Конвертировать сумму из одной валюты в другую по курсам снимка.
+
+        Аргументы:
+            from_currency (str): Код валюты, из которой конвертируем (например, 'USD').
+            to_currency (str): Код валюты, в которую конвертируем (например, 'EUR').
+            amount (Decimal): Сумма для конвертации.
+
+        Возвращает:
+            Decimal: Сконвертированная сумма с точностью до 5 знаков после запятой.
+
+        Исключения:
+            ValueError: Если одна из валют не найдена в снимке или сумма
+                бесконечна, не число либо слишком велика для точности 5 знаков.
+        """
+        if not Decimal(amount).is_finite():
+            raise ValueError(f"Некорректная сумма {amount}")
+        matrix = self._matrix
+        if matrix is None:
+            from Crb_currency_api.cross_rates import CrossRateMatrix
+
+            matrix = CrossRateMatrix(self._rates)
+            object.__setattr__(self, "_matrix", matrix)
+        rate = matrix.pair(from_currency, to_currency)
+        if from_currency == to_currency:
+            return amount
+        try:
+            return (rate * amount).quantize(RATE_QUANTUM)
+        except InvalidOperation:
+            raise ValueError(f"Сумма {amount} слишком велика") from None
@@ -0,0 +1,386 @@
+import asyncio
+import concurrent.futures
+import threading
+from datetime import date
+from decimal import Decimal
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.history_index import Moment
+from Crb_currency_api.metrics import Observer
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.refresher import RateRefresher
+from Crb_currency_api.snapshot import RateSnapshot
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from Crb_currency_api.api_client import ApiClient
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """Цикл событий в отдельном фоновом потоке.
+
+    Позволяет синхронному коду из любых потоков выполнять корутины в одном
+    общем цикле, а значит использовать один пул соединений httpx и общие
+    загрузки курсов.
+
+    Атрибуты:
+        loop (asyncio.AbstractEventLoop): Цикл событий фонового потока.
+        thread (threading.Thread): Поток, в котором работает цикл.
+    """
+
+    def __init__(self, name: str = "crb-currency-api"):
+        """Создать цикл событий и запустить его в потоке-демоне.
+
+        Аргументы:
+            name (str): Имя потока (по умолчанию: 'crb-currency-api').
+        """
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name=name, daemon=True
+        )
+        self.thread.start()
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Выполнить корутину в фоновом цикле и дождаться результата.
+
+        Аргументы:
+            coro (Coroutine): Корутина для выполнения.
+            timeout (Optional[float]): Максимальное время ожидания в секундах
+                (по умолчанию: без ограничения).
+
+        Возвращает:
+            T: Результат корутины.
+
+        Исключения:
+            RuntimeError: Если вызвано из потока самого фонового цикла.
+            TimeoutError: Если результат не получен за timeout секунд.
+        """
+        if threading.current_thread() is self.thread:
+            coro.close()
+            raise RuntimeError("Нельзя ждать фоновый цикл из его же потока")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Нет ответа за {timeout} с") from None
+
+    def close(self) -> None:
+        """Остановить цикл событий и дождаться завершения потока."""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class _SyncRuntime:
+    """Общие для синхронных клиентов фоновый цикл, хранилище и HTTP-клиент.
+
+    HTTP-клиент создаётся при первом запросе к ЦБ.
+    """
+
+    def __init__(self):
+        self.background = BackgroundLoop()
+        self.store = RateStore()
+        self._client: Optional["ApiClient"] = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> "ApiClient":
+        client = self._client
+        if client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from Crb_currency_api.api_client import ApiClient
+
+                    self._client = ApiClient()
+                client = self._client
+        return client
+
+    def close(self) -> None:
+        if self._client is not None:
+            self.background.run(self._client.client.aclose())
+        self.background.close()
+
+
+_runtime: Optional[_SyncRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def _get_runtime() -> _SyncRuntime:
+    """Вернуть общую среду синхронных клиентов, создав её при первом вызове.
+
+    Возвращает:
+        _SyncRuntime: Общая среда выполнения.
+    """
+    global _runtime
+    runtime = _runtime
+    if runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = _SyncRuntime()
+            runtime = _runtime
+    return runtime
+
+
+def close_sync() -> None:
+    """Закрыть общий HTTP-клиент синхронных клиентов и остановить фоновый цикл."""
+    global _runtime
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None:
+        runtime.close()
+
+
+class SyncCrbCurrencyApi:
+    """Потокобезопасный синхронный клиент курсов ЦБ для WSGI и потоковых серверов.
+
+    Все экземпляры во всех потоках используют один фоновый цикл событий, одно
+    хранилище курсов и один пул соединений. Пока актуальный снимок в кэше,
+    курсы читаются прямо в вызывающем потоке без блокировок и без обращения к
+    циклу событий; загрузка выполняется в фоновом цикле, и одновременные
+    промахи из разных потоков ожидают один запрос к ЦБ.
+
+    Атрибуты:
+        base_currency (str): Настроенная базовая валюта.
+        timeout (Optional[float]): Максимальное время ожидания загрузки, с.
+        api (CrbRequestCurrencyApi): Асинхронный клиент, выполняющий загрузки.
+        store (RateStore): Хранилище курсов относительно RUB.
+    """
+
+    def __init__(
+        self,
+        base_currency: str = CrbRequestCurrencyApi.DEFAULT_BASE_CURRENCY,
+        store: Optional[RateStore] = None,
+        client: Optional["ApiClient"] = None,
+        observer: Optional[Observer] = None,
+        timeout: Optional[float] = None,
+    ):
+        """Инициализировать синхронный клиент.
+
+        Аргументы:
+            base_currency (str): Код базовой валюты (по умолчанию: 'RUB').
+            store (Optional[RateStore]): Хранилище курсов (по умолчанию: общее
+                для синхронных клиентов).
+            client (Optional[ApiClient]): HTTP-клиент (по умолчанию: общий для
+                синхронных клиентов); используется только в фоновом цикле.
+            observer (Optional[Observer]): Получатель метрик парсера.
+            timeout (Optional[float]): Максимальное время ожидания загрузки в
+                секундах (по умолчанию: без ограничения).
+        """
+        self._runtime = _get_runtime()
+        self.api = CrbRequestCurrencyApi(
+            base_currency,
+            store=store or self._runtime.store,
+            client=client,
+            observer=observer,
+        )
+        if client is None:
+            self.api._client_factory = lambda: self._runtime.client
+        self.base_currency = self.api.base_currency
+        self.store = self.api.store
+        self.timeout = timeout
+
+    def _run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Выполнить корутину в общем фоновом цикле.
+
+        Аргументы:
+            coro (Coroutine): Корутина для выполнения.
+
+        Возвращает:
+            T: Результат корутины.
+        """
+        return self._runtime.background.run(coro, self.timeout)
+
+    def snapshot(
+        self, on: Optional[date] = None, at: Optional[Moment] = None
+    ) -> RateSnapshot:
+        """Получить неизменяемый снимок курсов относительно базовой валюты.
+
+        Аргументы:
+            on (Optional[date]): Дата, на которую нужны курсы (по умолчанию: актуальные).
+            at (Optional[Moment]): Момент времени, курсы на который нужны
+                (по умолчанию: не используется).
+
+        Возвращает:
+            RateSnapshot: Снимок курсов с датой публикации.
+
+        Исключения:
+            ValueError: Если базовая валюта не найдена в данных ЦБ или заданы
+                одновременно on и at.
+        """
+        if at is not None:
+            matrix = None if on is not None else self.store.index.lookup(at)
+        elif on is None:
+            matrix = self.store.current_matrix()
+        else:
+            matrix = self.store.history.peek(on)
+        if matrix is not None:
+            return matrix.rates_for(self.base_currency)
+        return self._run(self.api.snapshot(on, at))
+
+    def snapshots_at(self, moments: Iterable[Moment]) -> List[RateSnapshot]:
+        """Получить снимки курсов на моменты времени (см. CrbRequestCurrencyApi).
+
+        Аргументы:
+            moments (Iterable[Moment]): Моменты времени, лучше по возрастанию.
+
+        Возвращает:
+            List[RateSnapshot]: Снимки курсов относительно базовой валюты.
+        """
+        moments = list(moments)
+        matrices = self.store.index.lookup_many(moments)
+        if all(matrix is not None for matrix in matrices):
+            return [matrix.rates_for(self.base_currency) for matrix in matrices]
+        return self._run(self.api.snapshots_at(moments))
+
+    def get_currency_rate(
+        self,
+        currency_code: str,
+        on: Optional[date] = None,
+        at: Optional[Moment] = None,
+    ) -> Decimal:
+        """Получить курс указанной валюты относительно базовой валюты.
+
+        Аргументы:
+            currency_code (str): Код валюты (например, 'USD', 'EUR').
+            on (Optional[date]): Дата, на которую нужен курс (по умолчанию: актуальный).
+            at (Optional[Moment]): Момент времени, в который действовал курс
+                (по умолчанию: не используется).
+
+        Возвращает:
+            Decimal: Курс валюты с точностью до 5 знаков после запятой.
+
+        Исключения:
+            ValueError: Если валюта не найдена в данных ЦБ.
+        """
+        return self.snapshot(on, at).rate(currency_code)
+
+    def exchange(
+        self,
+        from_currency: str,
+        to_currency: str,
+        amount: Decimal,
+        on: Optional[date] = None,
+        at: Optional[Moment] = None,
+    ) -> Decimal:
+        """Конвертировать сумму из одной валюты в другую.
+
+        Аргументы:
+            from_currency (str): Код исходной валюты.
+            to_currency (str): Код целевой валюты.
+            amount (Decimal): Сумма для конвертации.
+            on (Optional[date]): Дата, на которую нужен курс (по умолчанию: актуальный).
+            at (Optional[Moment]): Момент времени, в который действовал курс
+                (по умолчанию: не используется).
+
+        Возвращает:
+            Decimal: Сконвертированная сумма с точностью до 5 знаков после запятой.
+
+        Исключения:
+            ValueError: Если одна из валют не найдена в данных ЦБ.
+        """
+        return self.snapshot(on, at).convert(from_currency, to_currency, amount)
+
+    def exchange_array(
+        self,
+        amounts: Any,
+        from_currency: Any,
+        to_currency: Any,
+        on: Optional[date] = None,
+        dates: Any = None,
+        exact: bool = False,
+    ) -> "np.ndarray":
+        """Конвертировать столбец сумм целиком (см. CrbRequestCurrencyApi).
+
+        Аргументы:
+            amounts: Суммы (массив NumPy или последовательность).
+            from_currency: Код исходной валюты или массив кодов по строкам.
+            to_currency: Код целевой валюты или массив кодов по строкам.
+            on (Optional[date]): Дата курсов для всех строк (по умолчанию: актуальные).
+            dates: Дата курсов для каждой строки (по умолчанию: не используется).
+            exact (bool): Точный режим Decimal (по умолчанию: float64).
+
+        Возвращает:
+            np.ndarray: Суммы в целевых валютах.
+
+        Исключения:
+            ValueError: Если одна из валют не найдена в данных ЦБ.
+        """
+        if dates is None:
+            matrix = self.store.current_matrix() if on is None else None
+            if matrix is not None:
+                from Crb_currency_api.vectorized import convert_array
+
+                return convert_array(matrix, amounts, from_currency, to_currency, exact)
+        return self._run(
+            self.api.exchange_array(
+                amounts, from_currency, to_currency, on=on, dates=dates, exact=exact
+            )
+        )
+
+    def load_range(
+        self, start: date, end: date, concurrency: Optional[int] = None
+    ) -> Dict[date, RateSnapshot]:
+        """Загрузить курсы на каждый день диапазона (см. CrbRequestCurrencyApi).
+
+        Аргументы:
+            start (date): Первый день диапазона.
+            end (date): Последний день диапазона (включительно).
+            concurrency (Optional[int]): Максимальное число одновременных запросов.
+
+        Возвращает:
+            Dict[date, RateSnapshot]: Снимки курсов относительно RUB по датам.
+        """
+        return self._run(self.api.load_range(start, end, concurrency))
+
+    def get_rate_series(
+        self, currency_code: str, start: date, end: date
+    ) -> Dict[date, Decimal]:
+        """Получить курс валюты на каждый день диапазона (см. CrbRequestCurrencyApi).
+
+        Аргументы:
+            currency_code (str): Код валюты (например, 'USD', 'EUR').
+            start (date): Первый день диапазона.
+            end (date): Последний день диапазона (включительно).
+
+        Возвращает:
+            Dict[date, Decimal]: Курсы относительно базовой валюты по дням.
+        """
+        return self._run(self.api.get_rate_series(currency_code, start, end))
+
+    def start_refresher(self, **kwargs) -> RateRefresher:
+        """Запустить фоновое обновление курсов в общем цикле событий.
+
+        Аргументы:
+            **kwargs: Параметры CrbRequestCurrencyApi.refresher().
+
+        Возвращает:
+            RateRefresher: Запущенный планировщик; останавливается через
+                stop_refresher().
+        """
+        refresher = self.api.refresher(**kwargs)
+        self._runtime.background.loop.call_soon_threadsafe(refresher.start)
+        return refresher
+
+    def stop_refresher(self, refresher: RateRefresher) -> None:
+        """Остановить фоновое обновление, запущенное start_refresher().
+
+        Аргументы:
+            refresher (RateRefresher): Запущенный планировщик.
+        """
+        self._run(refresher.stop())
@@ -0,0 +1,372 @@
+"""Локальная замена сервера ЦБ для тестов и бенчмарков."""
+
+import asyncio
+import gzip
+import hashlib
+import random
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Mapping, Optional
+
+import httpx
+
+
+def make_valute_id(currency_code: str) -> str:
+    """Сформировать внутренний код ЦБ для валюты имитации (например, 'R085083068').
+
+    Аргументы:
+        currency_code (str): Код валюты.
+
+    Возвращает:
+        str: Уникальный для кода валюты идентификатор.
+    """
+    return "R" + "".join(f"{ord(char):03d}" for char in currency_code)
+
+
+def make_daily_xml(rates: Mapping[str, Decimal], on: date) -> bytes:
+    """Сформировать ответ XML_daily.asp в кодировке windows-1251.
+
+    Аргументы:
+        rates (Mapping[str, Decimal]): Курсы валют относительно RUB.
+        on (date): Дата публикации.
+
+    Возвращает:
+        bytes: Тело ответа.
+    """
+    parts = [
+        '<?xml version="1.0" encoding="windows-1251"?>',
+        f'<ValCurs Date="{on:%d.%m.%Y}" name="Foreign Currency Market">',
+    ]
+    for num, (code, rate) in enumerate(rates.items()):
+        if code == "RUB":
+            continue
+        value = str(rate).replace(".", ",")
+        parts.append(
+            f'<Valute ID="{make_valute_id(code)}"><NumCode>{num:03d}</NumCode>'
+            f"<CharCode>{code}</CharCode><Nominal>1</Nominal>"
+            f"<Name>Валюта {code}</Name><Value>{value}</Value>"
+            f"<VunitRate>{value}</VunitRate></Valute>"
+        )
+    parts.append("</ValCurs>")
+    return "".join(parts).encode("windows-1251")
+
+
+def make_daily_json(rates: Mapping[str, Decimal], on: date) -> bytes:
+    """Сформировать ответ JSON-зеркала курсов ЦБ (формат daily_json.js).
+
+    Аргументы:
+        rates (Mapping[str, Decimal]): Курсы валют относительно RUB.
+        on (date): Дата публикации.
+
+    Возвращает:
+        bytes: Тело ответа.
+    """
+    valutes = ",".join(
+        f'"{code}":{{"ID":"{make_valute_id(code)}","CharCode":"{code}",'
+        f'"Nominal":1,"Name":"Валюта {code}","Value":{rate}}}'
+        for code, rate in rates.items()
+        if code != "RUB"
+    )
+    return (
+        f'{{"Date":"{on.isoformat()}T11:30:00+03:00","Valute":{{{valutes}}}}}'
+    ).encode()
+
+
+def make_ecb_xml(rates: Mapping[str, Decimal], on: date) -> bytes:
+    """Сформировать фид в формате ЕЦБ (eurofxref-daily.xml) с курсом RUB.
+
+    Аргументы:
+        rates (Mapping[str, Decimal]): Курсы валют относительно RUB; должны
+            содержать EUR.
+        on (date): Дата публикации.
+
+    Возвращает:
+        bytes: Тело ответа.
+    """
+    euro = rates["EUR"]
+    cubes = "".join(
+        f'<Cube currency="{code}" rate="{euro / rate}"/>'
+        for code, rate in rates.items()
+        if code != "EUR"
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<gesmes:Envelope xmlns:gesmes="http://www.gesmes.org/xml/2002-08-01" '
+        'xmlns="http://www.ecb.int/vocabulary/2002-08-01/eurofxref">'
+        f'<Cube><Cube time="{on.isoformat()}">{cubes}</Cube></Cube>'
+        "</gesmes:Envelope>"
+    ).encode()
+
+
+def make_dynamic_xml(
+    rates: Mapping[date, Decimal], valute_id: str, start: date, end: date
+) -> bytes:
+    """Сформировать ответ XML_dynamic.asp в кодировке windows-1251.
+
+    Аргументы:
+        rates (Mapping[date, Decimal]): Курсы валюты относительно RUB по датам.
+        valute_id (str): Внутренний код валюты ЦБ.
+        start (date): Начало запрошенного диапазона.
+        end (date): Конец запрошенного диапазона.
+
+    Возвращает:
+        bytes: Тело ответа.
+    """
+    parts = [
+        '<?xml version="1.0" encoding="windows-1251"?>',
+        f'<ValCurs ID="{valute_id}" DateRange1="{start:%d.%m.%Y}" '
+        f'DateRange2="{end:%d.%m.%Y}" name="Foreign Currency Market Dynamic">',
+    ]
+    for on, rate in sorted(rates.items()):
+        value = str(rate).replace(".", ",")
+        parts.append(
+            f'<Record Date="{on:%d.%m.%Y}" Id="{valute_id}"><Nominal>1</Nominal>'
+            f"<Value>{value}</Value><VunitRate>{value}</VunitRate></Record>"
+        )
+    parts.append("</ValCurs>")
+    return "".join(parts).encode("windows-1251")
+
+
+class CbrStandIn:
+    """Имитация сервера ЦБ, отвечающая как XML_daily.asp и XML_dynamic.asp.
+
+    Запросы к daily_json.js и eurofxref-daily.xml получают те же курсы в формате
+    JSON-зеркала и фида ЕЦБ; путь вида /archive/ГГГГ/ММ/ДД/... запрашивает
+    курсы на дату. Все опубликованные через publish() курсы сохраняются:
+    запрос XML_daily с date_req получает последнюю публикацию не позже этой
+    даты, а XML_dynamic — записи всех публикаций из диапазона. Поддерживает
+    ETag/Last-Modified с ответом 304 и сжатие gzip/deflate, а также считает
+    запросы и байты тел ответов, отправленных «по сети».
+    Позволяет добавить задержку ответа, медленные «хвостовые» ответы, случайные
+    ошибки 5xx и 429 и обрывы соединения. Задержка дольше таймаута чтения
+    запроса завершается httpx.ReadTimeout, как на реальной сети.
+    Используется как транспорт httpx через transport().
+
+    Атрибуты:
+        published (Dict[date, Dict[str, Decimal]]): Все публикации по датам.
+        body (bytes): Текущее тело ответа.
+        etag (str): ETag текущего тела.
+        last_modified (str): Значение Last-Modified текущего тела.
+        compress (bool): Сжимать ответ, если клиент это поддерживает.
+        latency (float): Задержка каждого ответа в секундах.
+        error_rate (float): Доля ответов 500.
+        throttle_rate (float): Доля ответов 429.
+        disconnect_rate (float): Доля запросов, завершающихся обрывом соединения.
+        slow_rate (float): Доля ответов с дополнительной задержкой slow_latency.
+        slow_latency (float): Дополнительная задержка медленных ответов в секундах.
+        requests (int): Количество полученных запросов.
+        not_modified (int): Количество ответов 304.
+        errors (int): Количество ответов 500 и 429 и обрывов соединения.
+        timeouts (int): Количество запросов, не дождавшихся ответа.
+        bytes_sent (int): Суммарный размер отправленных тел ответов.
+    """
+
+    FORMATS = {"daily_json.js": make_daily_json, "eurofxref-daily.xml": make_ecb_xml}
+
+    def __init__(
+        self,
+        rates: Mapping[str, Decimal],
+        on: date,
+        compress: bool = True,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: Optional[int] = None,
+        disconnect_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 0.0,
+    ):
+        """Инициализировать имитацию сервера.
+
+        Аргументы:
+            rates (Mapping[str, Decimal]): Курсы валют относительно RUB.
+            on (date): Дата публикации.
+            compress (bool): Сжимать ответы (по умолчанию: True).
+            latency (float): Задержка ответа в секундах (по умолчанию: 0).
+            error_rate (float): Доля ответов 500 (по умолчанию: 0).
+            throttle_rate (float): Доля ответов 429 (по умолчанию: 0).
+            seed (Optional[int]): Зерно генератора ошибок для воспроизводимости.
+            disconnect_rate (float): Доля обрывов соединения (по умолчанию: 0).
+            slow_rate (float): Доля медленных ответов (по умолчанию: 0).
+            slow_latency (float): Дополнительная задержка медленных ответов
+                в секундах (по умолчанию: 0).
+        """
+        self.compress = compress
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.disconnect_rate = disconnect_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.bytes_sent = 0
+        self.published: Dict[date, Dict[str, Decimal]] = {}
+        self.publish(rates, on)
+
+    def publish(self, rates: Mapping[str, Decimal], on: date) -> None:
+        """Опубликовать новые курсы: сменить тело ответа и его валидаторы.
+
+        Аргументы:
+            rates (Mapping[str, Decimal]): Курсы валют относительно RUB.
+            on (date): Дата публикации.
+        """
+        self.published[on] = dict(rates)
+        self.body = make_daily_xml(rates, on)
+        self.etag = f'"{hashlib.md5(self.body).hexdigest()}"'
+        self.last_modified = f"{on:%a, %d %b %Y} 12:00:00 GMT"
+
+    def _body_for(self, url: httpx.URL) -> bytes:
+        """Выбрать тело ответа по пути и параметрам запроса.
+
+        Аргументы:
+            url (httpx.URL): URL запроса.
+
+        Возвращает:
+            bytes: Тело ответа.
+        """
+        params = url.params
+        render = self.FORMATS.get(url.path.rsplit("/", 1)[-1])
+        if render is not None:
+            on = max(self.published)
+            parts = url.path.split("/")
+            if "archive" in parts:
+                index = parts.index("archive")
+                requested = date(*map(int, parts[index + 1 : index + 4]))
+                on = max(day for day in self.published if day <= requested)
+            return render(self.published[on], on)
+        if url.path.endswith("XML_dynamic.asp"):
+            start = self._parse_date(params["date_req1"])
+            end = self._parse_date(params["date_req2"])
+            code_id = params["VAL_NM_RQ"]
+            series = {
+                on: rates[code]
+                for on, rates in self.published.items()
+                if start <= on <= end
+                for code in rates
+                if make_valute_id(code) == code_id
+            }
+            return make_dynamic_xml(series, code_id, start, end)
+        if "date_req" in params:
+            on = self._parse_date(params["date_req"])
+            earlier = [published for published in self.published if published <= on]
+            if earlier:
+                latest = max(earlier)
+                return make_daily_xml(self.published[latest], latest)
+        return self.body
+
+    @staticmethod
+    def _parse_date(text: str) -> date:
+        """Разобрать дату параметра запроса в формате dd/mm/yyyy."""
+        return datetime.strptime(text, "%d/%m/%Y").date()
+
+    def respond(self, request: httpx.Request) -> httpx.Response:
+        """Сформировать ответ на запрос.
+
+        Аргументы:
+            request (httpx.Request): Запрос клиента.
+
+        Возвращает:
+            httpx.Response: Ответ сервера.
+
+        Исключения:
+            httpx.ConnectError: Если имитируется обрыв соединения.
+        """
+        self.requests += 1
+        roll = self._random.random()
+        if roll < self.error_rate:
+            self.errors += 1
+            return httpx.Response(500)
+        if roll < self.error_rate + self.throttle_rate:
+            self.errors += 1
+            return httpx.Response(429, headers={"Retry-After": "1"})
+        if roll < self.error_rate + self.throttle_rate + self.disconnect_rate:
+            self.errors += 1
+            raise httpx.ConnectError("Соединение разорвано", request=request)
+        body = self._body_for(request.url)
+        etag = self.etag
+        if body is not self.body:
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+        validators = {"ETag": etag, "Last-Modified": self.last_modified}
+        if_none_match = request.headers.get("If-None-Match")
+        if (
+            if_none_match == etag
+            if if_none_match is not None  # If-None-Match важнее If-Modified-Since
+            else request.headers.get("If-Modified-Since") == self.last_modified
+        ):
+            self.not_modified += 1
+            return httpx.Response(304, headers=validators)
+
+        content_type = "text/xml; charset=windows-1251"
+        if request.url.path.endswith(".js"):
+            content_type = "application/json"
+        elif request.url.path.endswith("eurofxref-daily.xml"):
+            content_type = "text/xml; charset=utf-8"
+        headers: Dict[str, str] = {
+            "Content-Type": content_type,
+            **validators,
+        }
+        content = body
+        encoding = self._choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding == "gzip":
+            content = gzip.compress(content)
+        elif encoding == "deflate":
+            content = zlib.compress(content)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        self.bytes_sent += len(content)
+        return httpx.Response(200, content=content, headers=headers)
+
+    def _choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        """Выбрать способ сжатия по заголовку Accept-Encoding.
+
+        Аргументы:
+            accept_encoding (str): Значение заголовка Accept-Encoding.
+
+        Возвращает:
+            Optional[str]: 'gzip', 'deflate' или None.
+        """
+        if not self.compress:
+            return None
+        offered = {item.split(";")[0].strip() for item in accept_encoding.split(",")}
+        for encoding in ("gzip", "deflate"):
+            if encoding in offered:
+                return encoding
+        return None
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        """Асинхронный обработчик для httpx.MockTransport.
+
+        Аргументы:
+            request (httpx.Request): Запрос клиента.
+
+        Возвращает:
+            httpx.Response: Ответ сервера.
+
+        Исключения:
+            httpx.ReadTimeout: Если задержка ответа превышает таймаут чтения.
+        """
+        delay = self.latency
+        if self.slow_rate and self._random.random() < self.slow_rate:
+            delay += self.slow_latency
+        if delay:
+            timeout = request.extensions.get("timeout", {}).get("read")
+            if timeout is not None and delay > timeout:
+                await asyncio.sleep(timeout)
+                self.requests += 1
+                self.timeouts += 1
+                raise httpx.ReadTimeout("Истёк таймаут чтения", request=request)
+            await asyncio.sleep(delay)
+        return self.respond(request)
+
+    def transport(self) -> httpx.MockTransport:
+        """Создать транспорт httpx, направляющий запросы в эту имитацию.
+
+        Возвращает:
+            httpx.MockTransport: Транспорт для ApiClient.
+        """
+        return httpx.MockTransport(self.handle)
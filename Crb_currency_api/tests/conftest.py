@@ -0,0 +1,10 @@
+import pytest
+
+from Crb_currency_api.rate_store import close_shared
+
+
+@pytest.fixture(autouse=True)
+async def isolated_shared_state():
+    """Сбрасывать общие для процесса хранилище и HTTP-клиент после каждого теста."""
+    yield
+    await close_shared()
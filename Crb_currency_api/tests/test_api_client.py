@@ -1,9 +1,15 @@
-from unittest.mock import AsyncMock
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
 
 import httpx
 import pytest
 
 from Crb_currency_api.api_client import ApiClient
+from Crb_currency_api.parsers import XmlParser
+from Crb_currency_api.testing import CbrStandIn
+
+TODAY = date(2025, 4, 7)
 
 
 @pytest.mark.asyncio
@@ -50,3 +56,38 @@ async def test_api_client_context_manager():
         assert isinstance(client, ApiClient)
         assert not client.client.is_closed
     assert client.client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_api_client_conditional_get_reuses_parsed_result():
+    stand_in = CbrStandIn({"RUB": Decimal("1.0"), "USD": Decimal("84.7784")}, TODAY)
+    parse = MagicMock(side_effect=lambda response: XmlParser().parse(response.content))
+
+    async with ApiClient(transport=stand_in.transport()) as client:
+        first = await client.get_parsed("http://test.url", parse)
+        second = await client.get_parsed("http://test.url", parse)
+        assert second is first
+        assert parse.call_count == 1
+        assert client.not_modified == stand_in.not_modified == 1
+
+        stand_in.publish({"RUB": Decimal("1.0"), "USD": Decimal("85")}, TODAY)
+        third = await client.get_parsed("http://test.url", parse)
+        assert third["USD"] == Decimal("85")
+        assert parse.call_count == 2
+    assert stand_in.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_api_client_requests_compressed_body():
+    rates = {"RUB": Decimal("1.0"), "USD": Decimal("84.7784"), "EUR": Decimal("93")}
+    plain = CbrStandIn(rates, TODAY, compress=False)
+    compressed = CbrStandIn(rates, TODAY)
+
+    async with ApiClient(transport=plain.transport()) as client:
+        plain_body = (await client.get("http://test.url")).content
+    async with ApiClient(transport=compressed.transport()) as client:
+        response = await client.get("http://test.url")
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.content == plain_body
+    assert compressed.bytes_sent < plain.bytes_sent
@@ -1,5 +1,7 @@
 from datetime import datetime
 
+import pytest
+
 from Crb_currency_api.cache_manager import CacheManager
 
 
@@ -17,13 +19,13 @@ def test_cache_manager_ttl_weekday(monkeypatch):
     # Мокаем дату: среда, 12:00
     class MockDateTime:
         @staticmethod
-        def now():
-            return datetime(2023, 10, 18, 12, 0, 0)  # Среда
+        def now(tz=None):
+            return datetime(2023, 10, 18, 12, 0, 0, tzinfo=tz)  # Среда
 
     monkeypatch.setattr("Crb_currency_api.cache_manager.datetime", MockDateTime)
 
     cache = CacheManager()
-    ttl = cache._calculate_ttl()
+    ttl = cache.calculate_ttl()
     assert ttl == 12 * 3600  # 12 часов до полуночи четверга (00:00 следующего дня)
 
 
@@ -33,13 +35,54 @@ def test_cache_manager_ttl_friday(monkeypatch):
     # Мокаем дату: пятница, 12:00
     class MockDateTime:
         @staticmethod
-        def now():
-            return datetime(2023, 10, 20, 12, 0, 0)  # Пятница
+        def now(tz=None):
+            return datetime(2023, 10, 20, 12, 0, 0, tzinfo=tz)  # Пятница
 
     monkeypatch.setattr("Crb_currency_api.cache_manager.datetime", MockDateTime)
 
     cache = CacheManager()
-    ttl = cache._calculate_ttl()
+    ttl = cache.calculate_ttl()
     assert (
         ttl == 60 * 3600
     )  # 60 часов до полуночи понедельника (от пятницы 12:00 до понедельника 00:00)
+
+
+def test_cache_manager_keeps_other_keys_with_own_ttl():
+    """Тест: запись ключа не стирает остальные, срок жизни у каждой записи свой."""
+    cache = CacheManager(maxsize=10)
+    cache.set("latest", "снимок")
+    cache.set("2025-04-04", "архив", ttl=CacheManager.PERMANENT)
+    cache.set("short", "ненадолго", ttl=0)
+
+    assert cache.get("latest") == "снимок"
+    assert cache.get("2025-04-04") == "архив"
+    assert cache.get("short") is None
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 1,
+        "evictions_expired": 1,
+        "evictions_size": 0,
+        "evictions_invalidated": 0,
+        "entries": 2,
+        "size": 2,
+    }
+
+
+def test_cache_manager_lru_by_size_and_namespaces():
+    """Тест: вытесняются давно не использованные записи, объём считается по getsizeof."""
+    cache = CacheManager(maxsize=10, getsizeof=len)
+    history, pairs = cache.namespace("history"), cache.namespace("pairs")
+    history.set("a", "xxxx")
+    pairs.set("a", "yyyy")
+    assert history.get("a") == "xxxx"  # "history:a" становится недавней
+    pairs.set("b", "zzzz")  # 12 > 10: вытесняется "pairs:a"
+
+    assert "a" in history and "a" not in pairs
+    assert list(cache) == ["history:a", "pairs:b"]
+    assert cache.currsize == 8
+    assert cache.evictions["size"] == 1
+
+    pairs.clear()
+    assert list(cache) == ["history:a"]
+    with pytest.raises(ValueError):
+        cache.set("big", "x" * 11)
@@ -1,9 +1,19 @@
+import asyncio
+import subprocess
+import sys
+from datetime import date
 from decimal import Decimal
 from unittest.mock import AsyncMock
 
+import httpx
 import pytest
 
+from Crb_currency_api.api_client import ApiClient
 from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.testing import CbrStandIn
+
+TODAY = date(2025, 4, 7)
 
 
 @pytest.mark.asyncio
@@ -65,7 +75,234 @@ async def test_invalid_currency():
 
 @pytest.mark.asyncio
 async def test_context_manager():
-    async with CrbRequestCurrencyApi() as api:
+    async with CrbRequestCurrencyApi(shared=False) as api:
         assert isinstance(api, CrbRequestCurrencyApi)
         assert not api.client.client.is_closed
     assert api.client.client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_context_manager_keeps_shared_client_open():
+    async with CrbRequestCurrencyApi() as api:
+        pass
+    assert not api.client.client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_instances_share_rates_across_base_currencies():
+    mock_rates = {
+        "RUB": Decimal("1.0"),
+        "USD": Decimal("97.1234"),
+        "EUR": Decimal("102.5678"),
+    }
+    usd_api = CrbRequestCurrencyApi(base_currency="USD")
+    eur_api = CrbRequestCurrencyApi(base_currency="EUR")
+    isolated_api = CrbRequestCurrencyApi(shared=False)
+    assert usd_api.client is eur_api.client
+    assert isolated_api.client is not usd_api.client
+
+    usd_api._fetch_rates = AsyncMock(return_value=mock_rates)
+    eur_api._fetch_rates = AsyncMock(return_value=mock_rates)
+    isolated_api._fetch_rates = AsyncMock(return_value=mock_rates)
+
+    await usd_api.get_currency_rate("EUR")
+    await eur_api.get_currency_rate("USD")
+    await isolated_api.get_currency_rate("USD")
+    assert usd_api._fetch_rates.call_count == 1
+    assert eur_api._fetch_rates.call_count == 0
+    assert isolated_api._fetch_rates.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch():
+    api = CrbRequestCurrencyApi()
+    mock_rates = {"RUB": Decimal("1.0"), "USD": Decimal("97.1234")}
+
+    async def slow_fetch():
+        await asyncio.sleep(0.01)
+        return mock_rates
+
+    api._fetch_rates = AsyncMock(side_effect=slow_fetch)
+
+    rates = await asyncio.gather(*(api.get_currency_rate("RUB") for _ in range(10)))
+    assert rates == [Decimal("1.0")] * 10
+    assert api._fetch_rates.call_count == 1
+    assert api.coalesced_requests == 9
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetch_failure_is_not_cached():
+    api = CrbRequestCurrencyApi()
+
+    async def failing_fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("сбой загрузки")
+
+    api._fetch_rates = AsyncMock(side_effect=failing_fetch)
+
+    results = await asyncio.gather(
+        *(api.get_currency_rate("RUB") for _ in range(5)), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    assert api._fetch_rates.call_count == 1
+    assert "rates" not in api.cache
+
+    api._fetch_rates = AsyncMock(return_value={"RUB": Decimal("1.0")})
+    assert await api.get_currency_rate("RUB") == Decimal("1.0")
+
+
+@pytest.mark.asyncio
+async def test_historical_rate_is_cached_permanently():
+    api = CrbRequestCurrencyApi()
+    api._fetch_rates = AsyncMock(
+        return_value={"RUB": Decimal("1.0"), "USD": Decimal("80.5")}
+    )
+    past = date(2024, 1, 10)
+
+    assert await api.get_currency_rate("USD", on=past) == Decimal("80.5")
+    assert await api.exchange("USD", "RUB", Decimal("2"), on=past) == Decimal("161")
+    api._fetch_rates.assert_awaited_once_with(past)
+    assert past in api.store.history
+
+
+@pytest.mark.asyncio
+async def test_history_is_bounded_by_cache():
+    """Тест: вытесненные из кэша курсы освобождаются и загружаются заново."""
+    api = CrbRequestCurrencyApi(shared=False, store=RateStore(maxsize=2))
+    api._fetch_rates = AsyncMock(
+        return_value={"RUB": Decimal("1.0"), "USD": Decimal("80.5")}
+    )
+    days = [date(2024, 1, 9), date(2024, 1, 10), date(2024, 1, 11)]
+    for day in days:
+        await api.get_currency_rate("USD", on=day)
+
+    assert days[0] not in api.store.history
+    assert days[1] in api.store.history and days[2] in api.store.history
+    assert api.cache.stats()["evictions_size"] == 1
+    assert api.store.index.starts == days[1:]
+    assert api.store.index.lookup(days[0]) is None
+
+    await api.get_currency_rate("USD", on=days[0])
+    assert api._fetch_rates.await_count == 4
+    assert len(api.store.index) == 2
+
+
+@pytest.mark.asyncio
+async def test_historical_request_url():
+    api = CrbRequestCurrencyApi(shared=False)
+    request = httpx.Request("GET", api.url)
+    xml = '<ValCurs Date="10.01.2024"><Valute><CharCode>USD</CharCode>'
+    xml += "<VunitRate>89,6054</VunitRate></Valute></ValCurs>"
+    api.client.client.get = AsyncMock(
+        return_value=httpx.Response(200, text=xml, request=request)
+    )
+
+    snapshot = await api.snapshot(on=date(2024, 1, 10))
+    api.client.client.get.assert_awaited_once()
+    assert api.client.client.get.call_args.args == (
+        "http://www.cbr.ru/scripts/XML_daily.asp?date_req=10/01/2024",
+    )
+    assert snapshot.date == date(2024, 1, 10)
+
+
+@pytest.mark.asyncio
+async def test_load_range_limits_concurrency_and_skips_cached_days():
+    api = CrbRequestCurrencyApi()
+    active = 0
+    max_active = 0
+
+    async def fetch(on):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return {"RUB": Decimal("1.0"), "USD": Decimal(on.day)}
+
+    api._fetch_rates = AsyncMock(side_effect=fetch)
+    await api.get_currency_rate("USD", on=date(2024, 1, 5))
+
+    snapshots = await api.load_range(date(2024, 1, 1), date(2024, 1, 10), 3)
+    assert len(snapshots) == 10
+    assert snapshots[date(2024, 1, 7)]["USD"] == Decimal(7)
+    assert api._fetch_rates.call_count == 10
+    assert max_active == 3
+
+
+@pytest.mark.asyncio
+async def test_refresh_of_unchanged_publication_is_not_reparsed():
+    stand_in = CbrStandIn({"RUB": Decimal("1.0"), "USD": Decimal("84.7784")}, TODAY)
+    api = CrbRequestCurrencyApi(client=ApiClient(transport=stand_in.transport()))
+
+    first = await api.store.refresh(api._fetch_rates)
+    second = await api.store.refresh(api._fetch_rates)
+    assert second is first
+    assert stand_in.requests == 2
+    assert stand_in.not_modified == 1
+    await api.__aexit__(None, None, None)
+
+
+def publish_january(stand_in):
+    """Опубликовать курсы GBP и CHF на рабочие дни января 2024 года."""
+    for day in range(9, 32):
+        on = date(2024, 1, day)
+        if on.weekday() < 5:
+            stand_in.publish(
+                {
+                    "RUB": Decimal("1.0"),
+                    "GBP": Decimal(100 + day),
+                    "CHF": Decimal(50 + day),
+                },
+                on,
+            )
+
+
+@pytest.mark.asyncio
+async def test_rate_series_uses_dynamic_for_long_ranges():
+    stand_in = CbrStandIn({"RUB": Decimal("1.0")}, date(2024, 1, 8))
+    publish_january(stand_in)
+    api = CrbRequestCurrencyApi(client=ApiClient(transport=stand_in.transport()))
+
+    series = await api.get_rate_series("GBP", date(2024, 1, 10), date(2024, 1, 31))
+    assert len(series) == 22
+    assert series[date(2024, 1, 12)] == Decimal("112")
+    assert series[date(2024, 1, 14)] == Decimal("112")  # Воскресенье: курс пятницы
+    assert stand_in.requests == 2  # Коды валют ЦБ и одна динамика курса
+
+    assert await api.get_currency_rate("GBP", on=date(2024, 1, 20)) == Decimal("119")
+    assert stand_in.requests == 2
+    await api.__aexit__(None, None, None)
+
+
+@pytest.mark.asyncio
+async def test_rate_series_cross_base_and_single_day():
+    stand_in = CbrStandIn({"RUB": Decimal("1.0")}, date(2024, 1, 8))
+    publish_january(stand_in)
+    api = CrbRequestCurrencyApi("CHF", client=ApiClient(transport=stand_in.transport()))
+
+    day = date(2024, 1, 10)
+    assert await api.get_rate_series("GBP", day, day) == {day: Decimal("1.83333")}
+    assert stand_in.requests == 1  # Один день: ежедневные курсы
+    assert day in api.store.history
+
+    series = await api.get_rate_series("GBP", date(2024, 1, 9), date(2024, 1, 12))
+    assert series[date(2024, 1, 12)] == Decimal("1.80645")
+    assert stand_in.requests == 3  # Динамика GBP и CHF
+    await api.__aexit__(None, None, None)
+
+
+def test_import_and_construction_defer_http_stack():
+    """Тест: импорт пакета и создание клиента не загружают httpx, парсеры и sqlite3."""
+    script = (
+        "import sys\n"
+        "from Crb_currency_api import CrbRequestCurrencyApi\n"
+        "api = CrbRequestCurrencyApi('USD')\n"
+        "heavy = ('httpx', 'tenacity', 'xml.etree.ElementTree', 'sqlite3')\n"
+        "print(*[name for name in heavy if name in sys.modules])\n"
+        "api.client, api.parser\n"
+        "print(*[name for name in heavy if name in sys.modules])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.split("\n")[:2] == ["", "httpx tenacity xml.etree.ElementTree"]
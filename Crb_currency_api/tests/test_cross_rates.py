@@ -0,0 +1,49 @@
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+
+from Crb_currency_api.cross_rates import CrossRateMatrix
+from Crb_currency_api.rate_store import RateStore
+
+RUB_RATES = {
+    "RUB": Decimal("1.0"),
+    "USD": Decimal("97.1234"),
+    "EUR": Decimal("102.5678"),
+}
+
+
+def test_rates_for_base_are_computed_once():
+    """Тест: курсы относительно базы вычисляются один раз на снимок."""
+    matrix = CrossRateMatrix(RUB_RATES)
+    usd_rates = matrix.rates_for("USD")
+    assert usd_rates["USD"] == Decimal("1")
+    assert usd_rates["EUR"] == Decimal("1.05606")
+    assert matrix.rates_for("USD") is usd_rates
+
+    with pytest.raises(ValueError, match="Базовая валюта XYZ не найдена"):
+        matrix.rates_for("XYZ")
+
+
+def test_eager_matrix_contains_all_pairs():
+    """Тест: при eager=True все пары вычислены заранее и совпадают с ленивыми."""
+    eager = CrossRateMatrix(RUB_RATES, eager=True)
+    lazy = CrossRateMatrix(RUB_RATES)
+    assert len(eager._pairs) == len(RUB_RATES) ** 2
+    assert eager.pair("USD", "EUR") == lazy.pair("USD", "EUR")
+
+    with pytest.raises(ValueError, match="Одна из валют"):
+        lazy.pair("USD", "XYZ")
+
+
+@pytest.mark.asyncio
+async def test_store_rebuilds_matrix_only_on_new_snapshot():
+    """Тест: матрица сбрасывается только при смене снимка в кэше."""
+    store = RateStore()
+    fetch = AsyncMock(return_value=RUB_RATES)
+    matrix = await store.get_matrix(fetch)
+    assert await store.get_matrix(fetch) is matrix
+
+    store.cache.set("rates", dict(RUB_RATES))
+    assert await store.get_matrix(fetch) is not matrix
+    assert fetch.call_count == 1
@@ -0,0 +1,108 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from Crb_currency_api.api_client import ApiClient
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.daemon import RateServer
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.testing import CbrStandIn
+
+TODAY = date(2025, 4, 7)
+RATES = {"RUB": Decimal("1.0"), "USD": Decimal("97.1234"), "EUR": Decimal("102.5678")}
+
+
+@pytest.fixture
+async def daemon():
+    stand_in = CbrStandIn(RATES, TODAY)
+    server = RateServer(client=ApiClient(transport=stand_in.transport()), refresh=False)
+    async with TestClient(TestServer(server.app())) as client:
+        client.stand_in = stand_in
+        yield client
+
+
+async def test_daemon_rate_convert_and_etag(daemon):
+    response = await daemon.get("/v1/rate", params={"code": "EUR", "base": "USD"})
+    assert response.status == 200
+    assert (await response.json())["rate"] == "1.05606"
+
+    etag = response.headers["ETag"]
+    response = await daemon.get(
+        "/v1/rate",
+        params={"code": "EUR", "base": "USD"},
+        headers={"If-None-Match": etag},
+    )
+    assert response.status == 304
+
+    response = await daemon.get(
+        "/v1/convert", params={"from": "USD", "to": "RUB", "amount": "2"}
+    )
+    assert (await response.json())["result"] == "194.24680"
+    assert daemon.stand_in.requests == 1
+
+
+async def test_daemon_batch_and_errors(daemon):
+    response = await daemon.post(
+        "/v1/batch",
+        json={
+            "requests": [
+                {"op": "rate", "code": "USD"},
+                {"op": "convert", "from": "EUR", "to": "USD", "amount": "10"},
+                {"op": "rate", "code": "XXX"},
+            ]
+        },
+    )
+    results = (await response.json())["results"]
+    assert results[0]["rate"] == "97.12340"
+    assert results[1]["result"] == "10.56057"
+    assert "XXX" in results[2]["error"]
+
+    response = await daemon.get("/v1/rate", params={"code": "XXX"})
+    assert response.status == 404
+    response = await daemon.get("/v1/rate", params={"date": "вчера", "code": "USD"})
+    assert response.status == 400
+
+
+async def test_api_client_mode_uses_daemon(daemon):
+    url = str(daemon.make_url("")).rstrip("/")
+    async with CrbRequestCurrencyApi("EUR", store=RateStore(), daemon_url=url) as api:
+        assert await api.get_currency_rate("USD") == Decimal("0.94692")
+        await api.store.refresh(api._fetch_rates)  # Снимок не изменился: 304
+
+    assert api.client.not_modified == 1
+    assert daemon.stand_in.requests == 1
+
+
+async def test_daemon_snapshot_keeps_full_precision_for_clients():
+    rates = {**RATES, "VND": Decimal("0.00322383")}
+    stand_in = CbrStandIn(rates, TODAY)
+    server = RateServer(client=ApiClient(transport=stand_in.transport()), refresh=False)
+    async with TestClient(TestServer(server.app())) as daemon:
+        response = await daemon.get("/v1/snapshot")
+        assert (await response.json())["rates"]["VND"] == "0.00322383"
+
+        url = str(daemon.make_url("")).rstrip("/")
+        async with CrbRequestCurrencyApi(store=RateStore(), daemon_url=url) as api:
+            result = await api.exchange("VND", "RUB", Decimal("1000000"))
+    assert result == Decimal("3223.83000")
+
+
+async def test_daemon_series_matches_direct_client_for_other_base():
+    rates = {**RATES, "VND": Decimal("0.00322383"), "KZT": Decimal("0.19987654")}
+    stand_in = CbrStandIn(rates, TODAY)
+    server = RateServer(client=ApiClient(transport=stand_in.transport()), refresh=False)
+    start, end = TODAY, TODAY + timedelta(days=4)
+    async with TestClient(TestServer(server.app())) as daemon:
+        url = str(daemon.make_url("")).rstrip("/")
+        async with CrbRequestCurrencyApi(
+            "KZT", store=RateStore(), daemon_url=url
+        ) as api:
+            through_daemon = await api.get_rate_series("VND", start, end)
+    async with CrbRequestCurrencyApi(
+        "KZT", store=RateStore(), client=ApiClient(transport=stand_in.transport())
+    ) as api:
+        direct = await api.get_rate_series("VND", start, end)
+    assert through_daemon == direct
+    assert direct[start] == Decimal("0.01613")
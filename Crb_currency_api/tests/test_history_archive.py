@@ -0,0 +1,117 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.history_archive import (
+    HistoryArchive,
+    import_daily,
+    import_dynamic,
+)
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.snapshot import RateSnapshot
+from Crb_currency_api.testing import make_daily_xml, make_dynamic_xml, make_valute_id
+
+
+def test_archive_imports_payloads_and_serves_days_without_copies(tmp_path):
+    """Тест: импорт XML, курсы на день по сплошной оси дат и дописывание."""
+    path = str(tmp_path / "history.crbh")
+    writer = HistoryArchive(path, writable=True, chunk_days=4)
+    friday = make_daily_xml(
+        {"RUB": Decimal("1"), "USD": Decimal("89.6883"), "EUR": Decimal("98.1")},
+        date(2024, 1, 12),
+    )
+    tuesday = make_daily_xml(
+        {"RUB": Decimal("1"), "USD": Decimal("88.5"), "JPY": Decimal("0.6081")},
+        date(2024, 1, 16),
+    )
+    assert import_daily(writer, [tuesday, friday], complete=True) == 2
+    assert import_daily(writer, [friday]) == 0  # Уже в архиве
+
+    reader = HistoryArchive(path)
+    assert (reader.start, reader.end, len(reader)) == (
+        date(2024, 1, 12),
+        date(2024, 1, 16),
+        5,
+    )
+    sunday = reader.rates_on(date(2024, 1, 14))
+    assert sunday.date == date(2024, 1, 12)
+    assert dict(sunday) == {
+        "RUB": Decimal("1"),
+        "USD": Decimal("89.6883"),
+        "EUR": Decimal("98.1"),
+    }
+    assert "EUR" not in reader.rates_on(date(2024, 1, 16))
+    assert reader.rates_on(date(2024, 1, 11)) is None
+
+    usd_id = make_valute_id("USD")
+    dynamic = make_dynamic_xml(
+        {date(2024, 1, 16): Decimal("88.5"), date(2024, 1, 17): Decimal("87.9")},
+        usd_id,
+        date(2024, 1, 16),
+        date(2024, 1, 17),
+    )
+    assert import_dynamic(writer, {"USD": dynamic}) == 1
+    # Читатель подхватывает дописанные дни, в том числе в новом блоке
+    assert reader.end == date(2024, 1, 17)
+    assert reader.series("USD", date(2024, 1, 15), date(2024, 1, 20)) == {
+        date(2024, 1, 15): Decimal("89.6883"),
+        date(2024, 1, 16): Decimal("88.5"),
+        date(2024, 1, 17): Decimal("87.9"),
+    }
+    chunks = list(reader.column("USD"))
+    assert [first for first, _ in chunks] == [date(2024, 1, 12), date(2024, 1, 16)]
+    assert all(isinstance(values, memoryview) for _, values in chunks)
+    assert chunks[1][1].tolist() == [8850000000, 8790000000]
+
+    with pytest.raises(ValueError):
+        reader.append({"USD": Decimal("1")}, date(2024, 1, 18))
+    writer.close()
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_store_appends_publications_and_reads_past_days(tmp_path):
+    """Тест: хранилище дописывает новые публикации и читает прошлые дни из архива."""
+    archive = HistoryArchive(str(tmp_path / "history.crbh"), writable=True)
+    archive.append({"RUB": Decimal("1"), "USD": Decimal("90")}, date(2024, 1, 12))
+    api = CrbRequestCurrencyApi(shared=False, store=RateStore(archive=archive))
+    api._fetch_rates = AsyncMock(
+        return_value=RateSnapshot(
+            {"RUB": Decimal("1"), "USD": Decimal("91")}, date=date(2024, 1, 16)
+        )
+    )
+
+    assert await api.get_currency_rate("USD") == Decimal("91")
+    assert archive.end == date(2024, 1, 16)
+    assert await api.get_currency_rate("USD", on=date(2024, 1, 13)) == Decimal("90")
+    api._fetch_rates.assert_awaited_once_with()
+    archive.close()
+
+
+@pytest.mark.asyncio
+async def test_store_fetches_weekdays_missed_between_publications(tmp_path):
+    """Тест: будние дни без публикации в архиве не выдумываются, а загружаются."""
+    archive = HistoryArchive(str(tmp_path / "history.crbh"), writable=True)
+    archive.append({"RUB": Decimal("1"), "USD": Decimal("90")}, date(2024, 1, 12))
+    api = CrbRequestCurrencyApi(shared=False, store=RateStore(archive=archive))
+    api._fetch_rates = AsyncMock(
+        return_value=RateSnapshot(
+            {"RUB": Decimal("1"), "USD": Decimal("91")}, date=date(2024, 3, 1)
+        )
+    )
+
+    await api.get_currency_rate("USD")
+    assert archive.rates_on(date(2024, 1, 14)).date == date(2024, 1, 12)
+    assert archive.rates_on(date(2024, 2, 15)) is None
+    # Курс из архива округлён так же, как загруженный
+    assert str(await api.get_currency_rate("USD", on=date(2024, 1, 14))) == "90.00000"
+
+    api._fetch_rates.return_value = RateSnapshot(
+        {"RUB": Decimal("1"), "USD": Decimal("95.5")}, date=date(2024, 2, 15)
+    )
+    assert await api.get_currency_rate("USD", on=date(2024, 2, 15)) == Decimal("95.5")
+    api._fetch_rates.assert_awaited_with(date(2024, 2, 15))
+    archive.close()
@@ -0,0 +1,100 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.cross_rates import CrossRateMatrix
+from Crb_currency_api.history_index import HistoryIndex
+from Crb_currency_api.snapshot import RateSnapshot
+
+FRIDAY, SATURDAY, SUNDAY, MONDAY = (date(2024, 1, 12 + i) for i in range(4))
+TUESDAY = date(2024, 1, 16)
+
+
+def matrix(published: date, usd: str) -> CrossRateMatrix:
+    return CrossRateMatrix(
+        RateSnapshot({"RUB": Decimal("1"), "USD": Decimal(usd)}, date=published)
+    )
+
+
+def test_lookup_covers_days_between_requests_of_one_publication():
+    index = HistoryIndex()
+    friday, weekend = matrix(FRIDAY, "89"), matrix(SATURDAY, "90")
+    index.add(MONDAY, weekend)  # Курсы на понедельник опубликованы в субботу
+    index.add(FRIDAY, friday)
+    index.add(SATURDAY, matrix(SATURDAY, "90"))
+
+    assert len(index) == 2
+    assert index.lookup(SUNDAY) is weekend
+    assert index.lookup(TUESDAY) is None
+    assert index.lookup(date(2024, 1, 11)) is None
+    # 21:30 UTC пятницы — уже суббота по Москве
+    late_friday = datetime(2024, 1, 12, 21, 30, tzinfo=timezone.utc)
+    assert index.lookup(late_friday) is weekend
+    assert index.lookup(late_friday.replace(tzinfo=None)) is friday
+
+    moments = [FRIDAY, late_friday, SUNDAY, MONDAY, TUESDAY]
+    assert index.lookup_many(moments) == [friday, weekend, weekend, weekend, None]
+    assert index.lookup_many(moments[::-1]) == [None, weekend, weekend, weekend, friday]
+
+
+@pytest.mark.asyncio
+async def test_exchange_at_moment_reuses_loaded_publications():
+    api = CrbRequestCurrencyApi(shared=False)
+    published = {FRIDAY: FRIDAY, SATURDAY: SATURDAY, SUNDAY: SATURDAY}
+    published.update({MONDAY: SATURDAY, TUESDAY: TUESDAY})
+    usd = {FRIDAY: "89", SATURDAY: "90", TUESDAY: "91"}
+
+    async def fetch(on):
+        day = published[on]
+        return RateSnapshot({"RUB": Decimal("1"), "USD": Decimal(usd[day])}, date=day)
+
+    api._fetch_rates = AsyncMock(side_effect=fetch)
+
+    await api.load_range(SATURDAY, SATURDAY)
+    await api.get_currency_rate("USD", on=MONDAY)
+    sunday_noon = datetime(2024, 1, 14, 12, 0)
+    assert await api.get_currency_rate("USD", at=sunday_noon) == Decimal("90")
+    assert await api.get_currency_rate("USD", on=SUNDAY) == Decimal("90")
+    assert api._fetch_rates.await_count == 2
+
+    moments = [datetime(2024, 1, 12, 10, 0) + timedelta(hours=8 * i) for i in range(14)]
+    snapshots = await api.snapshots_at(moments)
+    assert [snapshot.date for snapshot in snapshots[::4]] == [
+        FRIDAY,
+        SATURDAY,
+        SATURDAY,
+        TUESDAY,
+    ]
+    assert sorted(call.args[0] for call in api._fetch_rates.await_args_list[2:]) == [
+        FRIDAY,
+        TUESDAY,
+    ]
+    assert await api.exchange("USD", "RUB", Decimal("2"), at=moments[-1]) == Decimal(
+        "182"
+    )
+    with pytest.raises(ValueError):
+        await api.snapshot(on=MONDAY, at=sunday_noon)
+
+
+@pytest.mark.asyncio
+async def test_index_only_day_is_kept_in_history():
+    np = pytest.importorskip("numpy")
+    api = CrbRequestCurrencyApi(shared=False)
+    api._fetch_rates = AsyncMock(
+        return_value=RateSnapshot(
+            {"RUB": Decimal("1"), "USD": Decimal("90")}, date=SATURDAY
+        )
+    )
+    await api.load_range(SATURDAY, SATURDAY)
+    api.store.index.add(MONDAY, api.store.history[SATURDAY])  # Понедельник — тоже
+
+    assert await api.get_currency_rate("USD", on=SUNDAY) == Decimal("90")
+    assert api.store.history[SUNDAY] is api.store.history[SATURDAY]
+    result = await api.exchange_array(
+        np.array([2.0]), "USD", "RUB", dates=[MONDAY], exact=True
+    )
+    assert result.tolist() == [Decimal("180.00000")]
+    api._fetch_rates.assert_awaited_once()
@@ -0,0 +1,108 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from Crb_currency_api.api_client import ApiClient
+from Crb_currency_api.cache_manager import CacheManager
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.metrics import (
+    NULL_OBSERVER,
+    Histogram,
+    InMemoryMetrics,
+    get_observer,
+    set_observer,
+)
+from Crb_currency_api.parsers import XmlParser
+from Crb_currency_api.testing import CbrStandIn
+
+TODAY = date(2025, 4, 7)
+RATES = {"RUB": Decimal("1.0"), "USD": Decimal("97.1234"), "EUR": Decimal("102.5678")}
+
+
+@pytest.mark.asyncio
+async def test_metrics_cache_requests_parse_and_age():
+    metrics = InMemoryMetrics()
+    stand_in = CbrStandIn(RATES, TODAY)
+    client = ApiClient(transport=stand_in.transport(), observer=metrics)
+    async with CrbRequestCurrencyApi(
+        shared=False, client=client, observer=metrics
+    ) as api:
+        await api.get_currency_rate("USD")
+        await api.get_currency_rate("EUR")
+
+    values = metrics.collect()
+    assert values["cache_misses"] == 1
+    assert values["cache_hits"] == 1
+    assert values["requests"] == values["requests_200"] == 1
+    assert values["request_seconds_count"] == 1
+    assert values["parses"] == 1
+    assert values["parsed_rows"] == 2
+    assert values["rejected_rows"] == 0
+    assert values["snapshots_served"] == 2
+    assert 0 <= values["snapshot_age_seconds"] < 1
+
+
+def test_metrics_parser_reports_rejected_rows():
+    metrics = InMemoryMetrics()
+    xml = (
+        '<ValCurs Date="07.04.2025"><Valute ID="R1"><CharCode>USD</CharCode>'
+        '<VunitRate>84,7784</VunitRate></Valute><Valute ID="R2">'
+        "<CharCode>EUR</CharCode><VunitRate>n/a</VunitRate></Valute></ValCurs>"
+    )
+    XmlParser(observer=metrics).parse_snapshot(xml)
+    assert metrics.counters["parsed_rows"] == 1
+    assert metrics.counters["rejected_rows"] == 1
+
+
+def test_metrics_cache_evictions():
+    metrics = InMemoryMetrics()
+    cache = CacheManager(maxsize=1, observer=metrics)
+    cache.set("a", 1)
+    cache.set("b", 2)  # Вытесняет "a" по размеру
+    cache.set("c", 3, ttl=0)  # Вытесняет "b" и сразу истекает
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    cache.delete("c")
+    assert metrics.counters["cache_evictions_size"] == 2
+    assert metrics.counters["cache_evictions_expired"] == 1
+    assert metrics.counters["cache_misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_metrics_retry_attempts():
+    metrics = InMemoryMetrics()
+    client = ApiClient(observer=metrics)
+    request = httpx.Request("GET", "http://test.url")
+    client.client.get = AsyncMock(
+        side_effect=[
+            httpx.Response(503, request=request),
+            httpx.Response(200, request=request),
+        ]
+    )
+    await client.get("http://test.url")
+    assert metrics.counters["retries"] == 1
+    assert metrics.counters["requests_503"] == 1
+    assert metrics.counters["requests_200"] == 1
+
+
+def test_set_observer_is_default_for_new_objects():
+    metrics = InMemoryMetrics()
+    set_observer(metrics)
+    try:
+        assert CacheManager().observer is metrics
+    finally:
+        set_observer(None)
+    assert get_observer() is NULL_OBSERVER
+
+
+def test_histogram_quantiles():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.buckets == [2, 1, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(1.0) == 3.0
@@ -1,6 +1,7 @@
+from datetime import date
 from decimal import Decimal
 
-from Crb_currency_api.parsers import XmlParser
+from Crb_currency_api.parsers import XmlDynamicParser, XmlParser, valute_id
 
 
 def test_cbr_xml_parser_success():
@@ -38,3 +39,83 @@ def test_cbr_xml_parser_invalid_data():
     rates = parser.parse(xml_data)
     assert rates == {"RUB": Decimal("1.0")}  # Только RUB, USD пропущен из-за ошибки
     assert "USD" not in rates  # Убеждаемся, что некорректная валюта исключена
+
+
+def test_cbr_xml_parser_snapshot_date():
+    """Тест: снимок содержит дату публикации из атрибута Date."""
+    parser = XmlParser()
+    xml_data = """
+    <ValCurs Date="07.04.2025" name="Foreign Currency Market">
+        <Valute>
+            <CharCode>USD</CharCode>
+            <VunitRate>84,7784</VunitRate>
+        </Valute>
+    </ValCurs>
+    """
+    snapshot = parser.parse_snapshot(xml_data)
+    assert snapshot.date == date(2025, 4, 7)
+    assert snapshot.base == "RUB"
+    assert snapshot.rate("USD") == Decimal("84.7784")
+
+
+WINDOWS_1251_XML = (
+    '<?xml version="1.0" encoding="windows-1251"?>'
+    '<ValCurs Date="07.04.2025" name="Foreign Currency Market">'
+    '<Valute ID="R01235"><CharCode>USD</CharCode><Name>Доллар США</Name>'
+    "<VunitRate>84,7784</VunitRate></Valute>"
+    '<Valute ID="R01239"><CharCode>EUR</CharCode><Name>Евро</Name>'
+    "<VunitRate>93,0146</VunitRate></Valute>"
+    '<Valute ID="R01375"><CharCode>CNY</CharCode><VunitRate>н/д</VunitRate></Valute>'
+    "</ValCurs>"
+).encode("windows-1251")
+
+
+def test_cbr_xml_parser_raw_bytes_reports_bad_rows(caplog):
+    """Тест: байты в windows-1251 разбираются без декодирования, ошибки в журнале."""
+    collector = XmlParser().collector()
+    collector.feed(WINDOWS_1251_XML)
+    snapshot = collector.close()
+
+    assert snapshot.date == date(2025, 4, 7)
+    assert snapshot == {
+        "RUB": Decimal("1.0"),
+        "USD": Decimal("84.7784"),
+        "EUR": Decimal("93.0146"),
+    }
+    assert collector.errors == ["Valute R01375 (CNY): некорректный курс 'н/д'"]
+    assert "R01375" in caplog.text
+
+
+async def test_cbr_xml_parser_stream_in_small_chunks():
+    """Тест потокового разбора ответа, разрезанного на мелкие части."""
+
+    async def chunks():
+        for i in range(0, len(WINDOWS_1251_XML), 7):
+            yield WINDOWS_1251_XML[i : i + 7]
+
+    snapshot = await XmlParser().parse_stream(chunks())
+    assert snapshot == XmlParser().parse_snapshot(WINDOWS_1251_XML)
+    assert snapshot.rate("EUR") == Decimal("93.0146")
+
+
+def test_xml_dynamic_parser_series():
+    """Тест разбора динамики курса с пропуском некорректной записи."""
+    xml = (
+        '<ValCurs ID="R01235" DateRange1="09.01.2024" DateRange2="11.01.2024">'
+        '<Record Date="09.01.2024" Id="R01235"><Nominal>1</Nominal>'
+        "<Value>90,4268</Value><VunitRate>90,4268</VunitRate></Record>"
+        '<Record Date="10.01.2024" Id="R01235"><VunitRate>-</VunitRate></Record>'
+        '<Record Date="11.01.2024" Id="R01235"><VunitRate>89,6054</VunitRate></Record>'
+        "</ValCurs>"
+    ).encode("windows-1251")
+
+    assert XmlDynamicParser().parse_series(xml) == {
+        date(2024, 1, 9): Decimal("90.4268"),
+        date(2024, 1, 11): Decimal("89.6054"),
+    }
+
+
+def test_daily_parse_remembers_valute_ids():
+    """Тест: внутренние коды ЦБ запоминаются для запросов динамики."""
+    XmlParser().parse_snapshot(WINDOWS_1251_XML)
+    assert valute_id("USD") == "R01235"
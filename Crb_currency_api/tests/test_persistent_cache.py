@@ -0,0 +1,75 @@
+import sqlite3
+from contextlib import closing
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.persistent_cache import SqliteSnapshotCache
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.snapshot import RateSnapshot
+
+SNAPSHOT = RateSnapshot(
+    {"RUB": Decimal("1.0"), "USD": Decimal("97.1234")}, date=date(2025, 4, 7)
+)
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    """Тест: снимок сохраняется на диск и читается без потерь."""
+    cache = SqliteSnapshotCache(str(tmp_path / "rates.sqlite3"))
+    assert cache.load("latest") is None
+
+    cache.save("latest", SNAPSHOT, ttl=60)
+    assert cache.load("latest") == SNAPSHOT
+
+    cache.save("2025-04-07", SNAPSHOT, ttl=-1)
+    assert cache.load("2025-04-07") is None  # Истёкший снимок не возвращается
+
+
+@pytest.mark.asyncio
+async def test_new_process_warm_starts_from_disk(tmp_path):
+    """Тест: второе хранилище (как в новом процессе) не обращается к ЦБ."""
+    path = str(tmp_path / "rates.sqlite3")
+    first = CrbRequestCurrencyApi(store=RateStore(persistent=SqliteSnapshotCache(path)))
+    first._fetch_rates = AsyncMock(return_value=SNAPSHOT)
+    await first.get_currency_rate("USD")
+    await first.get_currency_rate("USD", on=date(2024, 1, 10))
+
+    second = CrbRequestCurrencyApi(
+        base_currency="USD", store=RateStore(persistent=SqliteSnapshotCache(path))
+    )
+    second._fetch_rates = AsyncMock()
+    snapshot = await second.snapshot()
+    assert snapshot.date == date(2025, 4, 7)
+    assert await second.get_currency_rate("RUB", on=date(2024, 1, 10)) == Decimal(
+        "0.01030"
+    )
+    second._fetch_rates.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_warm_start_keeps_age_of_snapshot_from_disk(tmp_path):
+    """Тест: возраст снимка с диска считается от его загрузки, а не от чтения."""
+    path = str(tmp_path / "rates.sqlite3")
+    SqliteSnapshotCache(path).save("latest", SNAPSHOT, ttl=60)
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("UPDATE snapshots SET fetched_at = fetched_at - 86400")
+
+    store = RateStore(persistent=SqliteSnapshotCache(path), max_staleness=3600)
+    api = CrbRequestCurrencyApi(store=store)
+    api._fetch_rates = AsyncMock(
+        return_value=RateSnapshot(
+            {"RUB": Decimal("1.0"), "USD": Decimal("98")}, date=date(2025, 4, 8)
+        )
+    )
+    assert await api.get_currency_rate("USD") == Decimal("97.1234")
+    assert store.latest_age >= 86400
+
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.execute("UPDATE snapshots SET expires_at = 0")
+    store.cache.clear()  # Имитируем истечение TTL
+    # Снимок суточной давности старше max_staleness и не отдаётся как свежий
+    assert await api.get_currency_rate("USD") == Decimal("98")
+    api._fetch_rates.assert_awaited_once()
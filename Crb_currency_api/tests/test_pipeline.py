@@ -0,0 +1,123 @@
+import asyncio
+import csv
+import json
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.pipeline import ConversionPipeline, convert_file
+from Crb_currency_api.snapshot import RateSnapshot
+
+USD = {date(2024, 1, 12): "89", date(2024, 1, 13): "90"}
+PUBLISHED = {date(2024, 1, 12): date(2024, 1, 12), date(2024, 1, 13): date(2024, 1, 13)}
+PUBLISHED[date(2024, 1, 14)] = date(2024, 1, 13)
+
+
+def make_api() -> CrbRequestCurrencyApi:
+    async def fetch(on=None):
+        day = PUBLISHED[on]
+        rates = {"RUB": Decimal("1"), "USD": Decimal(USD[day]), "EUR": Decimal("100")}
+        return RateSnapshot(rates, date=day)
+
+    api = CrbRequestCurrencyApi(shared=False)
+    api._fetch_rates = AsyncMock(side_effect=fetch)
+    return api
+
+
+@pytest.mark.asyncio
+async def test_convert_file_resolves_each_date_once(tmp_path):
+    source = tmp_path / "transactions.csv"
+    rows = [
+        ("1", "2", "USD", "2024-01-12"),
+        ("2", "1.5", "usd", "2024-01-12T22:00:00+00:00"),  # Суббота по Москве
+        ("3", "10", "EUR", "2024-01-14 09:15"),
+        ("4", "oops", "USD", "2024-01-13"),
+        ("5", "3", "XXX", "2024-01-14"),
+    ]
+    with open(source, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["id", "amount", "currency", "date"])
+        writer.writerows(rows)
+
+    api = make_api()
+    pipeline = ConversionPipeline(
+        api, to_currency="RUB", date_field="date", error_field="error", batch_size=2
+    )
+    target = tmp_path / "converted.jsonl"
+    assert await convert_file(pipeline, str(source), str(target)) == 5
+
+    result = [json.loads(line) for line in target.read_text().splitlines()]
+    assert [row["converted"] for row in result] == [
+        "178.00000",
+        "135.00000",
+        "1000.00000",
+        "",
+        "",
+    ]
+    assert result[3]["error"] == "Некорректная сумма 'oops'"
+    assert "XXX" in result[4]["error"]
+    assert (pipeline.rows, pipeline.errors) == (5, 2)
+    fetched = sorted(call.args[0] for call in api._fetch_rates.await_args_list)
+    assert fetched == [date(2024, 1, 12), date(2024, 1, 13), date(2024, 1, 14)]
+
+    pipeline = ConversionPipeline(api, date_field="date", batch_size=2)
+    with pytest.raises(ValueError, match="Строка 4"):
+        await convert_file(pipeline, str(source), str(tmp_path / "out.csv"))
+
+
+@pytest.mark.asyncio
+async def test_convert_file_writes_csv_rows_with_mixed_keys(tmp_path):
+    """Тест: лишние ключи в следующих строках JSONL не обрывают запись CSV."""
+    source = tmp_path / "transactions.jsonl"
+    rows = [
+        {"amount": "1", "currency": "USD", "date": "2024-01-12"},
+        {"amount": "2", "currency": "USD", "date": "2024-01-12", "note": "x"},
+    ]
+    source.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    pipeline = ConversionPipeline(make_api(), to_currency="RUB", date_field="date")
+    target = tmp_path / "converted.csv"
+
+    assert await convert_file(pipeline, str(source), str(target)) == 2
+    with open(target, newline="") as file:
+        result = list(csv.DictReader(file))
+    assert list(result[0]) == ["amount", "currency", "date", "converted"]
+    assert [row["converted"] for row in result] == ["89.00000", "178.00000"]
+
+
+@pytest.mark.asyncio
+async def test_non_finite_amount_is_a_row_error():
+    """Тест: сумма 'Infinity' — ошибка строки, а не обрыв потока."""
+    pipeline = ConversionPipeline(make_api(), date_field="date", error_field="error")
+    rows = [
+        {"amount": "Infinity", "currency": "USD", "date": "2024-01-12"},
+        {"amount": "1", "currency": "USD", "date": "2024-01-12"},
+    ]
+    result = [row async for row in pipeline.convert(rows)]
+
+    assert result[0]["error"] == "Некорректная сумма 'Infinity'"
+    assert result[1]["converted"] == "89.00000"
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_bounds_rows_read_ahead():
+    read = 0
+
+    async def rows():
+        nonlocal read
+        for index in range(10_000):
+            read += 1
+            yield {"amount": str(index), "currency": "USD", "date": "2024-01-12"}
+
+    pipeline = ConversionPipeline(
+        make_api(), date_field="date", batch_size=100, prefetch=2
+    )
+    batches = pipeline.batches(rows())
+    first = await batches.__anext__()
+    await asyncio.sleep(0.05)
+    assert first[1]["converted"] == "89.00000"
+    # Прочитаны: отданный пакет, очередь из prefetch пакетов и ещё один в работе
+    assert read <= 100 * (2 + 2)
+    await batches.aclose()
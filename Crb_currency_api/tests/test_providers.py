@@ -0,0 +1,86 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.metrics import InMemoryMetrics
+from Crb_currency_api.parsers import XmlParser
+from Crb_currency_api.providers import (
+    CompositeSource,
+    RateProvider,
+    SourceUnavailableError,
+    cbr_json_mirror,
+    cbr_xml,
+    ecb_xml,
+)
+from Crb_currency_api.resilience import RetryPolicy
+from Crb_currency_api.testing import CbrStandIn
+
+RATES = {"RUB": Decimal("1.0"), "USD": Decimal("90.0"), "EUR": Decimal("100.0")}
+TODAY = date(2024, 1, 12)
+NO_RETRIES = RetryPolicy(attempts=1)
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_with_fast_mirror():
+    slow = CbrStandIn(RATES, TODAY, latency=1.0)
+    fast = CbrStandIn(RATES, TODAY, latency=0.02)
+    metrics = InMemoryMetrics()
+    source = CompositeSource(
+        [
+            cbr_xml(transport=slow.transport(), retry_policy=NO_RETRIES),
+            cbr_json_mirror(transport=fast.transport(), retry_policy=NO_RETRIES),
+        ],
+        hedge_delay=0.05,
+        observer=metrics,
+    )
+    api = CrbRequestCurrencyApi(shared=False, source=source)
+
+    start = time.perf_counter()
+    snapshot = await api.snapshot()
+    assert time.perf_counter() - start < 0.5
+    assert snapshot["USD"] == Decimal("90.0")
+    assert snapshot.date == TODAY
+    assert snapshot.provenance.provider == "cbr-json"
+    assert snapshot.provenance.url.endswith("daily_json.js")
+    assert snapshot.provenance.failed == ()
+    assert (slow.requests, fast.requests) == (0, 1)  # Медленный запрос отменён
+    assert metrics.counters["provider_cbr-json_ok"] == 1
+
+    dated = await source.fetch(date(2024, 1, 13))
+    assert dated.date == TODAY
+    assert dated.provenance.url.endswith("/archive/2024/01/13/daily_json.js")
+    await source.aclose()
+
+
+@pytest.mark.asyncio
+async def test_priority_fallback_skips_failed_and_invalid_sources():
+    broken = CbrStandIn(RATES, TODAY, error_rate=1.0)
+    partial = CbrStandIn({"RUB": Decimal("1.0"), "USD": Decimal("90.0")}, TODAY)
+    ecb = CbrStandIn(RATES, TODAY)
+    source = CompositeSource(
+        [
+            cbr_xml(transport=broken.transport(), retry_policy=NO_RETRIES),
+            RateProvider(
+                "partial",
+                "https://mirror.test/XML_daily.asp",
+                XmlParser(),
+                transport=partial.transport(),
+            ),
+            ecb_xml("https://ecb.test/eurofxref-daily.xml", transport=ecb.transport()),
+        ]
+    )
+
+    snapshot = await source.fetch()
+    assert snapshot.provenance.provider == "ecb"
+    assert snapshot.provenance.failed == ("cbr", "partial")
+    assert snapshot["USD"] == Decimal("90.00000000")
+    assert snapshot["EUR"] == Decimal("100.00000000")
+
+    # Курсы на дату отдаёт только cbr, и он недоступен
+    with pytest.raises(SourceUnavailableError) as error:
+        await source.fetch(TODAY)
+    assert set(error.value.errors) == {"cbr"}
+    await source.aclose()
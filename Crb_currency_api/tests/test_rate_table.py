@@ -0,0 +1,59 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+
+from Crb_currency_api.parsers import XmlParser
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.rate_table import RateTable, parse_scaled
+from Crb_currency_api.testing import make_daily_xml
+
+RUB_RATES = {
+    "RUB": Decimal("1.0"),
+    "USD": Decimal("84.7784"),
+    "VND": Decimal("0.00312234"),
+}
+
+
+def test_rate_table_roundtrip_and_shared_index():
+    """Тест: значения восстанавливаются точно, индекс кодов общий."""
+    table = RateTable.from_mapping(RUB_RATES)
+    other_day = RateTable.from_mapping({**RUB_RATES, "USD": Decimal("85")})
+
+    assert table == RUB_RATES
+    assert table.scaled("USD") == 8477840000
+    assert table.codes is other_day.codes
+    assert table.nbytes == 3 * 8
+    with pytest.raises(KeyError):
+        table["XYZ"]
+
+
+def test_rate_table_rejects_inexact_values():
+    """Тест: курс, не представимый с заданным масштабом, не округляется молча."""
+    with pytest.raises(ValueError, match="не представим"):
+        RateTable.from_mapping({"USD": Decimal("1.123456789")})
+    with pytest.raises(ValueError, match="Некорректный курс"):
+        parse_scaled("н/д", 8)
+
+
+def test_compact_parser_emits_rate_table():
+    """Тест: парсер в компактном режиме сразу строит RateTable."""
+    body = make_daily_xml(RUB_RATES, date(2025, 4, 7))
+    snapshot = XmlParser(compact=True).parse_snapshot(body)
+
+    assert snapshot.is_compact
+    assert snapshot == XmlParser().parse_snapshot(body)
+    assert snapshot.convert("USD", "RUB", Decimal("2")) == Decimal("169.5568")
+
+
+@pytest.mark.asyncio
+async def test_store_keeps_compact_history():
+    """Тест: история хранится компактно, включая курсы относительно других баз."""
+    store = RateStore(compact_history=True)
+    fetch = AsyncMock(return_value=RUB_RATES)
+    matrix = await store.get_matrix_on(date(2024, 1, 10), fetch)
+
+    assert matrix.rub_rates.is_compact
+    assert matrix.rates_for("USD").is_compact
+    assert matrix.rates_for("USD").rate("RUB") == Decimal("0.01180")
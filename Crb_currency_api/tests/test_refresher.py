@@ -0,0 +1,72 @@
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+
+from Crb_currency_api.cache_manager import MOSCOW_TZ
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.snapshot import RateSnapshot
+
+
+def make_snapshot(day: int, usd: str) -> RateSnapshot:
+    return RateSnapshot(
+        {"RUB": Decimal("1.0"), "USD": Decimal(usd)}, date=date(2025, 4, day)
+    )
+
+
+def test_next_refresh_follows_moscow_business_days():
+    """Тест расписания: после публикации в пятницу следующее обновление в понедельник."""
+    refresher = CrbRequestCurrencyApi().refresher()
+    wednesday_morning = datetime(2025, 4, 9, 10, 0, tzinfo=MOSCOW_TZ)
+    friday_evening = datetime(2025, 4, 11, 16, 0, tzinfo=MOSCOW_TZ)
+
+    assert refresher.next_refresh_at(wednesday_morning) == datetime(
+        2025, 4, 9, 15, 30, tzinfo=MOSCOW_TZ
+    )
+    assert refresher.next_refresh_at(friday_evening) == datetime(
+        2025, 4, 14, 15, 30, tzinfo=MOSCOW_TZ
+    )
+
+
+@pytest.mark.asyncio
+async def test_expired_cache_serves_stale_snapshot_while_revalidating():
+    """Тест: после истечения кэша отдаётся прежний снимок, новый грузится в фоне."""
+    api = CrbRequestCurrencyApi(shared=False, store=RateStore())
+    api._fetch_rates = AsyncMock(return_value=make_snapshot(7, "80"))
+    refresher = api.refresher(max_staleness=60)
+    assert api.store.max_staleness is None  # Настройки хранилища не меняются
+    refresher.start()
+    assert await api.get_currency_rate("USD") == Decimal("80")
+
+    api.cache.clear()  # Имитируем истечение TTL
+    api._fetch_rates = AsyncMock(return_value=make_snapshot(8, "81"))
+    assert await api.get_currency_rate("USD") == Decimal("80")
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert await api.get_currency_rate("USD") == Decimal("81")
+    api._fetch_rates.assert_awaited_once()
+    await refresher.stop()
+
+
+@pytest.mark.asyncio
+async def test_refresh_retries_until_new_publication():
+    """Тест: обновление повторяется, пока дата публикации не сменится."""
+    api = CrbRequestCurrencyApi()
+    api._fetch_rates = AsyncMock(return_value=make_snapshot(7, "80"))
+    await api.get_currency_rate("USD")
+
+    refresher = api.refresher(retry_interval=0)
+    refresher.fetch = AsyncMock(
+        side_effect=[
+            make_snapshot(7, "80"),
+            ConnectionError("cbr.ru недоступен"),
+            make_snapshot(8, "81"),
+        ]
+    )
+    snapshot = await refresher.refresh()
+    assert snapshot.date == date(2025, 4, 8)
+    assert refresher.fetch.call_count == 3
+    assert await api.get_currency_rate("USD") == Decimal("81")
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from datetime import date
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from Crb_currency_api.api_client import ApiClient
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.metrics import InMemoryMetrics
+from Crb_currency_api.parsers import XmlParser
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from Crb_currency_api.testing import CbrStandIn
+
+TODAY = date(2025, 4, 7)
+RATES = {"RUB": Decimal("1.0"), "USD": Decimal("97.1234"), "EUR": Decimal("102.5678")}
+
+
+def parse(response: httpx.Response):
+    return XmlParser().parse(response.content)
+
+
+async def test_retries_transient_errors_with_backoff():
+    """Тест: ошибки 5xx, 429 и обрывы соединения повторяются до успеха."""
+    stand_in = CbrStandIn(
+        RATES, TODAY, error_rate=0.2, throttle_rate=0.2, disconnect_rate=0.2, seed=7
+    )
+    metrics = InMemoryMetrics()
+    policy = RetryPolicy(attempts=20, backoff=0.001, max_backoff=0.01)
+    async with ApiClient(
+        transport=stand_in.transport(), retry_policy=policy, observer=metrics
+    ) as client:
+        for _ in range(10):
+            assert (await client.get_parsed("http://test.url", parse))["USD"] == (
+                Decimal("97.1234")
+            )
+
+    assert stand_in.errors > 0
+    assert metrics.counters["retries"] == stand_in.errors
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_deadline_bounds_slow_upstream():
+    """Тест: общий срок ограничивает вызов вместе с повторами и таймаутами."""
+    stand_in = CbrStandIn(RATES, TODAY, latency=5.0)
+    policy = RetryPolicy(attempts=10, backoff=0.01, deadline=0.2)
+    async with ApiClient(transport=stand_in.transport(), retry_policy=policy) as client:
+        start = time.monotonic()
+        with pytest.raises(httpx.TimeoutException):
+            await client.get("http://test.url")
+        assert time.monotonic() - start < 1.0
+    assert stand_in.timeouts >= 1
+
+
+async def test_circuit_breaker_fails_fast_and_recovers():
+    """Тест: после серии неудач запросы не отправляются до пробного вызова."""
+    stand_in = CbrStandIn(RATES, TODAY, error_rate=1.0)
+    metrics = InMemoryMetrics()
+    async with ApiClient(
+        transport=stand_in.transport(),
+        retry_policy=RetryPolicy(attempts=1),
+        circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.05),
+        observer=metrics,
+    ) as client:
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.get("http://test.url")
+        with pytest.raises(CircuitOpenError):
+            await client.get("http://test.url")
+        assert stand_in.requests == 2
+
+        stand_in.error_rate = 0.0
+        await asyncio.sleep(0.06)
+        assert (await client.get("http://test.url")).status_code == 200
+
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert metrics.counters["circuit_open"] == 1
+    assert metrics.counters["circuit_closed"] == 1
+    assert metrics.counters["circuit_rejected"] == 1
+
+
+async def test_open_circuit_serves_last_good_snapshot():
+    """Тест: пока предохранитель разомкнут, отдаётся последний снимок."""
+    stand_in = CbrStandIn(RATES, TODAY)
+    client = ApiClient(
+        transport=stand_in.transport(),
+        circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+    )
+    async with CrbRequestCurrencyApi("RUB", store=RateStore(), client=client) as api:
+        assert await api.get_currency_rate("USD") == Decimal("97.12340")
+        api.store.cache.clear()
+        client.breaker.record_failure()
+
+        assert await api.get_currency_rate("USD") == Decimal("97.12340")
+        with pytest.raises(CircuitOpenError):
+            await CrbRequestCurrencyApi(
+                "RUB", store=RateStore(), client=client
+            ).get_currency_rate("USD")
+    assert stand_in.requests == 1
+
+
+async def test_hedged_request_cuts_tail_latency():
+    """Тест: медленный ответ дублируется, и побеждает быстрый дубль."""
+    # seed=1: первый запрос попадает в медленные, второй — нет
+    stand_in = CbrStandIn(RATES, TODAY, slow_rate=0.5, slow_latency=5.0, seed=1)
+    metrics = InMemoryMetrics()
+    policy = RetryPolicy(hedge_after=0.05)
+    async with ApiClient(
+        transport=stand_in.transport(), retry_policy=policy, observer=metrics
+    ) as client:
+        start = time.monotonic()
+        assert (await client.get("http://test.url")).status_code == 200
+        assert time.monotonic() - start < 1.0
+
+    assert metrics.counters["hedged_requests"] == 1
+    assert stand_in.requests == 1
@@ -0,0 +1,82 @@
+import asyncio
+import mmap
+import subprocess
+import sys
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.shared_snapshot import SharedSnapshotFile
+from Crb_currency_api.snapshot import RateSnapshot
+
+TODAY = date(2025, 4, 7)
+RUB_RATES = {
+    "RUB": Decimal("1.0"),
+    "USD": Decimal("97.1234"),
+    "EUR": Decimal("102.5678"),
+}
+
+
+def test_publish_and_map_without_copying(tmp_path):
+    """Тест: опубликованный снимок читается другим экземпляром прямо из mmap."""
+    path = str(tmp_path / "rates")
+    writer, reader = SharedSnapshotFile(path), SharedSnapshotFile(path)
+    assert reader.current() is None
+
+    assert writer.publish(RateSnapshot(RUB_RATES, date=TODAY), ttl=60) == 1
+    snapshot = reader.current()
+    assert snapshot == RUB_RATES
+    assert snapshot.date == TODAY
+    assert snapshot.convert("EUR", "USD", Decimal(1)) == Decimal("1.05606")
+    assert reader.current() is snapshot
+    assert isinstance(snapshot._rates._values.obj, mmap.mmap)
+
+    writer.publish(RateSnapshot({**RUB_RATES, "USD": Decimal("98")}), ttl=0)
+    assert reader.current() is None
+    assert reader.current(allow_expired=True)["USD"] == Decimal("98")
+    assert snapshot["USD"] == Decimal("97.1234")  # старое отображение не изменилось
+
+
+async def test_workers_share_one_fetch(tmp_path):
+    """Тест: хранилища разных «процессов» загружают курсы один раз на всех."""
+    path = str(tmp_path / "rates")
+    fetch = AsyncMock(return_value=RateSnapshot(RUB_RATES, date=TODAY))
+
+    async def slow_fetch():
+        await asyncio.sleep(0.1)
+        return await fetch()
+
+    stores = [RateStore(shared_file=SharedSnapshotFile(path)) for _ in range(4)]
+    for store in stores:
+        store.SHARED_POLL = 0.01
+    snapshots = await asyncio.gather(*(store.get_rates(slow_fetch) for store in stores))
+
+    assert fetch.await_count == 1
+    assert all(snapshot == RUB_RATES for snapshot in snapshots)
+
+    fetch.return_value = RateSnapshot({**RUB_RATES, "USD": Decimal("98")}, date=TODAY)
+    await stores[0].refresh(fetch)
+    matrix = await stores[1].get_matrix(fetch)
+    assert matrix.rub_rates["USD"] == Decimal("98")
+    assert stores[1].current_matrix() is matrix
+    assert fetch.await_count == 2
+
+
+def test_snapshot_visible_to_another_process(tmp_path):
+    """Тест: снимок, опубликованный процессом, читается из другого процесса."""
+    path = str(tmp_path / "rates")
+    SharedSnapshotFile(path).publish(RateSnapshot(RUB_RATES, date=TODAY), ttl=60)
+    script = (
+        "import sys\n"
+        "from Crb_currency_api.shared_snapshot import SharedSnapshotFile\n"
+        "snapshot = SharedSnapshotFile(sys.argv[1]).current()\n"
+        "print(snapshot.date, snapshot['USD'])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script, path],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.split() == ["2025-04-07", "97.12340000"]
@@ -0,0 +1,61 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.snapshot import RateSnapshot
+
+RUB_RATES = {
+    "RUB": Decimal("1.0"),
+    "USD": Decimal("97.1234"),
+    "EUR": Decimal("102.5678"),
+}
+
+
+def test_snapshot_is_immutable_and_hashable():
+    """Тест: снимок нельзя изменить, а равные снимки имеют равный хэш."""
+    snap = RateSnapshot(RUB_RATES, date=date(2025, 4, 7))
+    same = RateSnapshot(dict(RUB_RATES), date=date(2025, 4, 7))
+    other_day = RateSnapshot(RUB_RATES, date=date(2025, 4, 8))
+
+    assert snap == same and hash(snap) == hash(same)
+    assert snap != other_day
+    assert len({snap, same, other_day}) == 2
+    with pytest.raises(AttributeError):
+        snap.base = "USD"
+    with pytest.raises(TypeError):
+        snap["USD"] = Decimal("1")
+
+
+def test_snapshot_rate_and_convert():
+    """Тест синхронных rate() и convert() снимка."""
+    snap = RateSnapshot(RUB_RATES)
+    assert snap.rate("USD") == Decimal("97.1234")
+    assert snap.convert("USD", "RUB", Decimal("2")) == Decimal("194.2468")
+    assert snap.convert("USD", "USD", Decimal("3")) == Decimal("3")
+    with pytest.raises(ValueError, match="Валюта XYZ не найдена"):
+        snap.rate("XYZ")
+    with pytest.raises(ValueError, match="слишком велика"):
+        snap.convert("USD", "RUB", Decimal("1e30"))
+    with pytest.raises(ValueError, match="Некорректная сумма"):
+        snap.convert("USD", "RUB", Decimal("Infinity"))
+
+
+@pytest.mark.asyncio
+async def test_api_snapshot_matches_async_methods():
+    """Тест: методы API совпадают с результатами снимка."""
+    api = CrbRequestCurrencyApi(base_currency="USD")
+    api._fetch_rates = AsyncMock(
+        return_value=RateSnapshot(RUB_RATES, date=date(2025, 4, 7))
+    )
+
+    snap = await api.snapshot()
+    assert snap.base == "USD"
+    assert snap.date == date(2025, 4, 7)
+    assert await api.snapshot() is snap
+    assert await api.get_currency_rate("EUR") == snap.rate("EUR")
+    assert await api.exchange("EUR", "RUB", Decimal("10")) == snap.convert(
+        "EUR", "RUB", Decimal("10")
+    )
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from Crb_currency_api.api_client import ApiClient
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.sync_api import SyncCrbCurrencyApi, close_sync
+from Crb_currency_api.testing import CbrStandIn
+
+TODAY = date(2025, 4, 7)
+RATES = {"RUB": Decimal("1.0"), "USD": Decimal("97.1234"), "EUR": Decimal("102.5678")}
+
+
+@pytest.fixture
+def stand_in():
+    stand_in = CbrStandIn(RATES, TODAY, latency=0.05)
+    yield stand_in
+    close_sync()
+
+
+def make_api(stand_in, store, base="RUB"):
+    return SyncCrbCurrencyApi(
+        base, store=store, client=ApiClient(transport=stand_in.transport())
+    )
+
+
+def test_sync_api_threads_share_one_fetch(stand_in):
+    store = RateStore()
+    apis = [make_api(stand_in, store, base) for base in ("RUB", "USD", "EUR")]
+
+    def lookup(i):
+        return apis[i % 3].get_currency_rate("USD")
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lookup, range(64)))
+
+    assert stand_in.requests == 1
+    assert set(results) == {Decimal("97.1234"), Decimal("1"), Decimal("0.94692")}
+
+
+def test_sync_api_cached_lookups_skip_event_loop(stand_in, monkeypatch):
+    api = make_api(stand_in, RateStore())
+    assert api.exchange("USD", "EUR", Decimal("100")) == Decimal("94.69190")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Запрос к фоновому циклу при актуальном кэше")
+
+    monkeypatch.setattr(api, "_run", fail)
+    assert api.get_currency_rate("EUR") == Decimal("102.5678")
+
+
+def test_sync_api_errors_propagate(stand_in):
+    api = make_api(stand_in, RateStore())
+    with pytest.raises(ValueError):
+        api.get_currency_rate("XXX")
+    with pytest.raises(ValueError):
+        make_api(stand_in, api.store, "XXX").snapshot()
+
+
+def test_sync_api_default_runtime_is_shared():
+    try:
+        assert SyncCrbCurrencyApi().store is SyncCrbCurrencyApi("USD").store
+    finally:
+        close_sync()
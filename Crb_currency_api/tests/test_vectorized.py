@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+
+from Crb_currency_api.cache_manager import MOSCOW_TZ
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.snapshot import RateSnapshot
+
+np = pytest.importorskip("numpy")
+vectorized = pytest.importorskip("Crb_currency_api.vectorized")
+
+RUB_RATES = {
+    "RUB": Decimal("1.0"),
+    "USD": Decimal("97.1234"),
+    "EUR": Decimal("102.5678"),
+    "CNY": Decimal("13.4567"),
+}
+
+
+def test_convert_array_matches_exchange():
+    """Тест: точный режим совпадает с convert(), float64 — с точностью float."""
+    snapshot = RateSnapshot(RUB_RATES)
+    amounts = np.array(["100", "0.5", "12345.678", "7"], dtype=object)
+    sources = np.array(["USD", "EUR", "CNY", "USD"])
+    targets = np.array(["EUR", "RUB", "USD", "USD"])
+
+    exact = vectorized.convert_array(snapshot, amounts, sources, targets, exact=True)
+    expected = [
+        snapshot.convert(source, target, Decimal(amount))
+        for amount, source, target in zip(amounts, sources, targets)
+    ]
+    assert exact.tolist() == expected
+
+    fast = vectorized.convert_array(snapshot, amounts.astype(float), sources, targets)
+    assert fast.dtype == np.float64
+    # float64 не округляет до 5 знаков: отличие не больше половины последнего знака
+    np.testing.assert_allclose(fast, [float(value) for value in expected], atol=5e-6)
+
+    single = vectorized.convert_array(snapshot, np.arange(3.0), "USD", "RUB")
+    np.testing.assert_allclose(single, [0.0, 97.1234, 194.2468])
+    with pytest.raises(ValueError, match="XXX"):
+        vectorized.convert_array(snapshot, [1.0], ["XXX"], "RUB")
+
+
+async def test_exchange_array_with_per_row_dates():
+    """Тест: курсы берутся на дату каждой строки, недостающие даты загружаются."""
+    days = {
+        date(2025, 4, 4): {**RUB_RATES, "USD": Decimal("84")},
+        date(2025, 4, 7): RUB_RATES,
+    }
+    api = CrbRequestCurrencyApi("RUB", store=RateStore(), shared=False)
+    api._fetch_rates = AsyncMock(side_effect=lambda on=None: days[on])
+
+    result = await api.exchange_array(
+        np.array([1, 2, 3], dtype=object),
+        "USD",
+        "RUB",
+        dates=np.array(
+            ["2025-04-04", "2025-04-07", "2025-04-04"], dtype="datetime64[D]"
+        ),
+        exact=True,
+    )
+
+    assert result.tolist() == [
+        Decimal("84.00000"),
+        Decimal("194.24680"),
+        Decimal("252.00000"),
+    ]
+    assert api._fetch_rates.await_count == 2
+    with pytest.raises(ValueError, match="не загружены"):
+        vectorized.convert_dated_array(
+            api.store.history, ["2025-04-08"], [1.0], "USD", "RUB"
+        )
+
+
+async def test_exchange_array_row_dated_today_uses_current_rates():
+    """Тест: строка на сегодня конвертируется по актуальному снимку."""
+    today = datetime.now(MOSCOW_TZ).date()
+    yesterday = today - timedelta(days=1)
+    snapshots = {
+        None: RateSnapshot(RUB_RATES, date=today),
+        yesterday: RateSnapshot({**RUB_RATES, "USD": Decimal("84")}, date=yesterday),
+    }
+    api = CrbRequestCurrencyApi("RUB", store=RateStore(), shared=False)
+    api._fetch_rates = AsyncMock(side_effect=lambda on=None: snapshots[on])
+
+    result = await api.exchange_array(
+        np.array([1, 1], dtype=object),
+        "USD",
+        "RUB",
+        dates=[today, yesterday],
+        exact=True,
+    )
+
+    assert result.tolist() == [Decimal("97.12340"), Decimal("84.00000")]
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import pytest
+
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.snapshot import RateSnapshot
+
+
+def make_snapshot(day: int, usd: str, eur: str = "100") -> RateSnapshot:
+    rates = {"RUB": Decimal("1.0"), "USD": Decimal(usd), "EUR": Decimal(eur)}
+    return RateSnapshot(rates, date=date(2025, 4, day))
+
+
+@pytest.mark.asyncio
+async def test_subscribers_share_one_fetch_and_get_only_changes():
+    """Тест: одна загрузка рассылается всем подписчикам, отдаются только изменения."""
+    store = RateStore()
+    rub = CrbRequestCurrencyApi(shared=False, store=store)
+    usd = CrbRequestCurrencyApi("USD", shared=False, store=store)
+    fetch = AsyncMock(return_value=make_snapshot(7, "80"))
+    rub._fetch_rates = usd._fetch_rates = fetch
+
+    rub_updates = rub.watch(codes=["usd"], initial=True, refresh=False)
+    usd_updates = usd.watch(refresh=False)
+    first = await rub_updates.__anext__()
+    assert first.changes == {"USD": (None, Decimal("80.00000"))}
+    usd_next = asyncio.ensure_future(usd_updates.__anext__())
+    await asyncio.sleep(0)
+
+    fetch.return_value = make_snapshot(8, "80", "110")  # USD не изменился
+    await store.refresh(fetch)
+    fetch.return_value = make_snapshot(9, "81", "110")
+    await store.refresh(fetch)
+
+    update = await rub_updates.__anext__()
+    assert update.date == date(2025, 4, 9)
+    assert update.changes == {"USD": (Decimal("80.00000"), Decimal("81.00000"))}
+    update = await usd_next
+    assert update.date == date(2025, 4, 8)
+    assert update.changes == {
+        "EUR": (Decimal("1.25000"), Decimal("1.37500")),
+    }
+    assert fetch.await_count == 3
+
+    await rub_updates.aclose()
+    await usd_updates.aclose()
+    assert not store.subscriptions
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_queue_is_bounded_and_refresher_is_shared():
+    """Тест: очередь медленного подписчика ограничена, обновление одно на хранилище."""
+    store = RateStore()
+    api = CrbRequestCurrencyApi(shared=False, store=store)
+    api._fetch_rates = AsyncMock(return_value=make_snapshot(7, "80"))
+
+    updates = api.watch(codes=["USD"], maxsize=2)
+    waiting = asyncio.ensure_future(updates.__anext__())
+    await asyncio.sleep(0.01)
+    refresher = store.refresher
+    assert refresher is not None and refresher.running
+    other = api.watch()
+    other_next = asyncio.ensure_future(other.__anext__())
+    await asyncio.sleep(0.01)
+    assert store.refresher is refresher  # Вторая подписка не запустила обновление
+
+    subscription = next(s for s in store.subscriptions if s.maxsize == 2)
+    for day in range(8, 18):
+        api._fetch_rates.return_value = make_snapshot(day, str(80 + day))
+        await store.refresh(api._fetch_rates)
+    assert len(subscription) <= 2
+    assert subscription.dropped >= 7
+
+    update = await waiting
+    assert update.changes["USD"][0] == Decimal("80.00000")
+    other_update = await other_next
+    assert other_update.changes["USD"][0] == Decimal("80.00000")
+
+    await updates.aclose()
+    assert store.refresher is refresher and refresher.running
+    await other.aclose()
+    assert store.refresher is None and not refresher.running
+
+
+@pytest.mark.asyncio
+async def test_watch_session_leaves_store_settings_unchanged():
+    """Тест: после подписки хранилище снова не отдаёт устаревшие снимки."""
+    store = RateStore()
+    api = CrbRequestCurrencyApi(shared=False, store=store)
+    api._fetch_rates = AsyncMock(return_value=make_snapshot(7, "80"))
+
+    updates = api.watch(initial=True)
+    await updates.__anext__()
+    assert store.refresher is not None
+    await updates.aclose()
+    assert store.max_staleness is None and store.refresher is None
+
+    store.cache.clear()  # Имитируем истечение TTL
+    api._fetch_rates.return_value = make_snapshot(8, "81")
+    assert await api.get_currency_rate("USD") == Decimal("81")
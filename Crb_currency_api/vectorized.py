@@ -0,0 +1,260 @@
+"""Векторная конвертация столбцов сумм на NumPy.
+
+Коды валют отображаются в целые индексы вектора курсов снимка (или матрицы
+«дата × валюта» для построчных дат), после чего конвертация выполняется над
+массивами целиком. Режим float64 — быстрый; точный режим вычисляет курс
+каждой встречающейся пары (даты) через Decimal один раз и даёт те же
+результаты, что и RateSnapshot.convert().
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Mapping, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError as error:  # pragma: no cover - зависит от окружения
+    raise ImportError(
+        "Для векторной конвертации нужен NumPy: pip install numpy"
+    ) from error
+
+from Crb_currency_api.cross_rates import CrossRateMatrix
+from Crb_currency_api.rate_table import intern_codes
+from Crb_currency_api.snapshot import RATE_QUANTUM
+
+Rates = Union[CrossRateMatrix, Mapping[str, Decimal]]
+Codes = Union[str, Sequence[str], "np.ndarray"]
+
+
+class RateVector:
+    """Курсы одного снимка относительно RUB в виде вектора float64.
+
+    Атрибуты:
+        codes (Tuple[str, ...]): Коды валют в порядке вектора.
+        index (Dict[str, int]): Позиция каждого кода в векторе.
+        values (np.ndarray): Курсы относительно RUB (float64).
+    """
+
+    def __init__(self, rub_rates: Mapping[str, Decimal]):
+        """Построить вектор курсов.
+
+        Аргументы:
+            rub_rates (Mapping[str, Decimal]): Курсы валют относительно RUB.
+        """
+        self.codes, self.index = intern_codes(rub_rates)
+        self.values = np.fromiter(
+            (float(rub_rates[code]) for code in self.codes),
+            dtype=np.float64,
+            count=len(self.codes),
+        )
+
+
+def rate_vector(rates: Rates) -> RateVector:
+    """Получить вектор курсов снимка; для матрицы кросс-курсов он кэшируется.
+
+    Аргументы:
+        rates (Rates): Матрица кросс-курсов или курсы относительно RUB.
+
+    Возвращает:
+        RateVector: Вектор курсов относительно RUB.
+    """
+    if not isinstance(rates, CrossRateMatrix):
+        return RateVector(rates)
+    vector = rates._vector
+    if vector is None:
+        vector = rates._vector = RateVector(rates.rub_rates)
+    return vector
+
+
+def _code_indices(codes: Codes, index: Dict[str, int]) -> "np.ndarray":
+    """Отобразить коды валют в индексы вектора курсов.
+
+    Каждый различный код ищется в индексе один раз.
+
+    Аргументы:
+        codes (Codes): Код валюты или массив кодов.
+        index (Dict[str, int]): Позиции кодов.
+
+    Возвращает:
+        np.ndarray: Индексы той же формы, что и codes.
+
+    Исключения:
+        ValueError: Если валюта не найдена в данных ЦБ.
+    """
+    if isinstance(codes, str):
+        if codes not in index:
+            raise ValueError(f"Валюта {codes} не найдена в данных ЦБ")
+        return np.intp(index[codes])
+    array = np.asarray(codes)
+    unique, inverse = np.unique(array, return_inverse=True)
+    lookup = np.fromiter(
+        (index.get(code, -1) for code in unique.tolist()),
+        dtype=np.intp,
+        count=len(unique),
+    )
+    if (lookup < 0).any():
+        missing = unique[np.argmax(lookup < 0)]
+        raise ValueError(f"Валюта {missing} не найдена в данных ЦБ")
+    return lookup[inverse].reshape(array.shape)
+
+
+def _to_decimal(value: Any) -> Decimal:
+    """Преобразовать элемент массива сумм в Decimal без двоичной погрешности."""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    return Decimal(value)
+
+
+_as_decimal = np.frompyfunc(_to_decimal, 1, 1)
+_times_rate = np.frompyfunc(
+    lambda rate, amount: (rate * amount).quantize(RATE_QUANTUM), 2, 1
+)
+
+
+def _convert(
+    matrices: List[CrossRateMatrix],
+    days: "np.ndarray",
+    amounts: Any,
+    from_codes: Codes,
+    to_codes: Codes,
+    exact: bool,
+) -> "np.ndarray":
+    """Сконвертировать суммы по курсам снимков, выбранных индексами days.
+
+    Аргументы:
+        matrices (List[CrossRateMatrix]): Снимки курсов.
+        days (np.ndarray): Индекс снимка для каждой строки (или скаляр).
+        amounts: Суммы.
+        from_codes (Codes): Исходные валюты.
+        to_codes (Codes): Целевые валюты.
+        exact (bool): Точный режим Decimal.
+
+    Возвращает:
+        np.ndarray: Сконвертированные суммы.
+
+    Исключения:
+        ValueError: Если валюта не найдена в снимке на дату строки.
+    """
+    vectors = [rate_vector(matrix) for matrix in matrices]
+    codes = vectors[0].codes
+    if all(vector.codes is codes for vector in vectors):
+        index = vectors[0].index
+        table = np.stack([vector.values for vector in vectors])
+    else:
+        union: Dict[str, int] = {}
+        for vector in vectors:
+            for code in vector.codes:
+                union.setdefault(code, len(union))
+        codes, index = tuple(union), union
+        table = np.full((len(vectors), len(union)), np.nan)
+        for row, vector in enumerate(vectors):
+            table[row, [union[code] for code in vector.codes]] = vector.values
+    from_index = _code_indices(from_codes, index)
+    to_index = _code_indices(to_codes, index)
+    from_rates = table[days, from_index]
+    to_rates = table[days, to_index]
+    if np.isnan(from_rates).any() or np.isnan(to_rates).any():
+        raise ValueError("Валюта не найдена в данных ЦБ на дату строки")
+    if not exact:
+        return np.asarray(amounts, dtype=np.float64) * (from_rates / to_rates)
+
+    amounts = _as_decimal(np.asarray(amounts, dtype=object))
+    days, from_index, to_index, amounts = np.broadcast_arrays(
+        days, from_index, to_index, amounts
+    )
+    size = len(codes)
+    keys = (days.astype(np.int64) * size + from_index) * size + to_index
+    unique, inverse = np.unique(keys, return_inverse=True)
+    pair_rates = np.empty(len(unique), dtype=object)
+    for position, key in enumerate(unique.tolist()):
+        day, pair = divmod(key, size * size)
+        from_code, to_code = divmod(pair, size)
+        pair_rates[position] = matrices[day].pair(codes[from_code], codes[to_code])
+    result = np.asarray(
+        _times_rate(pair_rates[inverse.reshape(keys.shape)], amounts), dtype=object
+    )
+    same = from_index == to_index
+    result[same] = amounts[same]  # Как convert(): сумма в той же валюте не округляется
+    return result
+
+
+def convert_array(
+    rates: Rates,
+    amounts: Any,
+    from_codes: Codes,
+    to_codes: Codes,
+    exact: bool = False,
+) -> "np.ndarray":
+    """Сконвертировать массив сумм по курсам одного снимка.
+
+    Аргументы:
+        rates (Rates): Матрица кросс-курсов или курсы относительно RUB.
+        amounts: Суммы (массив NumPy, последовательность или число).
+        from_codes (Codes): Исходная валюта или массив валют по строкам.
+        to_codes (Codes): Целевая валюта или массив валют по строкам.
+        exact (bool): Точный режим: Decimal с точностью до 5 знаков, как в
+            exchange() (по умолчанию: float64 без округления).
+
+    Возвращает:
+        np.ndarray: Суммы в целевых валютах (float64 или object с Decimal).
+
+    Исключения:
+        ValueError: Если валюта не найдена в данных ЦБ.
+    """
+    if not isinstance(rates, CrossRateMatrix):
+        rates = CrossRateMatrix(rates)
+    return _convert([rates], np.intp(0), amounts, from_codes, to_codes, exact)
+
+
+def convert_dated_array(
+    history: Mapping[date, Rates],
+    dates: Any,
+    amounts: Any,
+    from_codes: Codes,
+    to_codes: Codes,
+    exact: bool = False,
+) -> "np.ndarray":
+    """Сконвертировать массив сумм по курсам на дату каждой строки.
+
+    Аргументы:
+        history (Mapping[date, Rates]): Загруженные курсы по датам, например
+            RateStore.history.
+        dates: Даты строк (datetime64, date или строки 'YYYY-MM-DD').
+        amounts: Суммы.
+        from_codes (Codes): Исходная валюта или массив валют по строкам.
+        to_codes (Codes): Целевая валюта или массив валют по строкам.
+        exact (bool): Точный режим Decimal (по умолчанию: float64).
+
+    Возвращает:
+        np.ndarray: Суммы в целевых валютах.
+
+    Исключения:
+        ValueError: Если курсы на дату не загружены или валюта не найдена.
+    """
+    unique, days = unique_dates(dates)
+    missing = [on for on in unique if on not in history]
+    if missing:
+        raise ValueError(f"Курсы на даты {missing[:5]} не загружены")
+    matrices = []
+    for on in unique:
+        rates = history[on]
+        matrices.append(
+            rates if isinstance(rates, CrossRateMatrix) else CrossRateMatrix(rates)
+        )
+    return _convert(matrices, days, amounts, from_codes, to_codes, exact)
+
+
+def unique_dates(dates: Any) -> Tuple[List[date], "np.ndarray"]:
+    """Получить различные даты столбца и индекс даты для каждой строки.
+
+    Аргументы:
+        dates: Даты строк.
+
+    Возвращает:
+        Tuple[List[date], np.ndarray]: Различные даты по возрастанию и индексы.
+    """
+    days = np.asarray(dates, dtype="datetime64[D]")
+    unique, inverse = np.unique(days, return_inverse=True)
+    return unique.astype(object).tolist(), inverse.reshape(days.shape)
@@ -0,0 +1,113 @@
+"""Подписка на смену публикаций курсов вместо опроса по таймеру.
+
+RateStore рассылает каждый новый снимок актуальных курсов всем подпискам
+(RateSubscription): одна загрузка — сколько угодно подписчиков. Очередь каждой
+подписки ограничена; если подписчик не успевает, из неё выбрасываются самые
+старые снимки, так что память не растёт, а подписчик получает актуальное
+состояние. Изменения конкретных валют вычисляет CrbRequestCurrencyApi.watch(),
+сравнивая новый снимок с последними отданными подписчику курсами.
+"""
+
+import asyncio
+from collections import deque
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING, Deque, Dict, Optional, Tuple
+
+from Crb_currency_api.snapshot import RateSnapshot
+
+if TYPE_CHECKING:
+    from Crb_currency_api.refresher import RateRefresher
+
+
+class RateUpdate:
+    """Изменение курсов между двумя публикациями.
+
+    Атрибуты:
+        date (Optional[date]): Дата новой публикации.
+        changes (Dict[str, Tuple[Optional[Decimal], Optional[Decimal]]]):
+            Изменившиеся валюты: код → (прежний курс, новый курс); None вместо
+            прежнего курса — валюта появилась, вместо нового — исчезла.
+        snapshot (RateSnapshot): Новый снимок курсов относительно RUB.
+    """
+
+    __slots__ = ("date", "changes", "snapshot")
+
+    def __init__(
+        self,
+        date: Optional[date],
+        changes: Dict[str, Tuple[Optional[Decimal], Optional[Decimal]]],
+        snapshot: RateSnapshot,
+    ):
+        self.date = date
+        self.changes = changes
+        self.snapshot = snapshot
+
+    def __repr__(self) -> str:
+        return f"RateUpdate(date={self.date!r}, changes={self.changes!r})"
+
+
+class RateSubscription:
+    """Ограниченная очередь новых снимков одного подписчика.
+
+    Атрибуты:
+        maxsize (int): Максимальное число снимков в очереди.
+        dropped (int): Сколько старых снимков выброшено из-за медленного
+            подписчика.
+        closed (bool): Подписка закрыта; новые снимки не принимаются.
+        refresher (Optional[RateRefresher]): Фоновое обновление, запущенное
+            ради подписок; его останавливает последняя закрывшаяся подписка.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        """Инициализировать подписку.
+
+        Аргументы:
+            maxsize (int): Максимальное число снимков в очереди (по умолчанию: 16).
+
+        Исключения:
+            ValueError: Если maxsize меньше 1.
+        """
+        if maxsize < 1:
+            raise ValueError("Размер очереди подписки должен быть не меньше 1")
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self.refresher: Optional["RateRefresher"] = None
+        self._pending: Deque[RateSnapshot] = deque()
+        self._ready = asyncio.Event()
+
+    def push(self, snapshot: RateSnapshot) -> None:
+        """Добавить новый снимок, не блокируя публикующего.
+
+        Аргументы:
+            snapshot (RateSnapshot): Новый снимок курсов относительно RUB.
+        """
+        if self.closed:
+            return
+        if len(self._pending) >= self.maxsize:
+            self._pending.popleft()
+            self.dropped += 1
+        self._pending.append(snapshot)
+        self._ready.set()
+
+    async def get(self) -> Optional[RateSnapshot]:
+        """Дождаться следующего снимка.
+
+        Возвращает:
+            Optional[RateSnapshot]: Снимок или None, если подписка закрыта.
+        """
+        while not self._pending:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.popleft()
+
+    def close(self) -> None:
+        """Закрыть подписку и разбудить ожидающего подписчика."""
+        self.closed = True
+        self._ready.set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
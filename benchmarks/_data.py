@@ -0,0 +1,30 @@
+"""Синтетические данные для бенчмарков."""
+
+import random
+from decimal import Decimal
+from typing import Dict, List
+
+# Коды валют из ежедневного фида ЦБ
+CURRENCY_CODES: List[str] = [
+    "AUD", "AZN", "GBP", "AMD", "BYN", "BGN", "BRL", "HUF", "VND", "HKD",
+    "GEL", "DKK", "AED", "USD", "EUR", "EGP", "INR", "IDR", "KZT", "CAD",
+    "QAR", "KGS", "CNY", "MDL", "NZD", "NOK", "PLN", "RON", "XDR", "SGD",
+    "TJS", "THB", "TRY", "TMT", "UZS", "UAH", "CZK", "SEK", "CHF", "RSD",
+    "ZAR", "KRW", "JPY",
+]  # fmt: skip
+
+
+def make_rub_rates(seed: int = 0) -> Dict[str, Decimal]:
+    """Сгенерировать снимок курсов относительно RUB.
+
+    Аргументы:
+        seed (int): Зерно генератора случайных чисел.
+
+    Возвращает:
+        Dict[str, Decimal]: Курсы валют относительно RUB.
+    """
+    rng = random.Random(seed)
+    rates = {"RUB": Decimal("1.0")}
+    for code in CURRENCY_CODES:
+        rates[code] = Decimal(f"{rng.uniform(0.001, 150):.4f}")
+    return rates
@@ -0,0 +1,129 @@
+"""Бенчмарк архива истории курсов: произвольный доступ и сканирование диапазонов.
+
+Архив за N лет (по умолчанию 10) по всем валютам фида строится из
+синтетических публикаций рабочих дней, затем сравниваются:
+- импорт публикаций XML_daily (на выборке) и дописывание через append();
+- курсы на случайный день: разбор XML_daily (на выборке), rates_on() и
+  day_view() без копирования;
+- курсы одной валюты за весь архив: series() в Decimal, сумма по column()
+  без копирования и NumPy поверх тех же memoryview.
+
+Запуск: python -m benchmarks.bench_archive [лет]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmarks._data import make_rub_rates
+from Crb_currency_api.history_archive import HistoryArchive, import_daily
+from Crb_currency_api.parsers import XmlParser
+from Crb_currency_api.testing import make_daily_xml
+
+START = date(2014, 1, 1)
+SAMPLE = 500
+LOOKUPS = 100_000
+
+
+def report(name: str, count: int, elapsed: float, unit: str = "операций/с") -> None:
+    print(f"{name:34} {count / elapsed:>14,.0f} {unit}")
+
+
+def run(years: int) -> None:
+    days = [
+        START + timedelta(days=offset)
+        for offset in range(years * 365)
+        if (START + timedelta(days=offset)).weekday() < 5
+    ]
+    publications = {on: make_rub_rates(seed=on.toordinal()) for on in days}
+    payloads = [make_daily_xml(publications[on], on) for on in days[:SAMPLE]]
+
+    with tempfile.TemporaryDirectory() as directory:
+        with HistoryArchive(os.path.join(directory, "sample.crbh"), True) as archive:
+            start = time.perf_counter()
+            import_daily(archive, payloads)
+            report("import_daily (XML_daily)", SAMPLE, time.perf_counter() - start)
+
+        path = os.path.join(directory, "history.crbh")
+        with HistoryArchive(path, writable=True) as archive:
+            start = time.perf_counter()
+            for on in days:
+                archive.append(publications[on], on)
+            report("append()", len(days), time.perf_counter() - start)
+        print(
+            f"{'размер архива':34} {os.path.getsize(path) / 2**20:>14.1f} МиБ "
+            f"({len(days)} публикаций, {len(publications[days[0]])} валют)"
+        )
+
+        archive = HistoryArchive(path)
+        rng = random.Random(0)
+        span = (archive.end - archive.start).days
+        lookups = [
+            archive.start + timedelta(days=rng.randrange(span)) for _ in range(LOOKUPS)
+        ]
+
+        parser = XmlParser()
+        start = time.perf_counter()
+        for payload in payloads:
+            parser.parse_snapshot(payload)
+        report("случайный день: разбор XML", SAMPLE, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for on in lookups:
+            archive.rates_on(on)["USD"]
+        report("случайный день: rates_on()", LOOKUPS, time.perf_counter() - start)
+
+        usd = archive.codes.index("USD") + 1
+        start = time.perf_counter()
+        for on in lookups:
+            archive.day_view(on)[usd]
+        report("случайный день: day_view()", LOOKUPS, time.perf_counter() - start)
+
+        scans = 20
+        first, last = archive.start, archive.end
+        start = time.perf_counter()
+        for _ in range(scans):
+            archive.series("USD", first, last)
+        report(
+            "диапазон: series() Decimal",
+            scans * span,
+            time.perf_counter() - start,
+            "дней/с",
+        )
+
+        scans = 200
+        start = time.perf_counter()
+        for _ in range(scans):
+            sum(sum(values) for _, values in archive.column("USD"))
+        report(
+            "диапазон: column() sum",
+            scans * span,
+            time.perf_counter() - start,
+            "дней/с",
+        )
+
+        scans = 2000
+        start = time.perf_counter()
+        for _ in range(scans):
+            np.concatenate(
+                [
+                    np.frombuffer(values, dtype=np.int64)
+                    for _, values in archive.column("USD")
+                ]
+            ).mean()
+        report(
+            "диапазон: column() NumPy",
+            scans * span,
+            time.perf_counter() - start,
+            "дней/с",
+        )
+        archive.close()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,105 @@
+"""Бенчмарк CacheManager: пропускная способность get/set при большом числе ключей.
+
+Сценарии для каждого числа ключей:
+- set: запись всех ключей с собственным сроком жизни;
+- get hit: чтение существующих ключей в случайном порядке;
+- get miss: чтение отсутствующих ключей;
+- mixed LRU: 90% чтений и 10% записей по распределению Зипфа в кэш,
+  вмещающий десятую часть ключей, с долей попаданий и числом вытеснений.
+Для сравнения те же операции выполняются на cachetools.TLRUCache.
+
+Запуск: python -m benchmarks.bench_cache [число ключей ...]
+"""
+
+import random
+import sys
+import time
+from typing import Callable, List, Sequence
+
+from cachetools import TLRUCache
+
+from Crb_currency_api.cache_manager import CacheManager
+
+
+def rate(operations: int, run: Callable[[], None]) -> float:
+    """Выполнить run и вернуть число операций в секунду."""
+    start = time.perf_counter()
+    run()
+    return operations / (time.perf_counter() - start)
+
+
+def zipf_keys(keys: Sequence[str], count: int, rng: random.Random) -> List[str]:
+    """Выбрать count ключей с вероятностью, обратной рангу ключа."""
+    weights = [1 / rank for rank in range(1, len(keys) + 1)]
+    return rng.choices(keys, weights=weights, k=count)
+
+
+def bench(size: int) -> None:
+    rng = random.Random(0)
+    keys = [f"history:{day}" for day in range(size)]
+    shuffled = rng.sample(keys, len(keys))
+    missing = [f"pairs:{day}" for day in range(size)]
+
+    cache = CacheManager(maxsize=size)
+    ttls = [CacheManager.PERMANENT if index % 2 else 3600.0 for index in range(size)]
+
+    def set_all() -> None:
+        for key, ttl in zip(keys, ttls):
+            cache.set(key, key, ttl)
+
+    def get_all(sequence: Sequence[str]) -> Callable[[], None]:
+        def run() -> None:
+            get = cache.get
+            for key in sequence:
+                get(key)
+
+        return run
+
+    results = {
+        "set": rate(size, set_all),
+        "get hit": rate(size, get_all(shuffled)),
+        "get miss": rate(size, get_all(missing)),
+    }
+
+    reference = TLRUCache(maxsize=size, ttu=lambda key, value, now: now + 3600.0)
+
+    def reference_set() -> None:
+        for key in keys:
+            reference[key] = key
+
+    def reference_get() -> None:
+        get = reference.get
+        for key in shuffled:
+            get(key)
+
+    baseline = {"set": rate(size, reference_set), "get hit": rate(size, reference_get)}
+
+    operations = zipf_keys(keys, size * 2, rng)
+    writes = [rng.random() < 0.1 for _ in operations]
+    lru = CacheManager(maxsize=max(size // 10, 1))
+
+    def mixed() -> None:
+        get, put = lru.get, lru.set
+        for key, write in zip(operations, writes):
+            if write or get(key) is None:
+                put(key, key, CacheManager.PERMANENT)
+
+    results["mixed LRU"] = rate(len(operations), mixed)
+    stats = lru.stats()
+    hit_ratio = stats["hits"] / max(stats["hits"] + stats["misses"], 1)
+
+    print(f"ключей: {size:,}")
+    for name, value in results.items():
+        line = f"  {name:10} {value:>14,.0f} опер/с"
+        if name in baseline:
+            line += f"   TLRUCache {baseline[name]:>14,.0f} опер/с"
+        print(line)
+    print(
+        f"  mixed LRU: попаданий {hit_ratio:.1%}, "
+        f"вытеснено {stats['evictions_size']:,}, записей {stats['entries']:,}"
+    )
+
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or [1_000, 100_000]:
+        bench(size)
@@ -0,0 +1,55 @@
+"""Бенчмарк холодного старта: первый курс с постоянным кэшем на диске и без него.
+
+Каждая итерация имитирует новый процесс: создаётся новое хранилище курсов.
+Запуск: python -m benchmarks.bench_cold_start [задержка ЦБ в секундах]
+"""
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import httpx
+
+from benchmarks._data import make_rub_rates
+from Crb_currency_api.api_client import ApiClient
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.persistent_cache import SqliteSnapshotCache
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.testing import CbrStandIn
+
+ITERATIONS = 20
+
+
+async def first_rate(transport: httpx.MockTransport, store: RateStore) -> float:
+    """Измерить время получения первого курса новым экземпляром API."""
+    api = CrbRequestCurrencyApi(store=store, client=ApiClient(transport=transport))
+    start = time.perf_counter()
+    await api.get_currency_rate("USD")
+    elapsed = time.perf_counter() - start
+    await api.__aexit__(None, None, None)
+    return elapsed
+
+
+async def run(latency: float) -> None:
+    transport = CbrStandIn(make_rub_rates(), date.today(), latency=latency).transport()
+    without_disk = [await first_rate(transport, RateStore()) for _ in range(ITERATIONS)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "rates.sqlite3")
+        await first_rate(transport, RateStore(persistent=SqliteSnapshotCache(path)))
+        with_disk = [
+            await first_rate(transport, RateStore(persistent=SqliteSnapshotCache(path)))
+            for _ in range(ITERATIONS)
+        ]
+
+    print(f"задержка ЦБ: {latency * 1000:.0f} мс")
+    print(f"без кэша на диске: {statistics.median(without_disk) * 1000:8.2f} мс")
+    print(f"с кэшем на диске:  {statistics.median(with_disk) * 1000:8.2f} мс")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(float(sys.argv[1]) if len(sys.argv) > 1 else 0.2))
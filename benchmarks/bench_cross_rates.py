@@ -0,0 +1,60 @@
+"""Бенчмарк get_currency_rate/exchange/snapshot: пересчёт курсов и матрица.
+
+Запуск: python -m benchmarks.bench_cross_rates
+"""
+
+import asyncio
+import time
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+from benchmarks._data import make_rub_rates
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+
+CALLS = 50_000
+
+
+def rebuild_per_call(rub_rates, base, from_currency, to_currency, amount):
+    """Прежний алгоритм: пересчёт всех курсов относительно базы на каждый вызов."""
+    base_rate = rub_rates[base]
+    rates = {code: rate / base_rate for code, rate in rub_rates.items()}
+    return (rates[from_currency] / rates[to_currency]) * amount
+
+
+async def run() -> None:
+    rub_rates = make_rub_rates()
+    amount = Decimal("100")
+
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        rebuild_per_call(rub_rates, "USD", "EUR", "GBP", amount)
+    before = CALLS / (time.perf_counter() - start)
+
+    api = CrbRequestCurrencyApi(base_currency="USD", shared=False)
+    api._fetch_rates = AsyncMock(return_value=rub_rates)
+    await api.exchange("EUR", "GBP", amount)
+
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        await api.exchange("EUR", "GBP", amount)
+    after_exchange = CALLS / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        await api.get_currency_rate("EUR")
+    after_rate = CALLS / (time.perf_counter() - start)
+
+    snap = await api.snapshot()
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        snap.convert("EUR", "GBP", amount)
+    after_snapshot = CALLS / (time.perf_counter() - start)
+
+    print(f"пересчёт на каждый вызов: {before:12,.0f} вызовов/с")
+    print(f"exchange с матрицей:      {after_exchange:12,.0f} вызовов/с")
+    print(f"get_currency_rate:        {after_rate:12,.0f} вызовов/с")
+    print(f"snapshot.convert:         {after_snapshot:12,.0f} вызовов/с")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,99 @@
+"""Бенчмарк холодного старта по python -X importtime: импорт пакета и создание клиента.
+
+Каждый сценарий выполняется в новом интерпретаторе. Время импорта — сумма
+накопленного времени модулей верхнего уровня, загруженных кодом сценария
+(модули, загружаемые при старте интерпретатора, не учитываются). Медиана
+сравнивается с бюджетом; при превышении бюджета или загрузке тяжёлых
+зависимостей (httpx, tenacity, ElementTree) до первого запроса процесс
+завершается с кодом 1, поэтому бенчмарк можно запускать в CI.
+
+Запуск: python -m benchmarks.bench_import [--runs 15] [--budget-ms 150]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List, Optional, Set, Tuple
+
+SCENARIOS = {
+    "import": "import Crb_currency_api",
+    "construct": (
+        "from Crb_currency_api import CrbRequestCurrencyApi\n"
+        "CrbRequestCurrencyApi('USD')"
+    ),
+    "sync": "from Crb_currency_api import SyncCrbCurrencyApi\nSyncCrbCurrencyApi('USD')",
+}
+HEAVY_MODULES = ("httpx", "tenacity", "xml.etree.ElementTree")
+
+
+def importtime(code: str) -> List[Tuple[str, int, int]]:
+    """Выполнить код в новом интерпретаторе и разобрать вывод -X importtime.
+
+    Возвращает:
+        List[Tuple[str, int, int]]: Имя модуля с отступом вложенности, собственное
+            и накопленное время в микросекундах.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name[1:], int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(code: str, startup: Set[str]) -> Tuple[float, Set[str]]:
+    """Измерить время импорта сценария и список загруженных модулей.
+
+    Возвращает:
+        Tuple[float, Set[str]]: Время импорта в миллисекундах и имена модулей.
+    """
+    rows = importtime(code)
+    total = sum(
+        cumulative
+        for name, _, cumulative in rows
+        if not name.startswith(" ") and name not in startup
+    )
+    return total / 1000, {name.strip() for name, _, _ in rows}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    startup = {name.strip() for name, _, _ in importtime("pass")}
+    failed = False
+    for name in args.scenario or SCENARIOS:
+        timings = []
+        loaded: Set[str] = set()
+        for _ in range(args.runs):
+            elapsed, modules = measure(SCENARIOS[name], startup)
+            timings.append(elapsed)
+            loaded |= modules
+        median = statistics.median(timings)
+        heavy = [module for module in HEAVY_MODULES if module in loaded]
+        over = median > args.budget_ms
+        failed = failed or over or bool(heavy)
+        print(
+            f"{name:10} медиана {median:7.1f} мс  мин {min(timings):7.1f} мс  "
+            f"бюджет {args.budget_ms:.0f} мс{'  ПРЕВЫШЕН' if over else ''}"
+            + (f"  тяжёлые модули: {', '.join(heavy)}" if heavy else "")
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
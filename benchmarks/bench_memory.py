@@ -0,0 +1,45 @@
+"""Бенчмарк памяти: байт на снимок для словаря Decimal и компактной RateTable.
+
+Снимки разбираются из синтетических ответов XML_daily за разные дни, как при
+загрузке многолетней истории.
+Запуск: python -m benchmarks.bench_memory [число дней]
+"""
+
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks._data import make_rub_rates
+from Crb_currency_api.parsers import XmlParser
+from Crb_currency_api.testing import make_daily_xml
+
+
+def measure(name: str, parser: XmlParser, bodies) -> None:
+    """Разобрать все ответы и измерить память, удерживаемую снимками."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    snapshots = [parser.parse_snapshot(body) for body in bodies]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_snapshot = current / len(snapshots)
+    print(
+        f"{name:16} {per_snapshot:10,.0f} байт/снимок  "
+        f"{current / 2**20:8.1f} МиБ всего  разбор {elapsed:6.2f} с"
+    )
+
+
+def run(days: int) -> None:
+    start = date(2015, 1, 1)
+    bodies = [
+        make_daily_xml(make_rub_rates(seed=i), start + timedelta(days=i))
+        for i in range(days)
+    ]
+    print(f"снимков: {days}, валют в снимке: {len(make_rub_rates())}")
+    measure("словарь Decimal", XmlParser(), bodies)
+    measure("RateTable", XmlParser(compact=True), bodies)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 3650)
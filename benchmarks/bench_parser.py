@@ -0,0 +1,79 @@
+"""Бенчмарк парсера: дерево ElementTree по тексту и потоковый разбор байтов.
+
+Документ имитирует многолетнюю выгрузку: по записи Valute на каждую валюту
+за каждый день.
+Запуск: python -m benchmarks.bench_parser [число лет]
+"""
+
+import asyncio
+import sys
+import time
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+from typing import Dict
+from xml.etree import ElementTree
+
+from benchmarks._data import make_rub_rates
+from Crb_currency_api.parsers import XmlParser
+from Crb_currency_api.testing import make_daily_xml
+
+CHUNK_SIZE = 64 * 1024
+
+
+def make_large_xml(years: int) -> bytes:
+    """Сформировать документ с years * 365 публикациями всех валют."""
+    rates = make_rub_rates()
+    rows = {}
+    for day in range(years * 365):
+        for code, rate in rates.items():
+            rows[f"{code}{day}"] = rate
+    return make_daily_xml(rows, date.today())
+
+
+def tree_parse(body: bytes) -> Dict[str, Decimal]:
+    """Прежний алгоритм: декодирование в str, полное дерево, findall/find."""
+    root = ElementTree.fromstring(body.decode("windows-1251"))
+    rates = {"RUB": Decimal("1.0")}
+    for currency in root.findall("Valute"):
+        code = currency.find("CharCode").text
+        rate = currency.find("VunitRate").text
+        rates[code] = Decimal(rate.replace(",", "."))
+    return rates
+
+
+async def stream_parse(body: bytes):
+    """Потоковый разбор частями, как из httpx.Response.aiter_bytes()."""
+
+    async def chunks():
+        for i in range(0, len(body), CHUNK_SIZE):
+            yield body[i : i + CHUNK_SIZE]
+
+    return await XmlParser().parse_stream(chunks())
+
+
+def measure(name: str, func) -> None:
+    """Измерить время (без трассировки памяти) и пиковую память отдельно."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:28} {elapsed * 1000:9.1f} мс  пик памяти {peak / 2**20:8.1f} МиБ"
+        f"  курсов {len(result)}"
+    )
+
+
+def run(years: int) -> None:
+    body = make_large_xml(years)
+    print(f"размер документа: {len(body) / 2**20:.1f} МиБ ({years} лет)")
+    measure("дерево по тексту", lambda: tree_parse(body))
+    measure("байты целиком", lambda: XmlParser().parse_snapshot(body))
+    measure("поток по 64 КиБ", lambda: asyncio.run(stream_parse(body)))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,115 @@
+"""Бенчмарк потоковой конвертации файлов транзакций: строк в секунду.
+
+N транзакций со случайными валютами и моментами за 60 дней конвертируются:
+- построчно через await exchange(..., at=момент) (на выборке);
+- ConversionPipeline над асинхронным итератором строк (без файлов);
+- convert_file для CSV и JSONL (чтение, конвертация и запись).
+Курсы на каждую дату «загружаются» из синтетических данных с задержкой,
+имитирующей запрос к ЦБ (по умолчанию 20 мс).
+
+Запуск: python -m benchmarks.bench_pipeline [число строк] [задержка, с]
+"""
+
+import asyncio
+import csv
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List
+from unittest.mock import AsyncMock
+
+from benchmarks._data import CURRENCY_CODES, make_rub_rates
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.pipeline import ConversionPipeline, convert_file
+from Crb_currency_api.snapshot import RateSnapshot
+
+START = date(2024, 1, 1)
+DAYS = 60
+SAMPLE = 20_000
+
+
+def report(name: str, rows: int, elapsed: float) -> None:
+    print(f"{name:26} {rows / elapsed:>12,.0f} строк/с")
+
+
+def make_api(latency: float) -> CrbRequestCurrencyApi:
+    async def fetch(on=None):
+        await asyncio.sleep(latency)
+        return RateSnapshot(make_rub_rates(seed=on.toordinal()), date=on)
+
+    api = CrbRequestCurrencyApi(shared=False)
+    api._fetch_rates = AsyncMock(side_effect=fetch)
+    return api
+
+
+def make_rows(count: int) -> List[Dict[str, str]]:
+    rng = random.Random(0)
+    start = datetime(START.year, START.month, START.day)
+    return [
+        {
+            "id": str(index),
+            "amount": f"{rng.uniform(1, 10_000):.2f}",
+            "currency": rng.choice(CURRENCY_CODES),
+            "date": (start + timedelta(seconds=rng.randrange(DAYS * 86400))).isoformat(
+                timespec="seconds"
+            ),
+        }
+        for index in range(count)
+    ]
+
+
+async def run(count: int, latency: float) -> None:
+    rows = make_rows(count)
+
+    api = make_api(latency)
+    sample = rows[:SAMPLE]
+    start = time.perf_counter()
+    for row in sample:
+        moment = datetime.fromisoformat(row["date"])
+        await api.exchange(row["currency"], "RUB", Decimal(row["amount"]), at=moment)
+    report("exchange() по строкам", len(sample), time.perf_counter() - start)
+
+    async def source():
+        for row in rows:
+            yield dict(row)
+
+    pipeline = ConversionPipeline(
+        make_api(latency), to_currency="RUB", date_field="date"
+    )
+    start = time.perf_counter()
+    async for _ in pipeline.convert(source()):
+        pass
+    report("pipeline async iterator", count, time.perf_counter() - start)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory)
+        with open(path / "in.csv", "w", newline="") as file:
+            writer = csv.DictWriter(file, list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        with open(path / "in.jsonl", "w") as file:
+            file.writelines(json.dumps(row) + "\n" for row in rows)
+
+        for fmt in ("csv", "jsonl"):
+            pipeline = ConversionPipeline(
+                make_api(latency), to_currency="RUB", date_field="date"
+            )
+            start = time.perf_counter()
+            await convert_file(
+                pipeline, str(path / f"in.{fmt}"), str(path / f"out.{fmt}")
+            )
+            report(f"convert_file {fmt}", count, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        run(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+            float(sys.argv[2]) if len(sys.argv) > 2 else 0.02,
+        )
+    )
@@ -0,0 +1,75 @@
+"""Бенчмарк синхронного доступа из потоков: SyncCrbCurrencyApi против asyncio.run.
+
+asyncio.run на каждый вызов — прежний способ для WSGI-приложений: новый цикл
+событий, новый httpx.AsyncClient и новый кэш на каждый запрос.
+Запуск: python -m benchmarks.bench_sync [потоков] [вызовов на поток] [задержка ЦБ, с]
+"""
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from typing import Callable
+
+from benchmarks._data import make_rub_rates
+from Crb_currency_api.api_client import ApiClient
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.sync_api import SyncCrbCurrencyApi, close_sync
+from Crb_currency_api.testing import CbrStandIn
+
+
+def measure(call: Callable[[], Decimal], threads: int, calls: int) -> float:
+    """Выполнить calls вызовов в каждом из threads потоков и вернуть время, с."""
+
+    def worker(_: int) -> None:
+        for _ in range(calls):
+            call()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return time.perf_counter() - start
+
+
+def run(threads: int, calls: int, latency: float) -> None:
+    rates = make_rub_rates()
+    total = threads * calls
+
+    stand_in = CbrStandIn(rates, date.today(), latency=latency)
+    transport = stand_in.transport()
+
+    async def one_call() -> Decimal:
+        client = ApiClient(transport=transport)
+        async with CrbRequestCurrencyApi("USD", shared=False, client=client) as api:
+            return await api.exchange("EUR", "CNY", Decimal("100"))
+
+    elapsed = measure(lambda: asyncio.run(one_call()), threads, calls)
+    print(
+        f"asyncio.run на вызов:  {total / elapsed:>12,.0f} выз/с  "
+        f"запросов к ЦБ {stand_in.requests}"
+    )
+
+    stand_in = CbrStandIn(rates, date.today(), latency=latency)
+    api = SyncCrbCurrencyApi(
+        "USD", store=RateStore(), client=ApiClient(transport=stand_in.transport())
+    )
+    elapsed = measure(
+        lambda: api.exchange("EUR", "CNY", Decimal("100")), threads, calls
+    )
+    print(
+        f"SyncCrbCurrencyApi:    {total / elapsed:>12,.0f} выз/с  "
+        f"запросов к ЦБ {stand_in.requests}"
+    )
+    close_sync()
+
+
+if __name__ == "__main__":
+    args = [float(arg) for arg in sys.argv[1:]]
+    run(
+        int(args[0]) if len(args) > 0 else 8,
+        int(args[1]) if len(args) > 1 else 25,
+        args[2] if len(args) > 2 else 0.02,
+    )
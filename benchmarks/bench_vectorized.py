@@ -0,0 +1,76 @@
+"""Бенчмарк векторной конвертации столбцов: exchange() по строкам против NumPy.
+
+Столбец из N сумм со случайными парами валют конвертируется:
+- await exchange() на каждую строку (на выборке из 20 000 строк);
+- snapshot.convert() на каждую строку (на выборке);
+- exchange_array() в режиме float64 и в точном режиме Decimal;
+- exchange_array() с датой на каждую строку (30 дней истории).
+
+Запуск: python -m benchmarks.bench_vectorized [число строк]
+"""
+
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock
+
+import numpy as np
+
+from benchmarks._data import make_rub_rates
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.rate_store import RateStore
+
+SAMPLE = 20_000
+
+
+def report(name: str, rows: int, elapsed: float) -> None:
+    print(f"{name:28} {rows / elapsed:>14,.0f} строк/с")
+
+
+async def run(rows: int) -> None:
+    rub_rates = make_rub_rates()
+    codes = np.array(list(rub_rates))
+    rng = np.random.default_rng(0)
+    sources = codes[rng.integers(len(codes), size=rows)]
+    targets = codes[rng.integers(len(codes), size=rows)]
+    amounts = np.round(rng.uniform(1, 10_000, size=rows), 2)
+    decimals = np.array([Decimal(f"{amount:.2f}") for amount in amounts], dtype=object)
+
+    api = CrbRequestCurrencyApi("USD", store=RateStore(), shared=False)
+    api._fetch_rates = AsyncMock(return_value=rub_rates)
+    await api.exchange("EUR", "USD", Decimal(1))
+
+    sample = min(SAMPLE, rows)
+    start = time.perf_counter()
+    for index in range(sample):
+        await api.exchange(sources[index], targets[index], decimals[index])
+    report("exchange() по строкам", sample, time.perf_counter() - start)
+
+    snapshot = await api.snapshot()
+    start = time.perf_counter()
+    for index in range(sample):
+        snapshot.convert(sources[index], targets[index], decimals[index])
+    report("snapshot.convert() по строкам", sample, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await api.exchange_array(amounts, sources, targets)
+    report("exchange_array float64", rows, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await api.exchange_array(decimals, sources, targets, exact=True)
+    report("exchange_array точный", rows, time.perf_counter() - start)
+
+    start_day = date.today() - timedelta(days=30)
+    dates = np.datetime64(start_day) + rng.integers(30, size=rows).astype(
+        "timedelta64[D]"
+    )
+    await api.load_range(start_day, start_day + timedelta(days=29))
+    start = time.perf_counter()
+    await api.exchange_array(amounts, sources, targets, dates=dates)
+    report("exchange_array по датам", rows, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
@@ -0,0 +1,147 @@
+"""Нагрузочный тест CrbRequestCurrencyApi против локальной имитации сервера ЦБ.
+
+Сценарии:
+- cold: пустой кэш, все вызовы стартуют одновременно;
+- warm: курсы уже загружены;
+- expiry: кэш истекает посреди нагрузки;
+- expiry_swr: то же, но с отдачей устаревшего снимка и фоновым обновлением.
+
+Для каждого сценария выводятся пропускная способность, p50/p99 задержки,
+число ошибок и запросов к «ЦБ». Результат печатается в JSON (или пишется в
+файл --output), чтобы его можно было сравнивать между запусками.
+
+Запуск: python -m benchmarks.load_test --calls 20000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from benchmarks._data import make_rub_rates
+from Crb_currency_api.api_client import ApiClient
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.testing import CbrStandIn
+
+SCENARIOS = ("cold", "warm", "expiry", "expiry_swr")
+BASES = ("RUB", "USD", "EUR", "CNY")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Вернуть q-й процентиль (0..100) по методу ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_scenario(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Выполнить один сценарий и вернуть его метрики."""
+    rates = make_rub_rates()
+    codes = list(rates)
+    stand_in = CbrStandIn(
+        rates,
+        date.today(),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+    )
+    client = ApiClient(transport=stand_in.transport())
+    store = RateStore(max_staleness=3600 if name == "expiry_swr" else None)
+    apis = [CrbRequestCurrencyApi(base, store=store, client=client) for base in BASES]
+    if name != "cold":
+        await apis[0].snapshot()
+    warmup_requests = stand_in.requests
+
+    rng = random.Random(args.seed)
+    latencies: List[float] = []
+    errors = 0
+    remaining = args.calls
+    expire_at = args.calls // 2 if name.startswith("expiry") else None
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            if remaining == expire_at:
+                store.cache.clear()  # Граница публикации: TTL истёк
+            api = rng.choice(apis)
+            from_code, to_code = rng.choice(codes), rng.choice(codes)
+            start = time.perf_counter()
+            try:
+                if rng.random() < 0.5:
+                    await api.get_currency_rate(from_code)
+                else:
+                    await api.exchange(from_code, to_code, Decimal("100"))
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(args.latency * 2)  # Дать завершиться фоновому обновлению
+    await client.client.aclose()
+
+    return {
+        "scenario": name,
+        "calls": len(latencies),
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_per_s": round(len(latencies) / elapsed, 1),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "latency_mean_ms": round(statistics.fmean(latencies) * 1000, 4),
+        "latency_max_ms": round(max(latencies) * 1000, 4),
+        "upstream_requests": stand_in.requests - warmup_requests,
+        "upstream_errors": stand_in.errors,
+        "coalesced_requests": store.inflight.coalesced,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="секунды")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append")
+    parser.add_argument("--output", help="файл для JSON (по умолчанию: stdout)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = [await run_scenario(name, args) for name in args.scenario or SCENARIOS]
+    report = json.dumps(
+        {"python": sys.version.split()[0], "results": results},
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report)
+    else:
+        print(report)
+    for result in results:
+        print(
+            f"{result['scenario']:11} {result['throughput_per_s']:>10,.0f} выз/с  "
+            f"p50 {result['latency_p50_ms']:8.3f} мс  "
+            f"p99 {result['latency_p99_ms']:8.3f} мс  "
+            f"запросов к ЦБ {result['upstream_requests']}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
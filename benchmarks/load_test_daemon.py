@@ -0,0 +1,184 @@
+"""Нагрузочный тест локального сервиса курсов (Crb_currency_api.daemon).
+
+Сервис запускается на localhost поверх имитации ЦБ. Сценарии:
+- rate: одиночные GET /v1/rate и /v1/convert от многих клиентов;
+- batch: POST /v1/batch по --batch-size операций;
+- fleet: --services экземпляров CrbRequestCurrencyApi в режиме клиента
+  сервиса, каждый со своим хранилищем, как отдельные процессы парка.
+
+Запуск: python -m benchmarks.load_test_daemon --calls 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks._data import make_rub_rates
+from benchmarks.load_test import percentile
+from Crb_currency_api.api_client import ApiClient
+from Crb_currency_api.crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.daemon import RateServer
+from Crb_currency_api.rate_store import RateStore
+from Crb_currency_api.testing import CbrStandIn
+
+SCENARIOS = ("rate", "batch", "fleet")
+
+
+async def drive(
+    call: Callable[[random.Random], Awaitable[Any]], calls: int, concurrency: int
+) -> Dict[str, Any]:
+    """Выполнить calls вызовов в concurrency сопрограммах и вернуть метрики."""
+    rng = random.Random(0)
+    latencies: List[float] = []
+    errors = 0
+    remaining = calls
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                await call(rng)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_per_s": round(len(latencies) / elapsed, 1),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "latency_mean_ms": round(statistics.fmean(latencies) * 1000, 4),
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    rates = make_rub_rates()
+    codes = list(rates)
+    stand_in = CbrStandIn(rates, date.today(), latency=args.latency)
+    server = RateServer(client=ApiClient(transport=stand_in.transport()), refresh=False)
+    runner = web.AppRunner(server.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    url = f"http://{host}:{port}"
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    results = []
+
+    # Нагрузку даёт aiohttp: пул соединений httpx сам становится узким местом
+    async with aiohttp.ClientSession(url, connector=connector) as http:
+
+        async def single(rng: random.Random) -> None:
+            if rng.random() < 0.5:
+                params = {"code": rng.choice(codes), "base": rng.choice(codes)}
+                request = http.get("/v1/rate", params=params)
+            else:
+                params = {
+                    "from": rng.choice(codes),
+                    "to": rng.choice(codes),
+                    "amount": "100",
+                }
+                request = http.get("/v1/convert", params=params)
+            async with request as response:
+                response.raise_for_status()
+                await response.read()
+
+        async def batch(rng: random.Random) -> None:
+            operations = [
+                {
+                    "op": "convert",
+                    "from": rng.choice(codes),
+                    "to": rng.choice(codes),
+                    "amount": "100",
+                }
+                for _ in range(args.batch_size)
+            ]
+            request = http.post("/v1/batch", json={"requests": operations})
+            async with request as response:
+                response.raise_for_status()
+                await response.read()
+
+        for name in args.scenario or SCENARIOS:
+            before = stand_in.requests
+            if name == "rate":
+                result = await drive(single, args.calls, args.concurrency)
+            elif name == "batch":
+                result = await drive(batch, args.calls // 10, args.concurrency)
+                result["operations_per_s"] = round(
+                    result["throughput_per_s"] * args.batch_size, 1
+                )
+            else:
+                services = [
+                    CrbRequestCurrencyApi(base, store=RateStore(), daemon_url=url)
+                    for base in random.Random(1).choices(codes, k=args.services)
+                ]
+
+                async def fleet(rng: random.Random) -> None:
+                    api = rng.choice(services)
+                    await api.exchange(rng.choice(codes), rng.choice(codes), Decimal(1))
+
+                result = await drive(fleet, args.calls, args.concurrency)
+                for api in services:
+                    await api.__aexit__(None, None, None)
+            result["scenario"] = name
+            result["upstream_requests"] = stand_in.requests - before
+            results.append(result)
+
+    await runner.cleanup()
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--services", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.05, help="секунды")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append")
+    parser.add_argument("--output", help="файл для JSON (по умолчанию: stdout)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = await run(args)
+    report = json.dumps(
+        {"python": sys.version.split()[0], "results": results},
+        ensure_ascii=False,
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report)
+    else:
+        print(report)
+    for result in results:
+        print(
+            f"{result['scenario']:6} {result['throughput_per_s']:>10,.0f} выз/с  "
+            f"p50 {result['latency_p50_ms']:8.3f} мс  "
+            f"p99 {result['latency_p99_ms']:8.3f} мс  "
+            f"запросов к ЦБ {result['upstream_requests']}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
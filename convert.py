@@ -0,0 +1,5 @@
+from Crb_currency_api.pipeline import main
+
+if __name__ == "__main__":
+    # Запуск: python convert.py transactions.csv converted.csv --to RUB --date-field date
+    main()
@@ -0,0 +1,5 @@
+from Crb_currency_api.daemon import main
+
+if __name__ == "__main__":
+    # Запуск: python daemon.py --port 8080 (или --unix /run/crb-rates.sock)
+    main()
@@ -1,6 +1,7 @@
 import asyncio
 from decimal import Decimal
 from Crb_currency_api import CrbRequestCurrencyApi
+from Crb_currency_api.rate_store import close_shared
 
 
 async def main():
@@ -30,6 +31,9 @@ async def main():
         usd_to_rud = await api.exchange("USD", "RUB", Decimal("1"))
         print(f"1 USD = {usd_to_rud} RUB")
 
+    # Все экземпляры выше использовали один снимок курсов и один пул соединений
+    await close_shared()
+
 
 if __name__ == "__main__":
     asyncio.run(main())